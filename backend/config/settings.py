@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -81,21 +83,160 @@ WSGI_APPLICATION = 'config.wsgi.application'
 #     }
 # }
 
+# Connection details come from the environment (see docker-compose.yml);
+# the defaults match a local PostgreSQL install.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": "project_management",
-        "USER": "postgres",
-        "PASSWORD": "1212",
-        "HOST": "localhost",
-        "PORT": 5432,
+        "NAME": os.environ.get("DB_NAME", "project_management"),
+        "USER": os.environ.get("DB_USER", "postgres"),
+        "PASSWORD": os.environ.get("DB_PASS", "1212"),
+        "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": int(os.environ.get("DB_PORT", 5432)),
+        # Check a reused connection (persistent or from the pool) before a
+        # request gets it, so a dropped server connection is replaced
+        # instead of failing the request.
+        "CONN_HEALTH_CHECKS": True,
+        # Seconds a connection outlives its request when the pool is off;
+        # 0 opens a new connection for every request.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        "OPTIONS": {},
     }
 }
 
+# psycopg 3 connection pool, shared by all threads of the process. Requests
+# borrow a connection and return it when they finish; Django refuses
+# CONN_MAX_AGE together with a pool, so it is forced to 0 here. On by default
+# only where psycopg 3 and psycopg_pool are installed: Django has no pool for
+# psycopg2 and fails to connect if one is configured.
+pool_available = find_spec("psycopg_pool") is not None
+if os.environ.get("DB_POOL", str(pool_available)).lower() in ("1", "true", "yes", "on"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        # seconds a request waits for a free connection before failing
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # connections are recycled after this many seconds (with some jitter)
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800)),
+        # idle connections above min_size are closed after this many seconds
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 600)),
+    }
+
 GRAPHENE = {
     "SCHEMA": "config.schema.schema",
 }
 
+# Keyset pagination for connection fields (core/pagination.py)
+GRAPHQL_DEFAULT_PAGE_SIZE = 50
+GRAPHQL_MAX_PAGE_SIZE = 100
+
+# Query depth/cost budgets enforced before execution (core/complexity.py).
+# "organizations" overrides the default per organization slug, e.g.
+# {"acme": {"max_cost": 50000}}.
+GRAPHQL_QUERY_LIMITS = {
+    "default": {"max_depth": 10, "max_cost": 20000},
+    "organizations": {},
+}
+
+# Parsed-document cache and Apollo-style persisted queries (core/persisted_queries.py).
+# With ALLOWLIST_ONLY, only operations whose sha256 is in ALLOWLIST_FILE
+# (a JSON {sha256: query} manifest) are executed.
+GRAPHQL_PERSISTED_QUERIES = {
+    "CACHE_SIZE": 256,
+    "ALLOWLIST_ONLY": False,
+    "ALLOWLIST_FILE": None,
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "graphql": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "graphql-responses",
+    },
+}
+
+# Opt-in response cache for tenant-scoped read queries (core/response_cache.py).
+# Mutations bump per-organization/per-project generations, so stale entries
+# are never served; TIMEOUT bounds staleness from writes outside GraphQL.
+GRAPHQL_RESPONSE_CACHE = {
+    "ENABLED": False,
+    "CACHE_ALIAS": "graphql",
+    "TIMEOUT": 300,
+}
+
+# organizationStats (core/stats.py). With SNAPSHOTS on, stats are served from
+# OrganizationStatsSnapshot rows refreshed by `manage.py refresh_organization_stats`
+# (schedule it); snapshots older than MAX_AGE seconds are recomputed on read.
+ORGANIZATION_STATS = {
+    "SNAPSHOTS": False,
+    "MAX_AGE": None,
+}
+
+# Comment partitions and archives (core/comment_archive.py). On PostgreSQL
+# comments are partitioned by month; `manage.py archive_comments` (schedule it)
+# creates the next PARTITION_MONTHS_AHEAD partitions and moves months older
+# than RETENTION_DAYS into gzip files under DIRECTORY (relative to BASE_DIR).
+COMMENT_ARCHIVE = {
+    "DIRECTORY": "archive/comments",
+    "RETENTION_DAYS": 365,
+    "PARTITION_MONTHS_AHEAD": 3,
+}
+
+# Organization exports (core/export.py): GET /api/organizations/<slug>/export/
+# and `manage.py export_organization` fetch and write CHUNK_SIZE rows at a time.
+EXPORT = {
+    "CHUNK_SIZE": 2000,
+}
+
+# Project deletion (core/deletion.py): deleteProject hides the project at once;
+# `manage.py purge_deleted_projects` (schedule it) then purges its rows
+# CHUNK_SIZE at a time, one transaction per chunk and PAUSE seconds apart.
+PROJECT_PURGE = {
+    "CHUNK_SIZE": 1000,
+    "PAUSE": 0.0,
+}
+
+# Resolver and SQL timings per field path (core/instrumentation.py). Staff,
+# and requests sending DEBUG_HEADER while DEBUG is on, get them in
+# extensions.trace and Server-Timing. Operations slower than SLOW_OPERATION_MS
+# (off when None) are logged as JSON on the core.instrumentation logger.
+GRAPHQL_INSTRUMENTATION = {
+    "DEBUG_HEADER": "X-GraphQL-Debug",
+    "SLOW_OPERATION_MS": None,
+    "N_PLUS_ONE_THRESHOLD": 5,
+}
+
+# Largest item list accepted by bulkCreateTasks / bulkUpdateTasks
+GRAPHQL_BULK_MAX_ITEMS = 1000
+
+# Serve /graphql/ with core.views.AsyncGraphQLView (queries run on the event
+# loop). Enable when running under ASGI; under WSGI keep the sync view.
+GRAPHQL_ASYNC_VIEW = False
+
+# GraphQL subscriptions over WebSockets (config/asgi.py, core/websocket.py).
+# BROKER fans events out per project; the in-process broker only reaches
+# subscribers connected to the same process.
+GRAPHQL_SUBSCRIPTIONS = {
+    "BROKER": "core.broker.InProcessBroker",
+    "QUEUE_SIZE": 100,
+    "PATH": "/graphql/",
+    "CONNECTION_INIT_TIMEOUT": 10,
+}
+
+# Process-wide slug -> id cache for organizations and projects. Renames and
+# deletes bump a generation kept in the CACHE_ALIAS cache, which clears the
+# other processes' copies on their next request. That cache must be shared
+# (Redis, Memcached, database) when running more than one worker: with a
+# per-process LocMemCache, other workers keep old slugs for up to TTL seconds.
+TENANT_CACHE = {
+    "CACHE_SIZE": 4096,
+    "TTL": 300,
+    "CACHE_ALIAS": "default",
+}
+
 SESSION_COOKIE_SAMESITE = "Lax"  
 SESSION_COOKIE_SECURE = False  
 CORS_ALLOWED_ORIGINS = [
@@ -14,19 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 
-from core.views import login_view, logout_view, me_view
+from core.views import AsyncGraphQLView, GraphQLView, export_view, login_view, logout_view, me_view
+
+# the async view only pays off under ASGI (uvicorn config.asgi:application)
+graphql_view = AsyncGraphQLView if settings.GRAPHQL_ASYNC_VIEW else GraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql/", csrf_exempt(graphql_view.as_view(graphiql=True))),
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
     path("api/me/", me_view, name="me"),
+    path("api/organizations/<slug:organization_slug>/export/", export_view, name="export"),
     # path('session/', session_view, name='api-session'),
     # path('whoami/', whoami_view, name='api-whoami'),
 ]
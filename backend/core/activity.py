@@ -0,0 +1,97 @@
+"""
+Activity feed: ActivityEvent rows appended by the mutations.
+
+Each mutation adds one event with one INSERT inside its own transaction,
+so the feed commits or rolls back with the change it describes; the bulk
+mutations add one event for the whole batch, keyed by task id. Updates
+store only the fields that changed, as ``{field: [old, new]}``. ``activity`` reads the feed newest
+first with keyset pages on (created_at, id), served by the per-organization
+and per-project indexes.
+"""
+import graphene
+from asgiref.sync import sync_to_async
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from core import tenancy
+from core.models import ActivityEvent
+from core.pagination import build_connection, paginate
+from core.queries import is_async
+from core.subscriptions import changed_fields, row_fields
+
+ACTIVITY_ORDER = ("-created_at", "-id")
+
+# what a created row's event keeps of it
+SUMMARY_FIELDS = {
+    "project": ("name", "status"),
+    "task": ("title", "status", "assignee_email"),
+    "comment": ("author_email",),
+}
+
+
+def actor_id(request):
+    user = getattr(request, "user", None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def diff(before, instance):
+    """``{field: [old, new]}`` between a ``row_fields`` snapshot and ``instance``."""
+    after = row_fields(instance)
+    return {name: [before[name], after[name]] for name in changed_fields(before, after)}
+
+
+def summary(kind, instance):
+    return {name: getattr(instance, name) for name in SUMMARY_FIELDS[kind]}
+
+
+def record(request, organization_id, action, project_id=None, task_id=None, changes=None):
+    ActivityEvent.objects.create(
+        organization_id=organization_id,
+        project_id=project_id,
+        task_id=task_id,
+        action=action,
+        actor_id=actor_id(request),
+        changes=changes or {},
+    )
+
+
+# === TYPES ===
+class ActivityEventType(DjangoObjectType):
+    class Meta:
+        model = ActivityEvent
+        fields = ("id", "project_id", "task_id", "action", "actor_id", "changes", "created_at")
+
+
+class ActivityEventConnection(graphene.relay.Connection):
+    class Meta:
+        node = ActivityEventType
+
+
+class ActivityQuery(graphene.ObjectType):
+    activity = graphene.Field(
+        ActivityEventConnection,
+        organization_slug=graphene.String(required=True),
+        project_slug=graphene.String(description="Only this project's events"),
+        first=graphene.Int(),
+        after=graphene.String(),
+        description="Newest first",
+    )
+
+    def resolve_activity(root, info, organization_slug, project_slug=None, first=None, after=None):
+        def run():
+            if project_slug is None:
+                org_id = tenancy.organization_id(info.context, organization_slug)
+                if org_id is None:
+                    raise GraphQLError("Organization not found.")
+                events = ActivityEvent.objects.filter(organization_id=org_id)
+            else:
+                project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+                if project_id is None:
+                    raise GraphQLError("Project not found for this organization.")
+                events = ActivityEvent.objects.filter(project_id=project_id)
+            rows = paginate(events, first, after, ACTIVITY_ORDER)
+            return build_connection(ActivityEventConnection, rows, first, after, ACTIVITY_ORDER)
+
+        if is_async(info):
+            return sync_to_async(run)()
+        return run()
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        from core.instrumentation import install_query_recorder
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(install_query_recorder)
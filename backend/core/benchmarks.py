@@ -0,0 +1,370 @@
+"""
+In-process throughput measurements for the GraphQL views.
+
+Requests are built with Django's request factories and sent straight to
+the view, so the numbers compare execution paths (thread pool vs event
+loop) without a web server or network in between.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import cycle, islice
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory, RequestFactory
+
+from core.counters import rebuild_task_counts
+from core.models import ActivityEvent, Project, Task
+
+
+def graphql_body(query, variables=None):
+    return json.dumps({"query": query, "variables": variables or {}})
+
+
+def summarize(latencies, elapsed, failures=0):
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return round(latencies[min(count - 1, int(fraction * count))] * 1000, 2)
+
+    return {
+        "requests": count,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+@contextmanager
+def simulated_db_latency(seconds):
+    """
+    Add ``seconds`` to every query on connections opened inside the block,
+    like the round trip to a database on another host.
+    """
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if not seconds:
+        yield
+        return
+    connections.close_all()
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        connections.close_all()
+
+
+@contextmanager
+def database_settings(alias="default", **overrides):
+    """
+    Apply ``overrides`` to ``DATABASES[alias]`` for the block, e.g.
+    ``CONN_MAX_AGE`` or ``OPTIONS``. Open connections and the connection
+    pool are closed on the way in and out so the new values take effect.
+    """
+    settings_dict = connections.settings[alias]
+    saved = {key: settings_dict[key] for key in overrides}
+
+    def reset():
+        connections.close_all()
+        if hasattr(connections[alias], "close_pool"):
+            connections[alias].close_pool()
+
+    reset()
+    settings_dict.update(overrides)
+    try:
+        yield
+    finally:
+        reset()
+        settings_dict.update(saved)
+
+
+def server_session(connection):
+    """Identifies the server-side session behind a Django connection."""
+    raw = connection.connection
+    if connection.vendor == "postgresql":
+        # psycopg 3 / psycopg2
+        return raw.info.backend_pid if hasattr(raw, "info") else raw.get_backend_pid()
+    # holding the connection object keeps its identity unique
+    return raw
+
+
+@contextmanager
+def track_connections(alias="default"):
+    """
+    Count the connects Django makes inside the block and the distinct
+    server sessions behind them. Without a pool or persistent connections
+    every connect is a new session; with one, sessions are reused.
+    """
+    stats = {"connects": 0, "sessions": 0}
+    sessions = set()
+    lock = threading.Lock()
+
+    def record(sender, connection, **kwargs):
+        if connection.alias == alias:
+            with lock:
+                stats["connects"] += 1
+                sessions.add(server_session(connection))
+                stats["sessions"] = len(sessions)
+
+    connection_created.connect(record)
+    try:
+        yield stats
+    finally:
+        connection_created.disconnect(record)
+
+
+def run_sync(view, body, requests, threads):
+    """``requests`` POSTs through a sync view from a pool of ``threads`` (WSGI workers)."""
+    factory = RequestFactory()
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            response = view(factory.post("/graphql/", data=body, content_type="application/json"))
+        finally:
+            # what request_finished does after every WSGI request
+            close_old_connections()
+        return time.perf_counter() - start, response.status_code != 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(one, range(requests)))
+    return summarize(
+        [latency for latency, _ in results],
+        time.perf_counter() - start,
+        sum(failed for _, failed in results),
+    )
+
+
+def run_async(view, body, requests, concurrency):
+    """``requests`` POSTs through an async view, ``concurrency`` in flight at a time."""
+    factory = AsyncRequestFactory()
+
+    async def one(semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            # per-request thread for sync_to_async work, as ASGIHandler sets up
+            async with ThreadSensitiveContext():
+                try:
+                    response = await view(
+                        factory.post("/graphql/", data=body, content_type="application/json")
+                    )
+                finally:
+                    await sync_to_async(close_old_connections)()
+            return time.perf_counter() - start, response.status_code != 200
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(semaphore) for _ in range(requests)))
+        return summarize(
+            [latency for latency, _ in results],
+            time.perf_counter() - start,
+            sum(failed for _, failed in results),
+        )
+
+    return asyncio.run(main())
+
+
+# === FRONTEND OPERATIONS ===
+# The documents the frontend sends (frontend/src), replayed against
+# generated data. ``variables`` picks the targets for request ``i`` from
+# the data set described by ``dataset``.
+
+TASK_FIELDS = """
+  id title description status assigneeEmail
+  comments { edges { node { id content authorEmail timestamp __typename } } }
+  __typename
+"""
+
+OPERATIONS = {
+    "projects": (
+        """query($organizationSlug: String!) {
+          projects(organizationSlug: $organizationSlug, first: 100) {
+            edges { node { id name description taskCount completionRate } }
+          }
+        }""",
+        lambda data, i: {"organizationSlug": data["organization"]},
+    ),
+    "project": (
+        """query($organizationSlug: String!, $projectSlug: String!) {
+          project(organizationSlug: $organizationSlug, projectSlug: $projectSlug) {
+            id name slug description status dueDate taskCount completionRate
+          }
+        }""",
+        lambda data, i: {"organizationSlug": data["organization"], "projectSlug": data["projects"][i][1]},
+    ),
+    "tasks": (
+        f"""query GetTasks($organizationSlug: String!, $projectSlug: String!) {{
+          tasks(organizationSlug: $organizationSlug, projectSlug: $projectSlug, first: 100) {{
+            edges {{ node {{ {TASK_FIELDS} }} }}
+          }}
+        }}""",
+        lambda data, i: {"organizationSlug": data["organization"], "projectSlug": data["projects"][i][1]},
+    ),
+    "comments": (
+        """query($organizationSlug: String!, $projectSlug: String!, $taskId: Int!) {
+          comments(organizationSlug: $organizationSlug, projectSlug: $projectSlug, taskId: $taskId) {
+            edges { node { id content authorEmail timestamp } }
+          }
+        }""",
+        lambda data, i: {
+            "organizationSlug": data["organization"],
+            "projectSlug": data["tasks"][i][1],
+            "taskId": data["tasks"][i][0],
+        },
+    ),
+    "createTask": (
+        f"""mutation CreateTask(
+          $organizationSlug: String!, $projectSlug: String!, $title: String!,
+          $description: String, $status: String!, $assigneeEmail: String
+        ) {{
+          createTask(
+            organizationSlug: $organizationSlug, projectSlug: $projectSlug, title: $title,
+            description: $description, status: $status, assigneeEmail: $assigneeEmail
+          ) {{ task {{ {TASK_FIELDS} }} __typename }}
+        }}""",
+        lambda data, i: {
+            "organizationSlug": data["organization"],
+            "projectSlug": data["projects"][i][1],
+            "title": f"{BENCHMARK_TITLE} {i}",
+            "description": "",
+            "status": "TODO",
+            "assigneeEmail": "",
+        },
+    ),
+    "updateTask": (
+        f"""mutation UpdateTask(
+          $organizationSlug: String!, $projectSlug: String!, $taskId: ID!, $status: String
+        ) {{
+          updateTask(
+            organizationSlug: $organizationSlug, projectSlug: $projectSlug,
+            taskId: $taskId, status: $status
+          ) {{ task {{ {TASK_FIELDS} dueDate }} __typename }}
+        }}""",
+        # only the run's own tasks (``add_target_tasks``) are edited
+        lambda data, i: {
+            "organizationSlug": data["organization"],
+            "projectSlug": data["target_tasks"][i][1],
+            "taskId": data["target_tasks"][i][0],
+            "status": ("TODO", "IN_PROGRESS", "DONE")[i % 3],
+        },
+    ),
+}
+
+# title of the tasks a run adds, so they can be removed afterwards
+BENCHMARK_TITLE = "Benchmark task"
+
+
+def dataset(organization, sample=200):
+    """
+    Targets for OPERATIONS in one organization: its slug, up to ``sample``
+    projects ``(id, slug)`` and tasks ``(id, project slug)``.
+    """
+    projects = list(
+        Project.objects.filter(organization=organization).order_by("id").values_list("id", "slug")[:sample]
+    )
+    tasks = list(
+        Task.objects.filter(project__organization=organization)
+        .exclude(title__startswith=BENCHMARK_TITLE)
+        .order_by("id").values_list("id", "project__slug")[:sample]
+    )
+    return {
+        "organization": organization.slug,
+        "projects": projects,
+        "tasks": tasks,
+        "target_tasks": [],
+    }
+
+
+def add_target_tasks(data):
+    """
+    Create one BENCHMARK_TITLE task per sampled task, in the same projects,
+    for updateTask to edit instead of real tasks.
+    """
+    project_ids = dict(
+        Project.objects.filter(organization__slug=data["organization"], slug__in={slug for _, slug in data["tasks"]})
+        .values_list("slug", "id")
+    )
+    data["target_tasks"] = [
+        (Task.objects.create(project_id=project_ids[slug], title=f"{BENCHMARK_TITLE} target {i}").id, slug)
+        for i, (_, slug) in enumerate(data["tasks"])
+    ]
+
+
+def remove_benchmark_rows(organization):
+    """Delete the tasks a run added and the activity its mutations recorded."""
+    tasks = Task.objects.filter(project__organization=organization, title__startswith=BENCHMARK_TITLE)
+    project_ids = set(tasks.values_list("project_id", flat=True))
+    with transaction.atomic():
+        ActivityEvent.objects.filter(organization=organization, task_id__in=tasks.values("id")).delete()
+        # concurrent updates of one task can skew the counters where
+        # select_for_update is a no-op (SQLite): recount, then let post_delete
+        # take the deleted tasks off
+        rebuild_task_counts(project_ids)
+        tasks.delete()
+
+
+def run_operation(view, name, data, requests, threads):
+    """
+    Replay OPERATIONS[name] ``requests`` times through a sync view from
+    ``threads`` workers. Adds SQL queries per request to the summary;
+    responses with GraphQL errors count as failures.
+    """
+    query, variables = OPERATIONS[name]
+    # request i targets the i-th project / task, wrapping around the sample
+    data = {
+        **data,
+        "projects": list(islice(cycle(data["projects"]), requests)),
+        "tasks": list(islice(cycle(data["tasks"]), requests)),
+        "target_tasks": list(islice(cycle(data["target_tasks"]), requests)),
+    }
+    bodies = [graphql_body(query, variables(data, i)) for i in range(requests)]
+    factory = RequestFactory()
+
+    def one(body):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count):
+                response = view(factory.post("/graphql/", data=body, content_type="application/json"))
+        finally:
+            close_old_connections()
+        failed = response.status_code != 200 or "errors" in json.loads(response.content)
+        return time.perf_counter() - start, failed, queries
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(one, bodies))
+    summary = summarize(
+        [latency for latency, _, _ in results],
+        time.perf_counter() - start,
+        sum(failed for _, failed, _ in results),
+    )
+    queries = [count for _, _, count in results]
+    summary["queries_per_request"] = round(sum(queries) / len(queries), 2) if queries else 0
+    summary["max_queries"] = max(queries, default=0)
+    return summary
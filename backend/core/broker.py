@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "BROKER": "core.broker.InProcessBroker",
+    # pending messages per subscriber before it is cut off
+    "QUEUE_SIZE": 100,
+    "PATH": "/graphql/",
+    "CONNECTION_INIT_TIMEOUT": 10,
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "GRAPHQL_SUBSCRIPTIONS", {})}
+
+
+class Broker:
+    """
+    Fan-out of subscription events by channel.
+
+    ``publish`` may be called from any thread (mutations run synchronously);
+    ``subscribe`` is an async iterator consumed on the WebSocket's event
+    loop. Messages are dicts of plain Python values; brokers that cross
+    process boundaries must serialize them without losing types (pickle).
+    """
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Broker for a single process: one bounded asyncio queue per subscriber."""
+
+    # ends a subscriber's stream; it fell behind and must resubscribe
+    OVERFLOW = None
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # the subscriber's loop is gone; its stream never finished
+                self._remove(channel, (loop, queue))
+
+    def _deliver(self, queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Subscriber fell %d messages behind; closing its stream.", queue.qsize())
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.OVERFLOW)
+
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(get_config()["QUEUE_SIZE"]))
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            while True:
+                message = await subscriber[1].get()
+                if message is self.OVERFLOW:
+                    return
+                yield message
+        finally:
+            self._remove(channel, subscriber)
+
+    def _remove(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    path = get_config()["BROKER"]
+    with _brokers_lock:
+        broker = _brokers.get(path)
+        if broker is None:
+            broker = _brokers[path] = import_string(path)()
+    return broker
+
+
+def publish_on_commit(channel, message):
+    """Publish once the surrounding transaction commits (right away outside one)."""
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
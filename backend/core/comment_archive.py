@@ -0,0 +1,262 @@
+"""
+Monthly archival of task comments.
+
+On PostgreSQL core_taskcomment is partitioned by month of ``timestamp``
+(migration 0010): ``ensure_partitions`` creates the coming months, and
+archiving a month detaches and drops its partition instead of deleting
+its rows, so archival costs no DELETE, no bloat and no vacuum. Reads
+filter by task and cannot be pruned to one month; they probe the
+(task, timestamp, id) index of every live partition, and keyset pages
+after the first skip the partitions before their cursor. Other databases
+delete the archived rows instead.
+
+An archive file holds one month as gzip-compressed NDJSON (``zcat`` reads
+it). Each task's comments are a separate gzip member, and
+ArchivedCommentBlock records its byte range, so ``archived_comments``
+reads just that task's block instead of the whole month.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import ArchivedCommentBlock, CommentArchive, TaskComment
+from core.pagination import decode_cursor, page_size, paginate
+
+DEFAULT_CONFIG = {
+    "DIRECTORY": "archive/comments",
+    # months whose comments are all older than this are archived
+    "RETENTION_DAYS": 365,
+    "PARTITION_MONTHS_AHEAD": 3,
+}
+
+PARENT = "core_taskcomment"
+DEFAULT_PARTITION = "core_taskcomment_default"
+FIELDS = ("id", "task_id", "content", "author_email", "timestamp")
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "COMMENT_ARCHIVE", {})}
+
+
+def archive_directory():
+    return Path(settings.BASE_DIR) / get_config()["DIRECTORY"]
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f"{PARENT}_p{start:%Y%m}"
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [PARENT])
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """``{month start: partition name}`` of the monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [PARENT],
+        )
+        names = [name for (name,) in cursor.fetchall() if name != DEFAULT_PARTITION]
+    return {
+        datetime.strptime(name[-6:], "%Y%m").replace(tzinfo=dt_timezone.utc): name
+        for name in names
+    }
+
+
+# === PARTITIONS ===
+
+def ensure_partitions(months_ahead=None):
+    """Create the partitions of this month and the next ``months_ahead``; returns the new names."""
+    if not is_partitioned():
+        return []
+    if months_ahead is None:
+        months_ahead = get_config()["PARTITION_MONTHS_AHEAD"]
+    existing = partitions()
+    start, created = month_start(timezone.now()), []
+    for _ in range(months_ahead + 1):
+        if start not in existing:
+            create_partition(start)
+            created.append(partition_name(start))
+        start = next_month(start)
+    return created
+
+
+@transaction.atomic
+def create_partition(start):
+    name, end = partition_name(start), next_month(start)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    columns = "id, content, author_email, \"timestamp\", task_id"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT 1 FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s LIMIT 1',
+            [start, end],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {PARENT} {bounds}")
+            return
+        # rows for this month already landed in the default partition: move
+        # them into a new table, then attach it (PostgreSQL refuses to create
+        # a partition whose rows sit in the default one)
+        cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING ALL)")
+        cursor.execute(
+            f'INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s',
+            [start, end],
+        )
+        cursor.execute(
+            f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s', [start, end]
+        )
+        cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}")
+
+
+# === ARCHIVING ===
+
+def archivable_months(cutoff):
+    """Starts of the months entirely before ``cutoff`` that still hold comments (or partitions)."""
+    months = set(
+        TaskComment.objects.filter(timestamp__lt=cutoff)
+        .annotate(month=TruncMonth("timestamp", tzinfo=dt_timezone.utc))
+        .values_list("month", flat=True)
+        .distinct()
+    )
+    months = {month_start(month) for month in months}
+    if is_partitioned():
+        months |= set(partitions())
+    return sorted(month for month in months if next_month(month) <= cutoff)
+
+
+def archive_month(start, keep_detached=False):
+    """
+    Write one month of comments to an archive file, then remove them
+    from TaskComment. Returns the CommentArchive (None for an empty month).
+    """
+    end = next_month(start)
+    directory = archive_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    # a month can be archived again if late rows arrive; never overwrite
+    sequence = CommentArchive.objects.filter(period_start=start).count()
+    file_name = f"comments-{start:%Y%m}" + (f"-{sequence}" if sequence else "") + ".ndjson.gz"
+    path = directory / file_name
+
+    rows = (
+        TaskComment.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by("task_id", "timestamp", "id")
+        .values_list(*FIELDS)
+        .iterator(chunk_size=2000)
+    )
+    blocks, total = [], 0
+    with open(path, "wb") as archive_file:
+        for task_id, comments in groupby(rows, key=lambda row: row[1]):
+            lines = [
+                json.dumps(dict(zip(FIELDS, row)), default=lambda value: value.isoformat())
+                for row in comments
+            ]
+            member = gzip.compress(("\n".join(lines) + "\n").encode())
+            blocks.append(ArchivedCommentBlock(
+                task_id=task_id, offset=archive_file.tell(), length=len(member), comment_count=len(lines),
+            ))
+            archive_file.write(member)
+            total += len(lines)
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+
+    if not total:
+        # an empty partition: nothing to keep
+        path.unlink()
+        blocks = None
+
+    with transaction.atomic():
+        archive = blocks and CommentArchive.objects.create(
+            period_start=start, period_end=end, file_name=file_name, comment_count=total,
+        )
+        for block in blocks or ():
+            block.archive = archive
+        ArchivedCommentBlock.objects.bulk_create(blocks or (), batch_size=1000)
+        if is_partitioned():
+            name = partitions().get(start)
+            if name is not None:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+                    if not keep_detached:
+                        cursor.execute(f"DROP TABLE {name}")
+        # rows outside a monthly partition (the default one, or no partitioning)
+        TaskComment.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+    return archive
+
+
+def archive_cutoff(retention_days=None):
+    """Months ending before this moment are archived."""
+    if retention_days is None:
+        retention_days = get_config()["RETENTION_DAYS"]
+    return timezone.now() - timedelta(days=retention_days)
+
+
+# === READING ===
+
+def archived_comments(task_id):
+    """A task's archived comments as unsaved TaskComment instances, oldest first."""
+    blocks = (
+        ArchivedCommentBlock.objects.filter(task_id=task_id)
+        .select_related("archive")
+        .order_by("archive__period_start", "id")
+    )
+    comments = []
+    for block in blocks:
+        with open(archive_directory() / block.archive.file_name, "rb") as archive_file:
+            archive_file.seek(block.offset)
+            data = gzip.decompress(archive_file.read(block.length))
+        for line in data.decode().splitlines():
+            fields = json.loads(line)
+            fields["timestamp"] = parse_datetime(fields["timestamp"])
+            comments.append(TaskComment(**fields))
+    comments.sort(key=lambda comment: (comment.timestamp, comment.id))
+    return comments
+
+
+def comments_page(task_id, first, after, order_by=("timestamp", "id")):
+    """
+    One keyset page of a task's archived comments followed by its live ones
+    (archived months are always older than live comments); with a "-field"
+    ordering, live comments come first and archived ones after them.
+    """
+    size = page_size(first)
+    cursor = decode_cursor(after) if after else None
+    if order_by[0].startswith("-"):
+        rows = paginate(TaskComment.objects.filter(task_id=task_id), size, after, order_by)
+        if len(rows) <= size:
+            rows += [
+                comment for comment in reversed(archived_comments(task_id))
+                if cursor is None or (comment.timestamp, comment.id) < cursor
+            ][:size + 1 - len(rows)]
+        return rows
+    rows = [
+        comment for comment in archived_comments(task_id)
+        if cursor is None or (comment.timestamp, comment.id) > cursor
+    ][:size + 1]
+    if len(rows) <= size:
+        rows += paginate(TaskComment.objects.filter(task_id=task_id), size - len(rows), after, order_by)
+    return rows
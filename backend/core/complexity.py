@@ -0,0 +1,135 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLInt,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type,
+    value_from_ast,
+)
+from graphql.validation import ValidationRule
+
+from core.pagination import page_size
+
+DEFAULT_QUERY_LIMITS = {"max_depth": 10, "max_cost": 20000}
+
+
+def get_query_limits(request):
+    """Depth/cost budget for the requesting user's organization."""
+    config = getattr(settings, "GRAPHQL_QUERY_LIMITS", {})
+    limits = {**DEFAULT_QUERY_LIMITS, **config.get("default", {})}
+    user = getattr(request, "user", None)
+    organization = getattr(user, "organization", None) if user and user.is_authenticated else None
+    if organization is not None:
+        limits.update(config.get("organizations", {}).get(organization.slug, {}))
+    return limits
+
+
+class QueryMeasure:
+    """
+    Depth and estimated cost of one operation.
+
+    Every object-typed field costs 1 per object it is expected to return.
+    List fields multiply their subtree by the page size they will return:
+    ``first`` on the enclosing connection for ``edges``, otherwise the
+    default page size. Introspection fields are free.
+    """
+
+    def __init__(self, schema, fragments, variables):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+
+    def measure(self, operation):
+        root_type = self.schema.get_root_type(operation.operation)
+        return self._selection_set(operation.selection_set, root_type, 0, None, frozenset())
+
+    def _selection_set(self, selection_set, parent_type, depth, connection_first, seen):
+        max_depth, cost = depth, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                sub_depth, sub_cost = self._field(selection, parent_type, depth, connection_first, seen)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                sub_depth, sub_cost = self._selection_set(
+                    selection.selection_set, fragment_type, depth, connection_first, seen
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in seen:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                sub_depth, sub_cost = self._selection_set(
+                    fragment.selection_set, fragment_type, depth, connection_first, seen | {name}
+                )
+            else:
+                continue
+            max_depth, cost = max(max_depth, sub_depth), cost + sub_cost
+        return max_depth, cost
+
+    def _field(self, node, parent_type, depth, connection_first, seen):
+        name = node.name.value
+        fields = getattr(parent_type, "fields", {})
+        if name.startswith("__") or name not in fields:
+            return depth, 0
+
+        field = fields[name]
+        field_type = get_named_type(field.type)
+        if not is_composite_type(field_type) or node.selection_set is None:
+            return depth + 1, 0
+
+        first = self._argument(node, "first") if "first" in field.args else None
+        multiplier = 1
+        if is_list_type(get_nullable_type(field.type)):
+            multiplier = page_size(connection_first if name == "edges" else first)
+
+        sub_depth, sub_cost = self._selection_set(
+            node.selection_set, field_type, depth + 1, first, seen
+        )
+        return sub_depth, multiplier * (1 + sub_cost)
+
+    def _argument(self, node, name):
+        for argument in node.arguments:
+            if argument.name.value == name:
+                value = value_from_ast(argument.value, GraphQLInt, self.variables)
+                # bad values are left to argument validation and the resolver
+                return value if isinstance(value, int) and value >= 0 else None
+        return None
+
+
+def query_cost_validator(max_depth, max_cost, variables=None, operation_name=None, callback=None):
+    """
+    Build a validation rule that rejects operations over the depth or cost
+    budget. ``callback`` receives the measured depth and cost (with the
+    limits) for the selected operation so the view can report it.
+    """
+
+    class QueryCostValidator(ValidationRule):
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+            if operation_name and (node.name is None or node.name.value != operation_name):
+                return
+            fragments = {
+                fragment.name.value: fragment
+                for fragment in self.context.get_recursively_referenced_fragments(node)
+            }
+            depth, cost = QueryMeasure(self.context.schema, fragments, variables).measure(node)
+            if callable(callback):
+                callback({"depth": depth, "cost": cost, "maxDepth": max_depth, "maxCost": max_cost})
+            if depth > max_depth:
+                self.report_error(
+                    GraphQLError(f"Query depth {depth} exceeds the limit of {max_depth}.", [node])
+                )
+            if cost > max_cost:
+                self.report_error(
+                    GraphQLError(f"Query cost {cost} exceeds the limit of {max_cost}.", [node])
+                )
+
+    return QueryCostValidator
@@ -0,0 +1,123 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+
+from core.models import Project, ProjectTaskCounts, Task
+
+STATUS_FIELDS = {
+    "TODO": "todo_count",
+    "IN_PROGRESS": "in_progress_count",
+    "DONE": "done_count",
+}
+COUNT_FIELDS = ("total_count", *STATUS_FIELDS.values())
+
+
+def _adjust(project_id, changes):
+    changes = {field: F(field) + delta for field, delta in changes.items() if delta}
+    if changes:
+        return ProjectTaskCounts.objects.filter(project_id=project_id).update(**changes)
+    return 1
+
+
+def task_created(task):
+    changes = {"total_count": 1}
+    if task.status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[task.status]] = 1
+    if not _adjust(task.project_id, changes):
+        # no counter row yet (e.g. project created outside the ORM): build it
+        # from the task table, which already includes this task
+        rebuild_task_counts([task.project_id])
+
+
+def task_status_changed(task, old_status):
+    if old_status == task.status:
+        return
+    changes = {}
+    if old_status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[old_status]] = -1
+    if task.status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[task.status]] = 1
+    if not _adjust(task.project_id, changes):
+        rebuild_task_counts([task.project_id])
+
+
+def tasks_created(project_id, statuses):
+    """``task_created`` for many new tasks of one project, in one UPDATE."""
+    changes = Counter()
+    for status in statuses:
+        changes["total_count"] += 1
+        if status in STATUS_FIELDS:
+            changes[STATUS_FIELDS[status]] += 1
+    if not _adjust(project_id, changes):
+        rebuild_task_counts([project_id])
+
+
+def tasks_status_changed(project_id, transitions):
+    """``task_status_changed`` for ``(old_status, new_status)`` pairs of one project."""
+    changes = Counter()
+    for old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+        if old_status in STATUS_FIELDS:
+            changes[STATUS_FIELDS[old_status]] -= 1
+        if new_status in STATUS_FIELDS:
+            changes[STATUS_FIELDS[new_status]] += 1
+    if not _adjust(project_id, changes):
+        rebuild_task_counts([project_id])
+
+
+def task_deleted(task):
+    # only decrement; a missing row means the project itself is going away
+    changes = {"total_count": -1}
+    if task.status in STATUS_FIELDS:
+        changes[STATUS_FIELDS[task.status]] = -1
+    _adjust(task.project_id, changes)
+
+
+def count_tasks(project_ids=None):
+    """Count tasks by status straight from the Task table, keyed by project id."""
+    tasks = Task.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+    rows = tasks.values("project_id").order_by().annotate(
+        total_count=Count("id"),
+        **{
+            field: Count("id", filter=Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        },
+    )
+    return {row.pop("project_id"): row for row in rows}
+
+
+def rebuild_task_counts(project_ids=None, dry_run=False):
+    """
+    Recompute counter rows from the Task table.
+
+    Returns ``{project_id: (stored, actual)}`` for every project whose stored
+    counters drifted; with ``dry_run`` nothing is written.
+    """
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    project_ids = list(projects.values_list("id", flat=True))
+
+    actual = count_tasks(project_ids)
+    stored = {
+        row.pop("project_id"): row
+        for row in ProjectTaskCounts.objects.filter(project_id__in=project_ids).values(
+            "project_id", *COUNT_FIELDS
+        )
+    }
+    empty = dict.fromkeys(COUNT_FIELDS, 0)
+
+    drift = {}
+    for project_id in project_ids:
+        expected = actual.get(project_id, empty)
+        current = stored.get(project_id)
+        if current != expected:
+            drift[project_id] = (current, expected)
+            if not dry_run:
+                ProjectTaskCounts.objects.update_or_create(
+                    project_id=project_id, defaults=expected
+                )
+    return drift
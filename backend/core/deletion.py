@@ -0,0 +1,134 @@
+"""
+Deleting projects without one long request and one giant transaction.
+
+``mark_deleted`` is all deleteProject does: it sets ``deleted_at``, frees
+the slug and adds a ProjectDeletion row. The live manager (``Project.objects``),
+tenancy and the raw SQL readers (search, stats, export) skip the project from
+then on. ``purge`` removes its rows afterwards, ``CHUNK_SIZE`` at a time and
+one transaction per chunk: comments first, then tasks with their archive
+blocks, then the project row. Each chunk is counted on the ProjectDeletion
+row, so progress can be queried and a purge that stops half way simply
+resumes.
+
+Purges run outside the request: schedule ``manage.py purge_deleted_projects``
+(cron or any job runner) to work through the pending deletions.
+"""
+import time
+
+import graphene
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from core import tenancy
+from core.models import Project, ProjectDeletion, ProjectTaskCounts, Task, TaskComment
+from core.queries import is_async
+
+DEFAULT_CONFIG = {"CHUNK_SIZE": 1000, "PAUSE": 0.0}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "PROJECT_PURGE", {})}
+
+
+def mark_deleted(project):
+    """Hide ``project`` at once and queue its purge; call inside the mutation's transaction."""
+    counts = ProjectTaskCounts.objects.filter(project=project).first()
+    # the slug is released, so a new project can take it before the purge ends
+    Project.all_objects.filter(pk=project.pk).update(deleted_at=timezone.now(), slug=None)
+    deletion = ProjectDeletion.objects.create(
+        organization_id=project.organization_id,
+        project_id=project.pk,
+        name=project.name,
+        task_count=counts.total_count if counts else 0,
+    )
+    transaction.on_commit(tenancy.invalidate)
+    return deletion
+
+
+def purge_chunk(deletion, chunk_size):
+    """Delete up to ``chunk_size`` rows of the project, in one transaction; False once none are left."""
+    with transaction.atomic():
+        comment_ids = list(
+            TaskComment.objects.filter(task__project_id=deletion.project_id)
+            .order_by().values_list("id", flat=True)[:chunk_size]
+        )
+        if comment_ids:
+            comments, _ = TaskComment.objects.filter(id__in=comment_ids).delete()
+            deletion.comments_purged += comments
+            deletion.save(update_fields=["comments_purged", "updated_at"])
+            return True
+
+        task_ids = list(
+            Task.objects.filter(project_id=deletion.project_id)
+            .order_by().values_list("id", flat=True)[:chunk_size]
+        )
+        if task_ids:
+            # the project is going away: drop its counter row first, so the
+            # tasks' post_delete signal has nothing left to decrement
+            ProjectTaskCounts.objects.filter(project_id=deletion.project_id).delete()
+            # cascades to the tasks' archive blocks
+            _, deleted = Task.objects.filter(id__in=task_ids).delete()
+            deletion.tasks_purged += deleted.get(Task._meta.label, 0)
+            deletion.save(update_fields=["tasks_purged", "updated_at"])
+            return True
+
+        Project.all_objects.filter(pk=deletion.project_id).delete()
+        deletion.finished_at = timezone.now()
+        deletion.save(update_fields=["finished_at", "updated_at"])
+        return False
+
+
+def purge(deletion, chunk_size=None, pause=None):
+    """Purge the rows of a deleted project chunk by chunk; returns ``deletion``, finished."""
+    config = get_config()
+    chunk_size = chunk_size or config["CHUNK_SIZE"]
+    pause = config["PAUSE"] if pause is None else pause
+    while deletion.finished_at is None and purge_chunk(deletion, chunk_size):
+        if pause:
+            # leave the database some room between chunks
+            time.sleep(pause)
+    return deletion
+
+
+# === TYPES ===
+class ProjectDeletionType(DjangoObjectType):
+    progress = graphene.Float(description="Share of the tasks purged so far, 0 to 1")
+
+    class Meta:
+        model = ProjectDeletion
+        fields = (
+            "id", "project_id", "name", "task_count", "tasks_purged", "comments_purged",
+            "requested_at", "updated_at", "finished_at",
+        )
+
+    def resolve_progress(self, info):
+        if self.finished_at is not None:
+            return 1.0
+        return min(self.tasks_purged / self.task_count, 1.0) if self.task_count else 0.0
+
+
+class DeletionQuery(graphene.ObjectType):
+    project_deletion = graphene.Field(
+        ProjectDeletionType,
+        organization_slug=graphene.String(required=True),
+        project_id=graphene.ID(required=True),
+        description="Purge progress of a deleted project",
+    )
+
+    def resolve_project_deletion(root, info, organization_slug, project_id):
+        def run():
+            org_id = tenancy.organization_id(info.context, organization_slug)
+            if org_id is None:
+                raise GraphQLError("Organization not found.")
+            try:
+                return ProjectDeletion.objects.get(organization_id=org_id, project_id=int(project_id))
+            except (ValueError, ProjectDeletion.DoesNotExist):
+                raise GraphQLError("No deletion of this project.")
+
+        if is_async(info):
+            return sync_to_async(run)()
+        return run()
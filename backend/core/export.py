@@ -0,0 +1,135 @@
+"""
+Streaming export of one organization's projects, tasks and comments.
+
+Each model is walked in id order with ``iterator(chunk_size)``, which uses
+a server-side cursor on PostgreSQL, and written out chunk by chunk, so
+memory use does not grow with the export. Records come out as NDJSON
+objects or CSV rows tagged with their ``type``; the CSV header is the
+union of the three models' fields.
+
+Every chunk ends at a checkpoint, ``"<type>:<id>"`` of its last record.
+Passing it back as ``after`` continues the export from the next record,
+and any record's type and id make a valid checkpoint too.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+
+from core.models import Project, Task, TaskComment
+
+DEFAULT_CONFIG = {"CHUNK_SIZE": 2000}
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# (type, model, fields, path to the project), in export order
+KINDS = (
+    (
+        "project", Project,
+        ("id", "name", "slug", "description", "status", "due_date", "created_at"),
+        "",
+    ),
+    (
+        "task", Task,
+        ("id", "project_id", "title", "description", "status", "assignee_email", "due_date", "created_at"),
+        "project__",
+    ),
+    (
+        "comment", TaskComment,
+        ("id", "task_id", "content", "author_email", "timestamp"),
+        "task__project__",
+    ),
+)
+TYPES = [kind[0] for kind in KINDS]
+CSV_FIELDS = ["type"] + list(dict.fromkeys(field for kind in KINDS for field in kind[2]))
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EXPORT", {})}
+
+
+def parse_checkpoint(checkpoint):
+    """``"task:12"`` -> ``(1, 12)``: the position in KINDS and the last exported id."""
+    kind, _, last_id = (checkpoint or "").partition(":")
+    if kind not in TYPES or not last_id.isdigit():
+        raise ValueError(f"Invalid checkpoint {checkpoint!r}; expected <{'|'.join(TYPES)}>:<id>.")
+    return TYPES.index(kind), int(last_id)
+
+
+def records(organization_id, after=None, chunk_size=None):
+    """``(type, {field: value})`` for every exported row, after the ``after`` checkpoint."""
+    start, last_id = parse_checkpoint(after) if after else (0, 0)
+    chunk_size = chunk_size or get_config()["CHUNK_SIZE"]
+    for index, (kind, model, fields, project) in enumerate(KINDS):
+        if index < start:
+            continue
+        after_id = last_id if index == start else 0
+        rows = (
+            model.objects.filter(
+                **{f"{project}organization_id": organization_id, f"{project}deleted_at__isnull": True},
+                id__gt=after_id,
+            )
+            .order_by("id")
+            .values_list(*fields)
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in rows:
+            yield kind, dict(zip(fields, row))
+
+
+def serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def ndjson_line(kind, record):
+    return json.dumps({"type": kind, **record}, default=serialize) + "\n"
+
+
+class CSVLine:
+    """Renders one CSV row at a time (csv.writer needs a file to write to)."""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def __call__(self, values):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerow(values)
+        return self.buffer.getvalue()
+
+    def record(self, kind, record):
+        values = [record.get(field) for field in CSV_FIELDS[1:]]
+        return self([kind] + ["" if value is None else serialize(value) for value in values])
+
+
+def chunks(organization_id, format="ndjson", after=None, header=True, chunk_size=None):
+    """
+    The export as ``(text, checkpoint)`` pieces of up to ``chunk_size`` records.
+    ``header`` adds the CSV header (leave it out when appending to a resumed file).
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}.")
+    chunk_size = chunk_size or get_config()["CHUNK_SIZE"]
+    if format == "csv":
+        csv_line = CSVLine()
+        line = csv_line.record
+        if header:
+            yield csv_line(CSV_FIELDS), after
+    else:
+        line = ndjson_line
+
+    lines, checkpoint = [], after
+    for kind, record in records(organization_id, after, chunk_size):
+        lines.append(line(kind, record))
+        checkpoint = f"{kind}:{record['id']}"
+        if len(lines) >= chunk_size:
+            yield "".join(lines), checkpoint
+            lines = []
+    if lines:
+        yield "".join(lines), checkpoint
@@ -0,0 +1,245 @@
+"""
+Bulk import of projects, tasks and comments into one organization.
+
+The input is NDJSON or CSV in the export format (core/export.py): one
+record per line/row with a ``type`` of ``project``, ``task`` or
+``comment``. ``id``, ``project_id`` and ``task_id`` are ids in the source
+system. A task names its project by source ``project_id`` or by
+``project_slug`` (an existing project of the organization), and a comment
+names its task by source ``task_id``.
+
+Records are imported in chunks, one transaction each. Projects go through
+``save()`` (slugs, counters); tasks and comments are inserted with
+``COPY`` on PostgreSQL (ids reserved from the sequence first) and
+``bulk_create`` elsewhere. Each chunk also stores the source -> new id of
+its projects and tasks and advances ``ImportRun.position``, so a run that
+fails resumes after its last committed chunk.
+"""
+import csv
+import json
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core import counters
+from core.models import ImportedRow, ImportRun, Project, Task, TaskComment
+
+FORMATS = ("ndjson", "csv")
+TYPES = ("project", "task", "comment")
+TASK_STATUSES = {status for status, _ in Task.TASK_STATUS_CHOICES}
+PROJECT_STATUSES = {status for status, _ in Project.STATUS_CHOICES}
+
+TASK_FIELDS = ("project_id", "title", "description", "status", "assignee_email", "due_date", "created_at")
+COMMENT_FIELDS = ("task_id", "content", "author_email", "timestamp")
+
+
+def read_records(path, format):
+    """The records of ``path`` as dicts; empty CSV cells are left out."""
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}.")
+    with open(path, newline="", encoding="utf-8") as source:
+        if format == "csv":
+            for row in csv.DictReader(source):
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+        else:
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        raise ValueError(f"Line {number} is not valid JSON.")
+
+
+def copy_supported():
+    if connection.vendor != "postgresql":
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def copy_rows(model, fields, rows):
+    """Insert ``rows`` with COPY; returns their ids, reserved from the table's sequence."""
+    table = model._meta.db_table
+    columns = ", ".join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)", [table, len(rows)]
+        )
+        ids = [pk for (pk,) in cursor.fetchall()]
+        with cursor.cursor.copy(f"COPY {table} (id, {columns}) FROM STDIN") as copy:
+            for pk, row in zip(ids, rows):
+                copy.write_row((pk, *row))
+    return ids
+
+
+def create_rows(model, fields, rows):
+    """Like ``copy_rows``, with ``bulk_create``; returns the new ids."""
+    objects = model.objects.bulk_create([model(**dict(zip(fields, row))) for row in rows], batch_size=1000)
+    return [obj.pk for obj in objects]
+
+
+def moment(value, position, field):
+    if value in (None, ""):
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Record {position}: invalid {field} {value!r}.")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def day(value, position, field):
+    if value in (None, ""):
+        return None
+    parsed = parse_date(value[:10]) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Record {position}: invalid {field} {value!r}.")
+    return parsed
+
+
+def required(record, field, position):
+    value = record.get(field)
+    if value in (None, ""):
+        raise ValueError(f"Record {position}: {record.get('type')} needs {field}.")
+    return value
+
+
+class Importer:
+    def __init__(self, run, use_copy=None):
+        self.run = run
+        self.organization_id = run.organization_id
+        self.use_copy = copy_supported() if use_copy is None else use_copy
+        # slugs and project ids are resolved once; tasks are looked up per chunk
+        self.project_slugs = dict(
+            Project.objects.filter(organization_id=self.organization_id).values_list("slug", "id")
+        )
+        self.project_ids = dict(
+            ImportedRow.objects.filter(run=run, kind="project").values_list("source_id", "target_id")
+        )
+
+    def insert(self, model, fields, rows, timestamp_field):
+        if not rows:
+            return []
+        # source timestamps are inserted as given; an explicit None would not
+        # fall back to the model default, so stamp rows without one here
+        now = timezone.now()
+        index = fields.index(timestamp_field)
+        rows = [row[:index] + (row[index] or now,) + row[index + 1:] for row in rows]
+        if self.use_copy:
+            return copy_rows(model, fields, rows)
+        return create_rows(model, fields, rows)
+
+    def import_chunk(self, records):
+        """Import ``[(position, record)]`` and advance the run past them, atomically."""
+        by_type = defaultdict(list)
+        for position, record in records:
+            kind = record.get("type")
+            if kind not in TYPES:
+                raise ValueError(f"Record {position}: unknown type {kind!r}.")
+            by_type[kind].append((position, record))
+
+        with transaction.atomic():
+            new_projects, new_slugs = self.import_projects(by_type["project"])
+            task_count = self.import_tasks(by_type["task"], new_projects, new_slugs)
+            comment_count = self.import_comments(by_type["comment"])
+            ImportRun.objects.filter(pk=self.run.pk).update(
+                position=records[-1][0] + 1,
+                project_count=self.run.project_count + len(by_type["project"]),
+                task_count=self.run.task_count + task_count,
+                comment_count=self.run.comment_count + comment_count,
+                updated_at=timezone.now(),
+            )
+        # only remember the new ids once they are committed
+        self.project_ids.update(new_projects)
+        self.project_slugs.update(new_slugs)
+        self.run.refresh_from_db()
+
+    def import_projects(self, records):
+        new_projects, new_slugs, mapped = {}, {}, []
+        for position, record in records:
+            slug = record.get("slug") or None
+            project_id = (self.project_slugs.get(slug) or new_slugs.get(slug)) if slug else None
+            if project_id is None:
+                status = record.get("status") or "ACTIVE"
+                if status not in PROJECT_STATUSES:
+                    raise ValueError(f"Record {position}: invalid project status {status!r}.")
+                project = Project.objects.create(
+                    organization_id=self.organization_id,
+                    name=required(record, "name", position),
+                    slug=slug,
+                    description=record.get("description") or "",
+                    status=status,
+                    due_date=day(record.get("due_date"), position, "due_date"),
+                )
+                project_id = project.id
+                new_slugs[project.slug] = project_id
+            # an existing slug is reused: its project receives the tasks
+            if record.get("id") not in (None, ""):
+                source_id = str(record["id"])
+                new_projects[source_id] = project_id
+                mapped.append(ImportedRow(run=self.run, kind="project", source_id=source_id, target_id=project_id))
+        ImportedRow.objects.bulk_create(mapped)
+        return new_projects, new_slugs
+
+    def import_tasks(self, records, new_projects, new_slugs):
+        rows, source_ids = [], []
+        for position, record in records:
+            if record.get("project_id") not in (None, ""):
+                source = str(record["project_id"])
+                project_id = new_projects.get(source) or self.project_ids.get(source)
+            else:
+                slug = record.get("project_slug")
+                project_id = (new_slugs.get(slug) or self.project_slugs.get(slug)) if slug else None
+            if project_id is None:
+                raise ValueError(f"Record {position}: unknown project of task {record.get('id')!r}.")
+            status = record.get("status") or "TODO"
+            if status not in TASK_STATUSES:
+                raise ValueError(f"Record {position}: invalid task status {status!r}.")
+            rows.append((
+                project_id,
+                required(record, "title", position),
+                record.get("description") or "",
+                status,
+                record.get("assignee_email") or "",
+                moment(record.get("due_date"), position, "due_date"),
+                moment(record.get("created_at"), position, "created_at"),
+            ))
+            source_ids.append(record.get("id"))
+
+        ids = self.insert(Task, TASK_FIELDS, rows, "created_at")
+        ImportedRow.objects.bulk_create([
+            ImportedRow(run=self.run, kind="task", source_id=str(source_id), target_id=task_id)
+            for source_id, task_id in zip(source_ids, ids)
+            if source_id not in (None, "")
+        ], batch_size=1000)
+        # bulk inserts skip the signals that keep the counters in step
+        statuses = defaultdict(list)
+        for row in rows:
+            statuses[row[0]].append(row[3])
+        for project_id, project_statuses in statuses.items():
+            counters.tasks_created(project_id, project_statuses)
+        return len(rows)
+
+    def import_comments(self, records):
+        if not records:
+            return 0
+        wanted = {str(record.get("task_id")) for _, record in records}
+        task_ids = dict(
+            ImportedRow.objects.filter(run=self.run, kind="task", source_id__in=wanted)
+            .values_list("source_id", "target_id")
+        )
+        rows = []
+        for position, record in records:
+            task_id = task_ids.get(str(record.get("task_id")))
+            if task_id is None:
+                raise ValueError(f"Record {position}: unknown task {record.get('task_id')!r} of comment.")
+            rows.append((
+                task_id,
+                required(record, "content", position),
+                required(record, "author_email", position),
+                moment(record.get("timestamp"), position, "timestamp"),
+            ))
+        self.insert(TaskComment, COMMENT_FIELDS, rows, "timestamp")
+        return len(rows)
@@ -0,0 +1,222 @@
+"""
+Per-operation timing for GraphQL requests.
+
+While an operation is traced, ``InstrumentationMiddleware`` times every
+resolver and a process-wide execute wrapper attributes each SQL query to
+the field path being resolved (list indices dropped, so all tasks of all
+projects share ``projects.edges.node.tasks``). The same SQL shape issued
+over and over is reported as a likely N+1.
+
+Tracing is on for a request when its report will be used: it is returned
+to staff users and, with ``settings.DEBUG``, to requests sending the debug
+header; operations slower than ``SLOW_OPERATION_MS`` are logged as JSON.
+"""
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from inspect import isawaitable
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    # requests sending this header get the report when settings.DEBUG is on
+    "DEBUG_HEADER": "X-GraphQL-Debug",
+    # log operations at least this slow (None: never)
+    "SLOW_OPERATION_MS": None,
+    # same SQL shape this many times in one operation is flagged as N+1
+    "N_PLUS_ONE_THRESHOLD": 5,
+    # slowest field paths listed in the Server-Timing header
+    "SERVER_TIMING_FIELDS": 5,
+}
+
+current_trace = contextvars.ContextVar("graphql_trace", default=None)
+current_path = contextvars.ContextVar("graphql_field_path", default=None)
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "GRAPHQL_INSTRUMENTATION", {})}
+
+
+def exposed(request):
+    """Whether ``request`` may see the report (extensions and Server-Timing)."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    header = get_config()["DEBUG_HEADER"]
+    return settings.DEBUG and request.headers.get(header, "").lower() in ("1", "true")
+
+
+def enabled(request):
+    return get_config()["SLOW_OPERATION_MS"] is not None or exposed(request)
+
+
+def field_path(path):
+    return ".".join(str(key) for key in path.as_list() if not isinstance(key, int))
+
+
+def sql_shape(sql):
+    # IN lists of any length and inlined numbers count as the same query
+    sql = re.sub(r"\((?:%s|\?)(?:, ?(?:%s|\?))*\)", "(...)", sql)
+    return re.sub(r"\b\d+\b", "N", sql)
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 2)
+
+
+class Trace:
+    """Resolver and SQL timings of one operation."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.fields = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "sql_count": 0, "sql_seconds": 0.0})
+        self.queries = []
+        # sync_to_async threads and the event loop report concurrently
+        self._lock = threading.Lock()
+
+    def add_field(self, path, seconds):
+        with self._lock:
+            field = self.fields[path]
+            field["calls"] += 1
+            field["seconds"] += seconds
+
+    def add_query(self, path, sql, seconds):
+        with self._lock:
+            self.queries.append((path, sql_shape(sql), seconds))
+            if path is not None:
+                field = self.fields[path]
+                field["sql_count"] += 1
+                field["sql_seconds"] += seconds
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def n_plus_one(self):
+        threshold = get_config()["N_PLUS_ONE_THRESHOLD"]
+        counts = Counter(shape for _, shape, _ in self.queries)
+        paths = defaultdict(set)
+        for path, shape, _ in self.queries:
+            paths[shape].add(path or "")
+        return [
+            {"sql": shape[:300], "count": count, "paths": sorted(paths[shape])}
+            for shape, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def report(self):
+        return {
+            "durationMs": milliseconds(self.duration),
+            "sql": {
+                "count": len(self.queries),
+                "durationMs": milliseconds(sum(seconds for _, _, seconds in self.queries)),
+            },
+            "fields": {
+                path: {
+                    "calls": field["calls"],
+                    "durationMs": milliseconds(field["seconds"]),
+                    "sqlCount": field["sql_count"],
+                    "sqlDurationMs": milliseconds(field["sql_seconds"]),
+                }
+                for path, field in self.fields.items()
+            },
+            "nPlusOne": self.n_plus_one(),
+        }
+
+    def server_timing(self):
+        """Value for the ``Server-Timing`` response header."""
+        report = self.report()
+        metrics = [
+            f"graphql;dur={report['durationMs']}",
+            f'sql;dur={report["sql"]["durationMs"]};desc="{report["sql"]["count"]} queries"',
+        ]
+        slowest = sorted(report["fields"].items(), key=lambda item: -item[1]["durationMs"])
+        for index, (path, field) in enumerate(slowest[:get_config()["SERVER_TIMING_FIELDS"]]):
+            metrics.append(f'field{index};dur={field["durationMs"]};desc="{path}"')
+        return ", ".join(metrics)
+
+
+@contextmanager
+def tracing(request, operation_name=None):
+    """
+    Trace the operation executed inside the block when ``request`` needs
+    it; yields the Trace, or None.
+    """
+    if not enabled(request):
+        yield None
+        return
+    trace = Trace()
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        trace.finish()
+        log_if_slow(request, operation_name, trace)
+
+
+def log_if_slow(request, operation_name, trace):
+    limit = get_config()["SLOW_OPERATION_MS"]
+    if limit is None or trace.duration * 1000 < limit:
+        return
+    user = getattr(request, "user", None)
+    logger.warning(json.dumps({
+        "event": "slow_graphql_operation",
+        "operation": operation_name,
+        "user": user.pk if user is not None and user.is_authenticated else None,
+        **trace.report(),
+    }))
+
+
+class InstrumentationMiddleware:
+    """Graphene middleware timing each resolver of a traced operation."""
+
+    def resolve(self, next, root, info, **args):
+        trace = current_trace.get()
+        if trace is None:
+            return next(root, info, **args)
+
+        path = field_path(info.path)
+        start = time.perf_counter()
+        token = current_path.set(path)
+        try:
+            result = next(root, info, **args)
+        finally:
+            current_path.reset(token)
+
+        if isawaitable(result):
+            async def timed():
+                token = current_path.set(path)
+                try:
+                    return await result
+                finally:
+                    current_path.reset(token)
+                    trace.add_field(path, time.perf_counter() - start)
+            return timed()
+
+        trace.add_field(path, time.perf_counter() - start)
+        return result
+
+
+def record_query(execute, sql, params, many, context):
+    trace = current_trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.add_query(current_path.get(), sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver: every connection reports to the current trace."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
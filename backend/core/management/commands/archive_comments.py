@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import comment_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming comment partitions and move months older than the "
+        "retention window into compressed archive files (schedule it, e.g. daily)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days", type=int,
+            help="Keep this many days of comments live (default: COMMENT_ARCHIVE['RETENTION_DAYS']).",
+        )
+        parser.add_argument(
+            "--months-ahead", type=int,
+            help="Partitions to create ahead of the current month (PostgreSQL only).",
+        )
+        parser.add_argument(
+            "--keep-detached", action="store_true",
+            help="Detach archived partitions but keep their tables instead of dropping them.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="List the months that would be archived.")
+
+    def handle(self, *args, **options):
+        if options["retention_days"] is not None and options["retention_days"] < 0:
+            raise CommandError("--retention-days must not be negative.")
+        cutoff = comment_archive.archive_cutoff(options["retention_days"])
+        months = comment_archive.archivable_months(cutoff)
+        if options["dry_run"]:
+            for start in months:
+                self.stdout.write(f"Would archive {start:%Y-%m}")
+            return
+
+        for name in comment_archive.ensure_partitions(options["months_ahead"]):
+            self.stdout.write(f"Created partition {name}")
+        archived = 0
+        for start in months:
+            archive = comment_archive.archive_month(start, keep_detached=options["keep_detached"])
+            count = archive.comment_count if archive else 0
+            archived += count
+            self.stdout.write(
+                f"{start:%Y-%m}: {count} comments" + (f" -> {archive.file_name}" if archive else "")
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} comments from {len(months)} month(s) before {cutoff:%Y-%m-%d}."
+        ))
@@ -0,0 +1,72 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.views.decorators.csrf import csrf_exempt
+
+from core import benchmarks
+from core.models import Organization
+from core.views import AsyncGraphQLView, GraphQLView
+
+DEFAULT_QUERY = """
+query($org: String!) {
+  projects(organizationSlug: $org, first: 20) {
+    edges { node {
+      name
+      taskCount
+      tasks(first: 10) { edges { node { title status } } }
+    } }
+  }
+}
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare GraphQL throughput of the sync view on a WSGI-style thread pool "
+        "with the async view on an event loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", help="Organization slug (default: the first one).")
+        parser.add_argument("--query-file", help="File with the query to send (gets $org).")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--concurrency", type=int, default=100, help="Requests in flight on the async path."
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Worker threads on the sync (WSGI) path."
+        )
+        parser.add_argument(
+            "--db-latency", type=float, default=0, help="Milliseconds added to every query."
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        slug = options["organization"] or Organization.objects.values_list("slug", flat=True).first()
+        if slug is None:
+            raise CommandError("No organization to query; create some data first.")
+        query = DEFAULT_QUERY
+        if options["query_file"]:
+            with open(options["query_file"], encoding="utf-8") as query_file:
+                query = query_file.read()
+        body = benchmarks.graphql_body(query, {"org": slug})
+
+        with benchmarks.simulated_db_latency(options["db_latency"] / 1000):
+            results = {
+                "wsgi": benchmarks.run_sync(
+                    csrf_exempt(GraphQLView.as_view()), body, options["requests"], options["threads"]
+                ),
+                "asgi": benchmarks.run_async(
+                    csrf_exempt(AsyncGraphQLView.as_view()), body, options["requests"], options["concurrency"]
+                ),
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'path':<6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'failed':>8}")
+        for path, result in results.items():
+            self.stdout.write(
+                f"{path:<6}{result['rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{result['failures']:>8}"
+            )
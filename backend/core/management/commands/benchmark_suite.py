@@ -0,0 +1,156 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.views.decorators.csrf import csrf_exempt
+
+from core import benchmarks
+from core.models import Organization
+from core.views import GraphQLView
+
+MUTATIONS = ("createTask", "updateTask")
+
+
+def git(*args):
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the frontend's GraphQL operations against existing (e.g. generated) "
+        "data, report throughput, latency percentiles and SQL queries per request, "
+        "and store the results by commit for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", help="Organization slug (default: the first one).")
+        parser.add_argument(
+            "--operations", default=",".join(benchmarks.OPERATIONS),
+            help="Comma-separated operations to replay (default: all).",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per operation.")
+        parser.add_argument("--threads", type=int, default=8, help="Worker threads (WSGI workers).")
+        parser.add_argument("--output-dir", default=str(Path(settings.BASE_DIR) / "benchmarks"))
+        parser.add_argument("--no-save", action="store_true", help="Do not store the results.")
+        parser.add_argument(
+            "--compare",
+            help="Baseline to compare with: a results file, or a commit with stored results.",
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=20,
+            help="Percent p95 slowdown counted as a regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression", action="store_true",
+            help="Exit with an error when the comparison finds a regression.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        organization = (
+            Organization.objects.filter(slug=options["organization"]).first()
+            if options["organization"] else Organization.objects.order_by("id").first()
+        )
+        if organization is None:
+            raise CommandError("No organization to query; run generate_data first.")
+        names = [name.strip() for name in options["operations"].split(",") if name.strip()]
+        unknown = set(names) - set(benchmarks.OPERATIONS)
+        if unknown:
+            raise CommandError(f"Unknown operations: {', '.join(sorted(unknown))}")
+        data = benchmarks.dataset(organization)
+        if not data["projects"] or not data["tasks"]:
+            raise CommandError(f"{organization.slug} needs projects and tasks to benchmark.")
+
+        baseline = self.load_baseline(options["compare"], options["output_dir"]) if options["compare"] else None
+
+        view = csrf_exempt(GraphQLView.as_view())
+        results = {}
+        try:
+            if "updateTask" in names:
+                benchmarks.add_target_tasks(data)
+            for name in names:
+                results[name] = benchmarks.run_operation(
+                    view, name, data, options["requests"], options["threads"]
+                )
+        finally:
+            if set(names) & set(MUTATIONS):
+                benchmarks.remove_benchmark_rows(organization)
+
+        commit = git("rev-parse", "--short", "HEAD") or "unknown"
+        run = {
+            "commit": commit,
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "organization": organization.slug,
+            "requests": options["requests"],
+            "threads": options["threads"],
+            "results": results,
+        }
+        if not options["no_save"]:
+            output_dir = Path(options["output_dir"])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            path = output_dir / f"{run['recorded_at'].replace(':', '')}-{commit}.json"
+            path.write_text(json.dumps(run, indent=2))
+            self.stderr.write(f"Saved results to {path}")
+
+        regressions = self.compare(results, baseline, options["threshold"]) if baseline else []
+        if options["json"]:
+            self.stdout.write(json.dumps({**run, "regressions": regressions}, indent=2))
+        else:
+            self.print_table(results, baseline)
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"Regression: {regression}"))
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regression(s) against {baseline['commit']}.")
+
+    def load_baseline(self, reference, output_dir):
+        path = Path(reference)
+        if not path.is_file():
+            # newest stored run of that commit
+            candidates = sorted(Path(output_dir).glob(f"*-{reference}*.json"))
+            if not candidates:
+                raise CommandError(f"No stored results for {reference} in {output_dir}.")
+            path = candidates[-1]
+        return json.loads(path.read_text())
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        for name, result in results.items():
+            before = baseline["results"].get(name)
+            if before is None:
+                continue
+            # a small absolute floor keeps sub-millisecond noise out
+            if result["p95_ms"] > before["p95_ms"] * (1 + threshold / 100) and result["p95_ms"] - before["p95_ms"] > 1:
+                regressions.append(f"{name} p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+            if result["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{name} queries/request {before['queries_per_request']} -> {result['queries_per_request']}"
+                )
+        return regressions
+
+    def print_table(self, results, baseline):
+        self.stdout.write(
+            f"{'operation':<12}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'failed':>8}" + ("  vs " + baseline["commit"] if baseline else "")
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<12}{result['rps']:>8}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+                f"{result['p99_ms']:>9}{result['queries_per_request']:>9}{result['failures']:>8}"
+            )
+            before = (baseline or {}).get("results", {}).get(name)
+            if before and before["p95_ms"]:
+                change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+                line += f"  p95 {change:+.0f}%"
+            self.stdout.write(line)
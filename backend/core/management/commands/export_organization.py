@@ -0,0 +1,75 @@
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import export
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream an organization's projects, tasks and comments as NDJSON or CSV. "
+        "With --output, progress is checkpointed so an interrupted export can --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("organization", help="Organization slug.")
+        parser.add_argument("--format", choices=export.FORMATS, default="ndjson")
+        parser.add_argument("--output", help="File to write (default: stdout).")
+        parser.add_argument("--after", help="Start after this checkpoint (<type>:<id>).")
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Continue an interrupted export into --output from its checkpoint file.",
+        )
+        parser.add_argument("--chunk-size", type=int, help="Rows fetched and written per chunk.")
+
+    def handle(self, *args, **options):
+        organization = Organization.objects.filter(slug=options["organization"]).first()
+        if organization is None:
+            raise CommandError(f"Unknown organization {options['organization']}.")
+        if options["resume"] and not options["output"]:
+            raise CommandError("--resume needs --output.")
+        after = options["after"]
+        if after:
+            try:
+                export.parse_checkpoint(after)
+            except ValueError as error:
+                raise CommandError(str(error))
+
+        if not options["output"]:
+            for text, _ in export.chunks(organization.id, options["format"], after, chunk_size=options["chunk_size"]):
+                self.stdout.write(text, ending="")
+            return
+
+        path = Path(options["output"])
+        checkpoint_path = path.with_name(path.name + ".checkpoint")
+        offset = 0
+        if options["resume"]:
+            if not checkpoint_path.exists():
+                raise CommandError(f"No checkpoint at {checkpoint_path}; nothing to resume.")
+            state = json.loads(checkpoint_path.read_text())
+            if state["format"] != options["format"]:
+                raise CommandError(f"{path} is a {state['format']} export.")
+            after, offset = state["after"], state["offset"]
+
+        with open(path, "r+b" if options["resume"] else "wb") as output:
+            # drop whatever was written after the last checkpoint
+            output.seek(offset)
+            output.truncate()
+            for text, checkpoint in export.chunks(
+                organization.id, options["format"], after, header=offset == 0, chunk_size=options["chunk_size"],
+            ):
+                output.write(text.encode())
+                output.flush()
+                os.fsync(output.fileno())
+                self.save_checkpoint(checkpoint_path, options["format"], checkpoint, output.tell())
+        checkpoint_path.unlink(missing_ok=True)
+        self.stderr.write(self.style.SUCCESS(f"Exported {organization.slug} to {path}."))
+
+    def save_checkpoint(self, path, format, after, offset):
+        # write then rename, so a crash never leaves a torn checkpoint
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(json.dumps({"format": format, "after": after, "offset": offset}))
+        os.replace(temporary, path)
@@ -0,0 +1,141 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.counters import rebuild_task_counts
+from core.models import Organization, Project, Task, TaskComment
+
+WORDS = (
+    "api backend billing cache dashboard deploy design docs email export fix frontend "
+    "import invoice login migration mobile onboarding payment performance release report "
+    "review search security settings signup sync test upgrade"
+).split()
+
+DISTRIBUTIONS = ("fixed", "uniform", "skewed")
+
+
+def parse_weights(value):
+    """``"TODO=5,DONE=1"`` -> ``{"TODO": 5.0, "DONE": 1.0}``."""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic organizations, projects, tasks and comments with "
+        "bulk inserts, for load tests and benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=1)
+        parser.add_argument("--projects", type=int, default=10, help="Projects per organization.")
+        parser.add_argument("--tasks", type=int, default=50, help="Tasks per project (mean).")
+        parser.add_argument("--comments", type=int, default=2, help="Comments per task (mean).")
+        parser.add_argument(
+            "--distribution", choices=DISTRIBUTIONS, default="skewed",
+            help=(
+                "How per-parent counts vary around the mean: fixed, uniform (0 to 2x) or "
+                "skewed (long tail: a few huge projects, many small ones)."
+            ),
+        )
+        parser.add_argument(
+            "--statuses", default="TODO=5,IN_PROGRESS=3,DONE=2",
+            help="Relative weights of task statuses.",
+        )
+        parser.add_argument("--prefix", default="synthetic", help="Slug prefix of the organizations.")
+        parser.add_argument("--seed", type=int, help="Random seed, for repeatable data sets.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.distribution = options["distribution"]
+        self.batch_size = options["batch_size"]
+        statuses = parse_weights(options["statuses"])
+        unknown = set(statuses) - {value for value, _ in Task.TASK_STATUS_CHOICES}
+        if unknown:
+            raise CommandError(f"Unknown task statuses: {', '.join(sorted(unknown))}")
+        self.statuses, self.status_weights = list(statuses), list(statuses.values())
+
+        prefix = options["prefix"]
+        slugs = [f"{prefix}-{i}" for i in range(options["organizations"])]
+        if Organization.objects.filter(slug__in=slugs).exists():
+            raise CommandError(f"Organizations named {prefix}-N already exist; pass another --prefix.")
+
+        totals = {"organizations": 0, "projects": 0, "tasks": 0, "comments": 0}
+        for index, slug in enumerate(slugs):
+            with transaction.atomic():
+                counts = self.generate_organization(index, slug, options)
+            for key, count in counts.items():
+                totals[key] += count
+            self.stdout.write(
+                f"{slug}: {counts['projects']} projects, {counts['tasks']} tasks, "
+                f"{counts['comments']} comments"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{count} {name}" for name, count in totals.items()) + "."
+        ))
+
+    def draw(self, mean):
+        """How many children one parent gets, around ``mean``."""
+        if self.distribution == "fixed" or mean == 0:
+            return mean
+        if self.distribution == "uniform":
+            return self.random.randint(0, 2 * mean)
+        # Pareto with alpha 1.5 has mean 3; cap the tail so one draw stays bounded
+        return min(int(self.random.paretovariate(1.5) * mean / 3), 20 * mean)
+
+    def words(self, count):
+        return " ".join(self.random.choice(WORDS) for _ in range(count))
+
+    def generate_organization(self, index, slug, options):
+        organization = Organization.objects.create(
+            name=f"{options['prefix'].title()} {index}", slug=slug, contact_email=f"admin@{slug}.test",
+        )
+        projects = Project.objects.bulk_create([
+            Project(
+                organization=organization, name=f"Project {i}", slug=f"project-{i}",
+                description=self.words(12),
+                status=self.random.choice(("ACTIVE", "ACTIVE", "ACTIVE", "COMPLETED", "ON_HOLD")),
+            )
+            for i in range(options["projects"])
+        ], batch_size=self.batch_size)
+
+        counts = {"organizations": 1, "projects": len(projects), "tasks": 0, "comments": 0}
+        pending = []
+        for project in projects:
+            for i in range(self.draw(options["tasks"])):
+                pending.append(Task(
+                    project=project,
+                    title=f"{self.words(3).capitalize()} #{i}",
+                    description=self.words(self.random.randint(0, 40)),
+                    status=self.random.choices(self.statuses, self.status_weights)[0],
+                    assignee_email=f"user{self.random.randint(1, 20)}@{slug}.test",
+                ))
+            if len(pending) >= self.batch_size:
+                counts["tasks"] += len(pending)
+                counts["comments"] += self.insert_tasks(pending, options["comments"], slug)
+                pending = []
+        if pending:
+            counts["tasks"] += len(pending)
+            counts["comments"] += self.insert_tasks(pending, options["comments"], slug)
+
+        # bulk inserts skip the signals that keep the counters in step
+        rebuild_task_counts([project.id for project in projects])
+        return counts
+
+    def insert_tasks(self, tasks, comments_per_task, slug):
+        tasks = Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+        comments = [
+            TaskComment(
+                task=task, content=self.words(self.random.randint(3, 25)),
+                author_email=f"user{self.random.randint(1, 20)}@{slug}.test",
+            )
+            for task in tasks
+            for _ in range(self.draw(comments_per_task))
+        ]
+        TaskComment.objects.bulk_create(comments, batch_size=self.batch_size)
+        return len(comments)
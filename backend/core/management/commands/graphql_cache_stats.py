@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import response_cache
+
+
+class Command(BaseCommand):
+    help = "Show GraphQL response cache hit/miss counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after printing.")
+
+    def handle(self, *args, **options):
+        stats = response_cache.get_stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups if lookups else 0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.1%}")
+        if options["reset"]:
+            response_cache.reset_stats()
@@ -0,0 +1,100 @@
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import importer, response_cache
+from core.models import ImportRun, Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Import projects, tasks and comments from NDJSON or CSV (the export format) "
+        "into an organization, in chunked transactions that can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument("--organization", required=True, help="Slug of the organization to import into.")
+        parser.add_argument(
+            "--create-organization", metavar="CONTACT_EMAIL",
+            help="Create the organization, with this contact email, if it does not exist.",
+        )
+        parser.add_argument("--format", choices=importer.FORMATS, help="Default: from the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Records per transaction.")
+        parser.add_argument(
+            "--run-name",
+            help="Identifies the run for --resume (default: the organization and absolute path).",
+        )
+        parser.add_argument("--resume", action="store_true", help="Continue a failed run after its last chunk.")
+        parser.add_argument(
+            "--no-copy", action="store_true", help="Use bulk_create even where COPY is available.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"No such file: {path}")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        format = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+        organization = self.get_organization(options)
+        run = self.get_run(options, organization, path)
+
+        loader = importer.Importer(run, use_copy=False if options["no_copy"] else None)
+        records = enumerate(importer.read_records(path, format))
+        # a resumed run skips what its committed chunks already imported
+        records = islice(records, run.position, None)
+        started, imported = time.monotonic(), 0
+        try:
+            while chunk := list(islice(records, options["chunk_size"])):
+                loader.import_chunk(chunk)
+                imported += len(chunk)
+                rate = imported / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f"{run.position} records imported ({rate:.0f} rows/s)")
+        except ValueError as error:
+            raise CommandError(
+                f"{error} Chunk rolled back; fix the input and rerun with --resume "
+                f"(continues after record {run.position})."
+            )
+        finally:
+            if imported:
+                response_cache.invalidate_organization(organization.slug)
+
+        run.finished_at = timezone.now()
+        run.save(update_fields=["finished_at"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {run.project_count} projects, {run.task_count} tasks and {run.comment_count} "
+            f"comments into {organization.slug} in {elapsed:.1f}s ({imported / max(elapsed, 1e-6):.0f} rows/s)."
+        ))
+
+    def get_organization(self, options):
+        organization = Organization.objects.filter(slug=options["organization"]).first()
+        if organization is None:
+            if not options["create_organization"]:
+                raise CommandError(
+                    f"Unknown organization {options['organization']}; pass --create-organization to create it."
+                )
+            organization = Organization.objects.create(
+                name=options["organization"], slug=options["organization"],
+                contact_email=options["create_organization"],
+            )
+        return organization
+
+    def get_run(self, options, organization, path):
+        name = options["run_name"] or f"{organization.slug}:{path.resolve()}"
+        run = ImportRun.objects.filter(name=name).first()
+        if run is None:
+            return ImportRun.objects.create(name=name, organization=organization)
+        if run.finished_at is not None:
+            raise CommandError(f"{name} was already imported; pass another --run-name to import it again.")
+        if not options["resume"]:
+            raise CommandError(
+                f"{name} stopped after record {run.position}; pass --resume to continue it."
+            )
+        if run.organization_id != organization.id:
+            raise CommandError(f"{name} imports into another organization.")
+        return run
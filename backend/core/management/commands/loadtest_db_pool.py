@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.views.decorators.csrf import csrf_exempt
+
+from core import benchmarks
+from core.management.commands.benchmark_graphql import DEFAULT_QUERY
+from core.models import Organization
+from core.views import GraphQLView
+
+DEFAULT_POOL = {"min_size": 2, "max_size": 10}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the sync GraphQL view with new connections per request, "
+        "persistent connections and the psycopg connection pool, and report "
+        "connection reuse and latency for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", help="Organization slug (default: the first one).")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=16, help="Worker threads (WSGI workers).")
+        parser.add_argument(
+            "--conn-max-age", type=int, default=600,
+            help="CONN_MAX_AGE for the persistent run.",
+        )
+        parser.add_argument(
+            "--pool-size", type=int,
+            help="Pool max_size for the pooled run (default: DB_POOL_MAX_SIZE from settings).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        slug = options["organization"] or Organization.objects.values_list("slug", flat=True).first()
+        if slug is None:
+            raise CommandError("No organization to query; create some data first.")
+        body = benchmarks.graphql_body(DEFAULT_QUERY, {"org": slug})
+        view = csrf_exempt(GraphQLView.as_view())
+
+        options_without_pool = {
+            key: value for key, value in connections["default"].settings_dict["OPTIONS"].items()
+            if key != "pool"
+        }
+        modes = {
+            "none": {"CONN_MAX_AGE": 0, "OPTIONS": options_without_pool},
+            "persistent": {"CONN_MAX_AGE": options["conn_max_age"], "OPTIONS": options_without_pool},
+        }
+        if connections["default"].vendor == "postgresql":
+            pool = dict(connections["default"].settings_dict["OPTIONS"].get("pool") or DEFAULT_POOL)
+            if options["pool_size"]:
+                pool["max_size"] = options["pool_size"]
+            modes["pool"] = {"CONN_MAX_AGE": 0, "OPTIONS": {**options_without_pool, "pool": pool}}
+        else:
+            self.stderr.write("Skipping the pooled run: connection pooling needs PostgreSQL.")
+
+        results = {}
+        for mode, overrides in modes.items():
+            with benchmarks.database_settings(**overrides), benchmarks.track_connections() as stats:
+                result = benchmarks.run_sync(view, body, options["requests"], options["threads"])
+            results[mode] = {**result, **stats}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'connections':<12}{'rps':>8}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'connects':>10}{'sessions':>10}{'failed':>8}"
+        )
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<12}{result['rps']:>8}{result['p50_ms']:>9}{result['p99_ms']:>9}"
+                f"{result['connects']:>10}{result['sessions']:>10}{result['failures']:>8}"
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import deletion
+from core.models import ProjectDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge the rows of projects marked deleted, in chunks. deleteProject only hides the "
+        "project; schedule this command to remove its rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, help="Rows deleted per transaction (default: PROJECT_PURGE['CHUNK_SIZE']).",
+        )
+        parser.add_argument("--pause", type=float, help="Seconds to sleep between chunks.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] is not None and options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        # a purge still running elsewhere is harmless: chunks only count the rows they delete
+        pending = ProjectDeletion.objects.filter(finished_at__isnull=True).order_by("requested_at", "id")
+        for project_deletion in pending:
+            deletion.purge(project_deletion, options["chunk_size"], options["pause"])
+            self.stdout.write(
+                f"{project_deletion.name} ({project_deletion.project_id}): {project_deletion.tasks_purged} tasks, "
+                f"{project_deletion.comments_purged} comments"
+            )
+        self.stderr.write(self.style.SUCCESS(f"Purged {len(pending)} deleted project(s)."))
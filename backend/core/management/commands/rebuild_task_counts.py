@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.counters import rebuild_task_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-project task counters from the Task table and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted counters; exit with an error if any are found.",
+        )
+        parser.add_argument(
+            "--project",
+            type=int,
+            action="append",
+            dest="project_ids",
+            help="Limit to the given project id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        check = options["check"]
+        drift = rebuild_task_counts(options["project_ids"], dry_run=check)
+
+        for project_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"project {project_id}: stored={stored} actual={actual}")
+
+        if check and drift:
+            raise CommandError(f"{len(drift)} project counter(s) drifted.")
+        verb = "drifted" if check else "rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} project counter(s) {verb}."))
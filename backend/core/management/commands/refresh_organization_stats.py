@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from core.stats import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recompute organizationStats snapshots (run periodically when ORGANIZATION_STATS['SNAPSHOTS'] is on)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization",
+            action="append",
+            dest="slugs",
+            help="Limit to the given organization slug (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.order_by("id")
+        if options["slugs"]:
+            organizations = organizations.filter(slug__in=options["slugs"])
+            missing = set(options["slugs"]) - set(organizations.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Unknown organizations: {', '.join(sorted(missing))}")
+
+        refreshed = 0
+        for organization_id in organizations.values_list("id", flat=True).iterator():
+            refresh_snapshot(organization_id)
+            refreshed += 1
+        self.stdout.write(self.style.SUCCESS(f"{refreshed} organization snapshot(s) refreshed."))
@@ -1,4 +1,5 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -19,4 +20,11 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
         # Do NOT require organization for superuser
-        return self.create_user(username, email, password, **extra_fields)
\ No newline at end of file
+        return self.create_user(username, email, password, **extra_fields)
+
+
+class LiveProjectManager(models.Manager):
+    """Projects not marked deleted; ``Project.all_objects`` sees every row."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
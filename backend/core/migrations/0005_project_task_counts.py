@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_task_counts(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Task = apps.get_model('core', 'Task')
+    ProjectTaskCounts = apps.get_model('core', 'ProjectTaskCounts')
+
+    counts = {
+        row.pop('project_id'): row
+        for row in Task.objects.values('project_id').order_by().annotate(
+            total_count=Count('id'),
+            todo_count=Count('id', filter=Q(status='TODO')),
+            in_progress_count=Count('id', filter=Q(status='IN_PROGRESS')),
+            done_count=Count('id', filter=Q(status='DONE')),
+        )
+    }
+    ProjectTaskCounts.objects.bulk_create(
+        ProjectTaskCounts(project_id=project_id, **counts.get(project_id, {}))
+        for project_id in Project.objects.values_list('id', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_organization_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTaskCounts',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counts', serialize=False, to='core.project')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('todo_count', models.PositiveIntegerField(default=0)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('done_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_task_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+"""
+Full-text search index over task titles/descriptions and comment content.
+
+The index lives outside the models and is maintained by the database, so
+bulk writes (``bulk_create``, ``bulk_update``, ``QuerySet.update``) keep
+it current too:
+
+* PostgreSQL: a generated ``search_vector`` tsvector column with a GIN
+  index on each table.
+* SQLite: external-content FTS5 tables kept in step by triggers.
+
+``core.search`` queries whichever one the connection has.
+"""
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE core_task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX core_task_search_idx ON core_task USING gin (search_vector)",
+    """
+    ALTER TABLE core_taskcomment ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
+    """,
+    "CREATE INDEX core_comment_search_idx ON core_taskcomment USING gin (search_vector)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "ALTER TABLE core_task DROP COLUMN search_vector",
+    "ALTER TABLE core_taskcomment DROP COLUMN search_vector",
+]
+
+
+def sqlite_fts(table, columns):
+    """FTS5 table ``<table>_search`` over ``columns`` of ``table``, with sync triggers."""
+    search = f"{table}_search"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = (
+        f"INSERT INTO {search}({search}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {search}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    forward = [
+        f"CREATE VIRTUAL TABLE {search} USING fts5("
+        f"{column_list}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {search}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {search}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {search}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"{delete_old} {insert_new} END",
+        f"INSERT INTO {search}({search}) VALUES ('rebuild')",
+    ]
+    backward = [
+        f"DROP TRIGGER {search}_ai",
+        f"DROP TRIGGER {search}_ad",
+        f"DROP TRIGGER {search}_au",
+        f"DROP TABLE {search}",
+    ]
+    return forward, backward
+
+
+SQLITE_TASK = sqlite_fts("core_task", ["title", "description"])
+SQLITE_COMMENT = sqlite_fts("core_taskcomment", ["content"])
+
+
+def run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run(schema_editor, POSTGRESQL_FORWARD)
+    elif vendor == "sqlite":
+        run(schema_editor, SQLITE_TASK[0] + SQLITE_COMMENT[0])
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run(schema_editor, POSTGRESQL_BACKWARD)
+    elif vendor == "sqlite":
+        run(schema_editor, SQLITE_TASK[1] + SQLITE_COMMENT[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_composite_indexes_project_org_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_organization_stats_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(db_index=True)),
+                ('period_end', models.DateTimeField()),
+                ('file_name', models.CharField(max_length=255)),
+                ('comment_count', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedCommentBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.BigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('comment_count', models.PositiveIntegerField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comment_blocks', to='core.task')),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='core.commentarchive')),
+            ],
+        ),
+    ]
@@ -0,0 +1,122 @@
+"""
+PostgreSQL only: turn core_taskcomment into a table partitioned by month of
+``timestamp``.
+
+Existing rows are copied into monthly partitions (from the oldest comment's
+month up to three months ahead) plus a DEFAULT partition that catches
+anything no partition covers yet. ``archive_comments`` creates upcoming
+partitions and detaches expired ones (see core/comment_archive.py). The
+partitioning is for cheap archival; reads by task still probe the index of
+every live partition.
+
+The primary key becomes (id, timestamp), since a partitioned table's
+unique keys must include the partition key; ids still come from one
+sequence, so the ORM keeps addressing comments by id alone.
+"""
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, content, author_email, \"timestamp\", task_id"
+
+
+def months(first, last):
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield datetime(year, month, 1, tzinfo=timezone.utc)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def next_month(start):
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def create_table(name, primary_key, extra=""):
+    return f"""
+    CREATE TABLE {name} (
+        id bigint NOT NULL,
+        content text NOT NULL,
+        author_email varchar(254) NOT NULL,
+        "timestamp" timestamp with time zone NOT NULL,
+        task_id bigint NOT NULL
+            REFERENCES core_task (id) DEFERRABLE INITIALLY DEFERRED,
+        search_vector tsvector GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(content, ''))
+        ) STORED,
+        PRIMARY KEY ({primary_key})
+    ) {extra}
+    """
+
+
+INDEXES = [
+    'CREATE INDEX core_comment_task_time_idx ON core_taskcomment (task_id, "timestamp", id)',
+    "CREATE INDEX core_comment_search_idx ON core_taskcomment USING gin (search_vector)",
+]
+
+
+def partition_comments(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min("timestamp"), now() FROM core_taskcomment')
+        oldest, now = cursor.fetchone()
+    now = now.astimezone(timezone.utc)
+    last = now
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+
+    statements = [
+        "ALTER TABLE core_taskcomment RENAME TO core_taskcomment_unpartitioned",
+        create_table("core_taskcomment", 'id, "timestamp"', 'PARTITION BY RANGE ("timestamp")'),
+        "CREATE TABLE core_taskcomment_default PARTITION OF core_taskcomment DEFAULT",
+    ]
+    for start in months((oldest or now).astimezone(timezone.utc), last):
+        statements.append(
+            f"CREATE TABLE core_taskcomment_p{start:%Y%m} PARTITION OF core_taskcomment "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{next_month(start).isoformat()}')"
+        )
+    statements += [
+        f"INSERT INTO core_taskcomment ({COLUMNS}) SELECT {COLUMNS} FROM core_taskcomment_unpartitioned",
+        # drops the old identity sequence, freeing its name
+        "DROP TABLE core_taskcomment_unpartitioned",
+        "CREATE SEQUENCE core_taskcomment_id_seq AS bigint OWNED BY core_taskcomment.id",
+        "SELECT setval('core_taskcomment_id_seq', coalesce((SELECT max(id) FROM core_taskcomment), 0) + 1, false)",
+        "ALTER TABLE core_taskcomment ALTER COLUMN id SET DEFAULT nextval('core_taskcomment_id_seq')",
+        *INDEXES,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def unpartition_comments(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    statements = [
+        "ALTER TABLE core_taskcomment RENAME TO core_taskcomment_partitioned",
+        "ALTER INDEX core_comment_task_time_idx RENAME TO core_comment_task_time_idx_partitioned",
+        "ALTER INDEX core_comment_search_idx RENAME TO core_comment_search_idx_partitioned",
+        create_table("core_taskcomment", "id"),
+        f"INSERT INTO core_taskcomment ({COLUMNS}) SELECT {COLUMNS} FROM core_taskcomment_partitioned",
+        # drops the partitions and the sequence with it
+        "DROP TABLE core_taskcomment_partitioned",
+        "ALTER TABLE core_taskcomment ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY",
+        "SELECT setval(pg_get_serial_sequence('core_taskcomment', 'id'), "
+        "coalesce((SELECT max(id) FROM core_taskcomment), 0) + 1, false)",
+        "CREATE INDEX core_taskcomment_task_id_idx ON core_taskcomment (task_id)",
+        *INDEXES,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_comment_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_comments, unpartition_comments),
+    ]
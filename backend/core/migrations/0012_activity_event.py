@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:11
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_import_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.BigIntegerField(blank=True, null=True)),
+                ('task_id', models.BigIntegerField(blank=True, null=True)),
+                ('action', models.CharField(max_length=32)),
+                ('actor_id', models.BigIntegerField(blank=True, null=True)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='core.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', '-created_at', '-id'], name='core_activity_org_idx'), models.Index(fields=['project_id', '-created_at', '-id'], name='core_activity_project_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    auto_now_add -> default=timezone.now, so bulk imports keep their
+    timestamps. Neither is stored in the database, so only the state
+    changes: on SQLite an AlterField would rebuild the tables and drop the
+    search triggers of 0007, and core_taskcomment is partitioned (0010).
+    """
+
+    dependencies = [
+        ('core', '0013_project_deletion'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+                migrations.AlterField(
+                    model_name='taskcomment',
+                    name='timestamp',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import AbstractUser
-from core.managers import UserManager
-from django.utils.text import slugify
+from core.managers import LiveProjectManager, UserManager
+from core.slugs import save_with_unique_slug
 # class Organization(models.Model):
 #     name = models.CharField(max_length=100)
 #     slug = models.SlugField(unique=True)
@@ -19,7 +21,7 @@ class Organization(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug and self.name:
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(self, self.name, lambda: super(Organization, self).save(*args, **kwargs))
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -44,11 +46,34 @@ class Project(models.Model):
 
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="projects")
     name = models.CharField(max_length=200)
-    slug = models.SlugField(unique=True, blank=True, null=True)
+    slug = models.SlugField(blank=True, null=True)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="ACTIVE")
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # set by deleteProject; the rows are purged later (see core/deletion.py)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = LiveProjectManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        base_manager_name = "all_objects"
+        constraints = [
+            models.UniqueConstraint(fields=["organization", "slug"], name="core_project_org_slug_uniq"),
+        ]
+        indexes = [
+            # Query.projects: organization filter in keyset order
+            models.Index(fields=["organization", "created_at", "id"], name="core_project_org_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.slug and self.name:
+            return save_with_unique_slug(
+                self, self.name, lambda: super(Project, self).save(*args, **kwargs),
+                scope=("organization_id",),
+            )
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -67,7 +92,17 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=TASK_STATUS_CHOICES, default="TODO")
     assignee_email = models.EmailField(blank=True)
     due_date = models.DateTimeField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # a default, not auto_now_add, so bulk imports keep the source timestamp
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Query.tasks / ProjectType.tasks: project filter in keyset order
+            models.Index(fields=["project", "created_at", "id"], name="core_task_project_created_idx"),
+            # per-project status counts
+            models.Index(fields=["project", "status"], name="core_task_project_status_idx"),
+            models.Index(fields=["assignee_email"], name="core_task_assignee_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -77,7 +112,155 @@ class TaskComment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
     content = models.TextField()
     author_email = models.EmailField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # like Task.created_at, kept as given by bulk imports
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Query.comments / TaskType.comments: task filter in keyset order
+            models.Index(fields=["task", "timestamp", "id"], name="core_comment_task_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author_email} on {self.task.title}"
+
+class ProjectTaskCounts(models.Model):
+    """Per-project task totals by status, kept in step with the Task table."""
+
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, primary_key=True, related_name="task_counts"
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    todo_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Task counts for {self.project_id}"
+
+
+class OrganizationStatsSnapshot(models.Model):
+    """Last computed ``organizationStats`` of an organization (see core/stats.py)."""
+
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, primary_key=True, related_name="stats_snapshot"
+    )
+    data = models.JSONField()
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Stats snapshot for {self.organization_id}"
+
+
+class CommentArchive(models.Model):
+    """
+    One month of comments moved out of TaskComment into a gzip NDJSON file
+    (see core/comment_archive.py).
+    """
+
+    period_start = models.DateTimeField(db_index=True)
+    period_end = models.DateTimeField()
+    file_name = models.CharField(max_length=255)
+    comment_count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file_name
+
+
+class ArchivedCommentBlock(models.Model):
+    """Where one task's comments sit in an archive file: a gzip member at ``offset``."""
+
+    archive = models.ForeignKey(CommentArchive, on_delete=models.CASCADE, related_name="blocks")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="archived_comment_blocks")
+    offset = models.BigIntegerField()
+    length = models.PositiveIntegerField()
+    comment_count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.comment_count} archived comments of task {self.task_id}"
+
+
+class ImportRun(models.Model):
+    """
+    Progress of one ``import_data`` run. ``position`` (records imported) is
+    committed with each chunk, so a failed run resumes where it stopped.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="import_runs")
+    position = models.PositiveBigIntegerField(default=0)
+    project_count = models.PositiveIntegerField(default=0)
+    task_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ImportedRow(models.Model):
+    """The row an imported project or task became, keyed by its id in the source file."""
+
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name="rows")
+    kind = models.CharField(max_length=10)
+    source_id = models.CharField(max_length=255)
+    target_id = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "kind", "source_id"], name="core_imported_row_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.source_id} -> {self.target_id}"
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only feed of changes, written by the mutations in the same
+    transaction (see core/activity.py). Project and task ids are plain
+    columns, so events outlive the rows they describe.
+    """
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="activity")
+    project_id = models.BigIntegerField(null=True, blank=True)
+    task_id = models.BigIntegerField(null=True, blank=True)
+    action = models.CharField(max_length=32)
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    # {field: [old, new]} for updates; the new row's main fields otherwise
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Query.activity, newest first, per organization or per project
+            models.Index(fields=["organization", "-created_at", "-id"], name="core_activity_org_idx"),
+            models.Index(fields=["project_id", "-created_at", "-id"], name="core_activity_project_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} at {self.created_at}"
+
+
+class ProjectDeletion(models.Model):
+    """
+    Progress of purging a project marked deleted (see core/deletion.py).
+    Like ActivityEvent it keeps the project id as a plain column, so it
+    outlives the project row.
+    """
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="project_deletions")
+    project_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=200)
+    task_count = models.PositiveIntegerField(default=0)
+    tasks_purged = models.PositiveIntegerField(default=0)
+    comments_purged = models.PositiveBigIntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"Comment by {self.author_email} on {self.task.title}"
\ No newline at end of file
+        return f"Deletion of project {self.project_id}"
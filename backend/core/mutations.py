@@ -1,10 +1,14 @@
 from django.http import JsonResponse
 import graphene
+from graphene.utils.str_converters import to_camel_case
 from graphql import GraphQLError
+from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import transaction
 from .models import Organization, Project, Task, TaskComment
+from . import activity, counters, deletion, response_cache, subscriptions, tenancy
 from .queries import OrganizationType, ProjectType, TaskType, TaskCommentType, UserType
 from django.contrib.auth import authenticate, login, logout, get_user_model
-from django.utils.text import slugify
 
 User = get_user_model()
 
@@ -21,11 +25,14 @@ class CreateOrganization(graphene.Mutation):
         if Organization.objects.filter(slug=slug).exists():
             raise GraphQLError("Organization with this slug already exists.")
         
-        org = Organization.objects.create(
-            name=name,
-            slug=slug,
-            contact_email=contact_email
-        )
+        with transaction.atomic():
+            org = Organization.objects.create(
+                name=name,
+                slug=slug,
+                contact_email=contact_email
+            )
+            activity.record(info.context, org.id, "organization.created", changes={"name": name})
+            response_cache.invalidate_organization(org.slug)
         return CreateOrganization(organization=org)
 
 
@@ -41,26 +48,24 @@ class CreateProject(graphene.Mutation):
 
     @classmethod
     def mutate(cls, root, info, organization_slug, name, description, status, due_date=None):
-        try:
-            org = Organization.objects.get(slug=organization_slug)
-        except Organization.DoesNotExist:
+        org_id = tenancy.organization_id(info.context, organization_slug)
+        if org_id is None:
             raise GraphQLError("Organization not found.")
-        
-        base_slug = slugify(name)
-        slug = base_slug
-        counter = 1
-        # Ensure uniqueness
-        while Project.objects.filter(slug=slug, organization=org).exists():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        project = Project.objects.create(
-            organization=org,
-            name=name,
-            slug=slug,
-            description=description,
-            status=status,
-            due_date=due_date
-        )
+
+        with transaction.atomic():
+            # Project.save picks a slug that is free within the organization
+            project = Project.objects.create(
+                organization_id=org_id,
+                name=name,
+                description=description,
+                status=status,
+                due_date=due_date
+            )
+            activity.record(
+                info.context, org_id, "project.created", project.id,
+                changes=activity.summary("project", project),
+            )
+            response_cache.invalidate_organization(organization_slug)
         return CreateProject(project=project)
 
 class UpdateProject(graphene.Mutation):
@@ -76,10 +81,12 @@ class UpdateProject(graphene.Mutation):
 
     @classmethod
     def mutate(cls, root, info, organization_slug, project_id, name=None, description=None, status=None, due_date=None):
+        org_id = tenancy.organization_id(info.context, organization_slug)
         try:
-            project = Project.objects.get(id=int(project_id), organization__slug=organization_slug)
+            project = Project.objects.get(id=int(project_id), organization_id=org_id)
         except Project.DoesNotExist:
             raise GraphQLError("Project not found in this organization.")
+        before = subscriptions.row_fields(project)
 
         if name is not None:
             project.name = name
@@ -90,7 +97,12 @@ class UpdateProject(graphene.Mutation):
         if due_date is not None:
             project.due_date = due_date
 
-        project.save()
+        with transaction.atomic():
+            project.save()
+            changes = activity.diff(before, project)
+            if changes:
+                activity.record(info.context, org_id, "project.updated", project.id, changes=changes)
+            response_cache.invalidate_organization(organization_slug)
         return UpdateProject(project=project)
 
 class DeleteProject(graphene.Mutation):
@@ -99,13 +111,21 @@ class DeleteProject(graphene.Mutation):
         project_id = graphene.ID(required=True)
 
     success = graphene.Boolean()
+    deletion = graphene.Field(deletion.ProjectDeletionType, description="Progress of purging its rows")
 
     @classmethod
     def mutate(cls, root, info, organization_slug, project_id):
+        org_id = tenancy.organization_id(info.context, organization_slug)
         try:
-            project = Project.objects.get(id=int(project_id), organization__slug=organization_slug)
-            project.delete()
-            return DeleteProject(success=True)
+            project = Project.objects.get(id=int(project_id), organization_id=org_id)
+            with transaction.atomic():
+                activity.record(
+                    info.context, org_id, "project.deleted", project.id, changes={"name": project.name},
+                )
+                # hidden now, purged in chunks afterwards (core/deletion.py)
+                project_deletion = deletion.mark_deleted(project)
+                response_cache.invalidate_organization(organization_slug)
+            return DeleteProject(success=True, deletion=project_deletion)
         except Project.DoesNotExist:
             raise GraphQLError("Project not found in this organization.")
 
@@ -123,22 +143,26 @@ class CreateTask(graphene.Mutation):
 
     @classmethod
     def mutate(cls, root, info, organization_slug, project_slug, title, description, status, assignee_email=None, due_date=None):
-        try:
-            project = Project.objects.get(
-                slug=project_slug,
-                organization__slug=organization_slug
-            )
-        except Project.DoesNotExist:
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        if project_id is None:
             raise GraphQLError("Project not found for this organization.")
         
-        task = Task.objects.create(
-            project=project,
-            title=title,
-            description=description,
-            status=status,
-            assignee_email=assignee_email,
-            due_date=due_date
-        )
+        with transaction.atomic():
+            task = Task.objects.create(
+                project_id=project_id,
+                title=title,
+                description=description,
+                status=status,
+                assignee_email=assignee_email,
+                due_date=due_date
+            )
+            counters.task_created(task)
+            activity.record(
+                info.context, tenancy.organization_id(info.context, organization_slug), "task.created",
+                project_id, task.id, activity.summary("task", task),
+            )
+            response_cache.invalidate_project(organization_slug, project_slug)
+            subscriptions.publish_tasks(project_id, "CREATED", [task])
         return CreateTask(task=task)
 
 class UpdateTask(graphene.Mutation):
@@ -156,27 +180,37 @@ class UpdateTask(graphene.Mutation):
 
     @classmethod
     def mutate(cls, root, info, organization_slug, project_slug, task_id, title=None, description=None, status=None, assignee_email=None, due_date=None):
-        try:
-            task = Task.objects.get(
-                id= int(task_id),
-                project__slug=project_slug,
-                project__organization__slug=organization_slug
-            )
-        except Task.DoesNotExist:
-            raise GraphQLError("Task not found in this project/organization.")
-
-        if title is not None:
-            task.title = title
-        if description is not None:
-            task.description = description
-        if status is not None:
-            task.status = status
-        if assignee_email is not None:
-            task.assignee_email = assignee_email
-        if due_date is not None:
-            task.due_date = due_date
-
-        task.save()
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        with transaction.atomic():
+            try:
+                # row lock keeps concurrent status changes from double-counting
+                task = Task.objects.select_for_update().get(id=int(task_id), project_id=project_id)
+            except Task.DoesNotExist:
+                raise GraphQLError("Task not found in this project/organization.")
+            old_status = task.status
+            before = subscriptions.row_fields(task)
+
+            if title is not None:
+                task.title = title
+            if description is not None:
+                task.description = description
+            if status is not None:
+                task.status = status
+            if assignee_email is not None:
+                task.assignee_email = assignee_email
+            if due_date is not None:
+                task.due_date = due_date
+
+            task.save()
+            counters.task_status_changed(task, old_status)
+            response_cache.invalidate_project(organization_slug, project_slug)
+            changes = activity.diff(before, task)
+            if changes:
+                activity.record(
+                    info.context, tenancy.organization_id(info.context, organization_slug), "task.updated",
+                    project_id, task.id, changes,
+                )
+                subscriptions.publish_tasks(project_id, "UPDATED", [task], {task.id: sorted(changes)})
         return UpdateTask(task=task)
 
 class CreateTaskComment(graphene.Mutation):
@@ -191,22 +225,209 @@ class CreateTaskComment(graphene.Mutation):
 
     @classmethod
     def mutate(cls, root, info, organization_slug, project_slug, task_id, content, author_email):
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
         try:
-            task = Task.objects.get(
-                id=task_id,
-                project__slug=project_slug,
-                project__organization__slug=organization_slug
-            )
+            task = Task.objects.get(id=task_id, project_id=project_id)
         except Task.DoesNotExist:
             raise GraphQLError("Task not found in this project/organization.")
         
-        comment = TaskComment.objects.create(
-            task=task,
-            content=content,
-            author_email=author_email
-        )
+        with transaction.atomic():
+            comment = TaskComment.objects.create(
+                task=task,
+                content=content,
+                author_email=author_email
+            )
+            activity.record(
+                info.context, tenancy.organization_id(info.context, organization_slug), "comment.created",
+                project_id, task.id, {"comment_id": comment.id, **activity.summary("comment", comment)},
+            )
+            response_cache.invalidate_project(organization_slug, project_slug)
+            subscriptions.publish_comment(project_id, comment)
         return CreateTaskComment(comment=comment)
 
+class TaskInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    description = graphene.String()
+    status = graphene.String(required=True)
+    assignee_email = graphene.String()
+    due_date = graphene.types.datetime.DateTime()
+
+
+class TaskUpdateInput(graphene.InputObjectType):
+    task_id = graphene.ID(required=True)
+    title = graphene.String()
+    description = graphene.String()
+    status = graphene.String()
+    assignee_email = graphene.String()
+    due_date = graphene.types.datetime.DateTime()
+
+
+class BulkTaskError(graphene.ObjectType):
+    index = graphene.Int(required=True)
+    field = graphene.String()
+    message = graphene.String(required=True)
+
+
+TASK_FIELDS = ("title", "description", "status", "assignee_email", "due_date")
+
+
+def check_bulk_size(items):
+    limit = getattr(settings, "GRAPHQL_BULK_MAX_ITEMS", 1000)
+    if len(items) > limit:
+        raise GraphQLError(f"At most {limit} tasks can be written at once.")
+
+
+def validation_errors(index, task):
+    """Model validation for one bulk item, without per-row queries."""
+    try:
+        # the project was resolved once for the whole batch
+        task.full_clean(exclude=["project"], validate_unique=False, validate_constraints=False)
+    except ValidationError as error:
+        return [
+            BulkTaskError(
+                index=index,
+                field=None if field == NON_FIELD_ERRORS else to_camel_case(field),
+                message=message,
+            )
+            for field, messages in error.message_dict.items()
+            for message in messages
+        ]
+    return []
+
+
+class BulkCreateTasks(graphene.Mutation):
+    """
+    Create many tasks in one project. Every item is validated first; the
+    valid ones are inserted with one ``bulk_create``. ``tasks`` lines up
+    with the input and is null where the item has errors.
+    """
+
+    class Arguments:
+        organization_slug = graphene.String(required=True)
+        project_slug = graphene.String(required=True)
+        tasks = graphene.List(graphene.NonNull(TaskInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(graphene.NonNull(BulkTaskError), required=True)
+
+    @classmethod
+    def mutate(cls, root, info, organization_slug, project_slug, tasks):
+        check_bulk_size(tasks)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        if project_id is None:
+            raise GraphQLError("Project not found for this organization.")
+
+        results, errors, valid = [None] * len(tasks), [], []
+        for index, item in enumerate(tasks):
+            task = Task(
+                project_id=project_id,
+                title=item.title,
+                description=item.description or "",
+                status=item.status,
+                assignee_email=item.assignee_email or "",
+                due_date=item.due_date,
+            )
+            item_errors = validation_errors(index, task)
+            if item_errors:
+                errors.extend(item_errors)
+            else:
+                valid.append((index, task))
+
+        if valid:
+            with transaction.atomic():
+                created = Task.objects.bulk_create([task for _, task in valid])
+                counters.tasks_created(project_id, (task.status for task in created))
+                # one event for the batch keeps the insert count constant
+                activity.record(
+                    info.context, tenancy.organization_id(info.context, organization_slug), "task.bulk_created",
+                    project_id, changes={"tasks": {task.id: activity.summary("task", task) for task in created}},
+                )
+                response_cache.invalidate_project(organization_slug, project_slug)
+                subscriptions.publish_tasks(project_id, "CREATED", created)
+            for (index, _), task in zip(valid, created):
+                results[index] = task
+        return BulkCreateTasks(tasks=results, errors=errors)
+
+
+class BulkUpdateTasks(graphene.Mutation):
+    """
+    Update many tasks of one project: one locking SELECT for all of them,
+    then one ``bulk_update`` for the valid items. Fields left out of an
+    item are not changed.
+    """
+
+    class Arguments:
+        organization_slug = graphene.String(required=True)
+        project_slug = graphene.String(required=True)
+        tasks = graphene.List(graphene.NonNull(TaskUpdateInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(graphene.NonNull(BulkTaskError), required=True)
+
+    @classmethod
+    def mutate(cls, root, info, organization_slug, project_slug, tasks):
+        check_bulk_size(tasks)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        if project_id is None:
+            raise GraphQLError("Project not found for this organization.")
+
+        results, errors = [None] * len(tasks), []
+        task_ids = {}
+        for index, item in enumerate(tasks):
+            try:
+                task_id = int(item.task_id)
+            except ValueError:
+                errors.append(BulkTaskError(index=index, field="taskId", message="Invalid task id."))
+                continue
+            if task_id in task_ids:
+                errors.append(BulkTaskError(index=index, field="taskId", message="Task is listed more than once."))
+                continue
+            task_ids[task_id] = index
+
+        with transaction.atomic():
+            existing = Task.objects.select_for_update().in_bulk(list(task_ids))
+            valid, transitions, changes, befores = [], [], {}, {}
+            for task_id, index in task_ids.items():
+                task = existing.get(task_id)
+                if task is None or task.project_id != project_id:
+                    errors.append(BulkTaskError(
+                        index=index, field="taskId", message="Task not found in this project/organization."
+                    ))
+                    continue
+                old_status = task.status
+                before = subscriptions.row_fields(task)
+                befores[task.id] = before
+                for name in TASK_FIELDS:
+                    if getattr(tasks[index], name) is not None:
+                        setattr(task, name, getattr(tasks[index], name))
+                item_errors = validation_errors(index, task)
+                if item_errors:
+                    errors.extend(item_errors)
+                    continue
+                valid.append((index, task))
+                changed = subscriptions.changed_fields(before, subscriptions.row_fields(task))
+                if changed:
+                    # rows whose values did not change are neither written nor pushed
+                    changes[task.id] = changed
+                    transitions.append((old_status, task.status))
+
+            if changes:
+                updated = [task for _, task in valid if task.id in changes]
+                fields = sorted({name for changed in changes.values() for name in changed})
+                Task.objects.bulk_update(updated, fields)
+                counters.tasks_status_changed(project_id, transitions)
+                activity.record(
+                    info.context, tenancy.organization_id(info.context, organization_slug), "task.bulk_updated",
+                    project_id, changes={"tasks": {task.id: activity.diff(befores[task.id], task) for task in updated}},
+                )
+                response_cache.invalidate_project(organization_slug, project_slug)
+                subscriptions.publish_tasks(project_id, "UPDATED", updated, changes)
+        for index, task in valid:
+            results[index] = task
+        errors.sort(key=lambda error: error.index)
+        return BulkUpdateTasks(tasks=results, errors=errors)
+
+
 class Login(graphene.Mutation):
     class Arguments:
         username = graphene.String(required=True)
@@ -234,16 +455,17 @@ class Signup(graphene.Mutation):
     organization = graphene.Field(lambda: graphene.String)
 
     def mutate(self, info, username, password, organization_name):
-        org, created = Organization.objects.get_or_create(
-            name=organization_name,
-            defaults={"slug": organization_name.lower().replace(" ", "-")},
-        )
-        user = User.objects.create_user(
-            username=username,
-            password=password,
-            organization=org,
-            is_staff=True  # org-level admin
-        )
+        with transaction.atomic():
+            # Organization.save allocates the slug
+            org, created = Organization.objects.get_or_create(name=organization_name)
+            if created:
+                activity.record(info.context, org.id, "organization.created", changes={"name": org.name})
+            user = User.objects.create_user(
+                username=username,
+                password=password,
+                organization=org,
+                is_staff=True  # org-level admin
+            )
 
         return Signup(user=user.username, organization=org.name)
     
@@ -260,6 +482,8 @@ class Mutation(graphene.ObjectType):
     update_project = UpdateProject.Field()
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
     create_task_comment = CreateTaskComment.Field()
     login = Login.Field()
     logout = Logout.Field()
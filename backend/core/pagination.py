@@ -0,0 +1,122 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+from graphene.relay import PageInfo
+from graphql import GraphQLError
+
+
+def page_size(first):
+    if first is None:
+        return getattr(settings, "GRAPHQL_DEFAULT_PAGE_SIZE", 50)
+    if first < 0:
+        raise GraphQLError("Argument 'first' must be a non-negative integer.")
+    return min(first, getattr(settings, "GRAPHQL_MAX_PAGE_SIZE", 100))
+
+
+def encode_cursor(row, order_by):
+    time_field, id_field = (field.lstrip("-") for field in order_by)
+    payload = [getattr(row, time_field).isoformat(), getattr(row, id_field)]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        moment, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        moment = parse_datetime(moment)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        moment = None
+    if moment is None or not isinstance(pk, int):
+        raise GraphQLError("Invalid cursor.")
+    return moment, pk
+
+
+def keyset_after(cursor, order_by):
+    """Rows strictly after ``cursor`` in ``order_by`` order, as a Q object."""
+    time_field, id_field = order_by
+    moment, pk = decode_cursor(cursor)
+    # "-field" orderings (newest first) page towards smaller values
+    lookup = "lt" if time_field.startswith("-") else "gt"
+    time_field, id_field = time_field.lstrip("-"), id_field.lstrip("-")
+    # the redundant plain bound lets PostgreSQL skip the comment partitions
+    # on the far side of the cursor, which the OR alone does not
+    return Q(**{f"{time_field}__{lookup}e": moment}) & (
+        Q(**{f"{time_field}__{lookup}": moment}) | Q(**{time_field: moment, f"{id_field}__{lookup}": pk})
+    )
+
+
+def page_queryset(queryset, first, after, order_by=("created_at", "id")):
+    """
+    One keyset page of ``queryset``, not yet evaluated.
+
+    The page is located with a ``(time, id) > cursor`` predicate instead of
+    OFFSET, so any page costs the same as the first. One extra row is read
+    to tell whether there is a next page; use ``build_connection`` to trim it.
+    """
+    queryset = queryset.order_by(*order_by)
+    if after:
+        queryset = queryset.filter(keyset_after(after, order_by))
+    return queryset[:page_size(first) + 1]
+
+
+def paginate(queryset, first, after, order_by=("created_at", "id")):
+    """Fetch one keyset page from ``queryset`` (see ``page_queryset``)."""
+    return list(page_queryset(queryset, first, after, order_by))
+
+
+async def apaginate(queryset, first, after, order_by=("created_at", "id")):
+    """``paginate`` through the async ORM."""
+    return [row async for row in page_queryset(queryset, first, after, order_by)]
+
+
+def check_single_parent(parent_ids):
+    if len(set(parent_ids)) > 1:
+        raise GraphQLError(
+            "Argument 'after' on a nested list needs a single parent; page that parent's list instead."
+        )
+
+
+def paginate_by_parent(queryset, parent_field, parent_ids, first, after, order_by=("created_at", "id")):
+    """
+    Keyset pages for many parents in a single query.
+
+    Rows are numbered per parent with ROW_NUMBER() and cut at ``first + 1``,
+    so children of every parent come back together but each parent's page
+    stays bounded. A cursor belongs to one parent's page, so ``after`` is
+    only accepted for a single parent.
+    """
+    parent_ids = list(parent_ids)
+    queryset = queryset.filter(**{f"{parent_field}__in": parent_ids})
+    if after:
+        check_single_parent(parent_ids)
+        queryset = queryset.filter(keyset_after(after, order_by))
+    queryset = queryset.annotate(
+        page_row=Window(
+            RowNumber(),
+            partition_by=F(parent_field),
+            order_by=[F(field[1:]).desc() if field.startswith("-") else F(field).asc() for field in order_by],
+        )
+    ).filter(page_row__lte=page_size(first) + 1)
+    return queryset.order_by(parent_field, *order_by)
+
+
+def build_connection(connection_type, rows, first, after, order_by=("created_at", "id")):
+    size = page_size(first)
+    has_next_page = len(rows) > size
+    rows = rows[:size]
+    edges = [
+        connection_type.Edge(node=row, cursor=encode_cursor(row, order_by))
+        for row in rows
+    ]
+    return connection_type(
+        edges=edges,
+        page_info=PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_next_page=has_next_page,
+            has_previous_page=bool(after),
+        ),
+    )
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from graphql import GraphQLError, parse, specified_rules, validate
+from graphene_django.settings import graphene_settings
+
+DEFAULT_CONFIG = {
+    "CACHE_SIZE": 256,
+    "ALLOWLIST_ONLY": False,
+    "ALLOWLIST_FILE": None,
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "GRAPHQL_PERSISTED_QUERIES", {})}
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get_persisted_query_hash(data):
+    """sha256 hash from an Apollo-style ``extensions.persistedQuery`` payload."""
+    extensions = data.get("extensions") if hasattr(data, "get") else None
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    persisted = extensions.get("persistedQuery") or {}
+    return persisted.get("sha256Hash")
+
+
+@lru_cache(maxsize=4)
+def load_allowlist(path):
+    """Read a ``{sha256: query}`` manifest; hashes are checked against the text."""
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as manifest:
+        queries = json.load(manifest)
+    for sha256_hash, query in queries.items():
+        if query_hash(query) != sha256_hash:
+            raise ValueError(f"Allow-list entry {sha256_hash} does not match its query text.")
+    return queries
+
+
+class DocumentCache:
+    """
+    Bounded LRU of parsed documents that passed schema validation, keyed by
+    the sha256 of their query text. Shared by every request in the process.
+    """
+
+    def __init__(self):
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                self.misses += 1
+                return None
+            self._documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+    def set(self, key, document):
+        max_size = get_config()["CACHE_SIZE"]
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > max_size:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+
+document_cache = DocumentCache()
+
+
+def persisted_query_error(message, code):
+    return GraphQLError(message, extensions={"code": code})
+
+
+def load_document(schema, query=None, sha256_hash=None):
+    """
+    Resolve the request's document, parsing and validating it only on a
+    cache miss.
+
+    Returns ``(document, errors)``. A hash without query text that is not
+    cached (or allow-listed) yields ``PersistedQueryNotFound`` so the
+    client retries with the full query, as in Apollo's APQ protocol.
+    """
+    config = get_config()
+    allowlist = load_allowlist(config["ALLOWLIST_FILE"])
+
+    if sha256_hash is None:
+        sha256_hash = query_hash(query)
+    elif query is not None and query_hash(query) != sha256_hash:
+        return None, [persisted_query_error("provided sha does not match query", "INVALID_SHA256")]
+
+    if config["ALLOWLIST_ONLY"] and sha256_hash not in allowlist:
+        return None, [
+            persisted_query_error(
+                "Operation is not in the persisted query allow-list.",
+                "PERSISTED_QUERY_NOT_ALLOWED",
+            )
+        ]
+
+    document = document_cache.get(sha256_hash)
+    if document is not None:
+        return document, []
+
+    if query is None:
+        query = allowlist.get(sha256_hash)
+        if query is None:
+            return None, [persisted_query_error("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")]
+
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    errors = validate(schema, document, specified_rules, graphene_settings.MAX_VALIDATION_ERRORS)
+    if errors:
+        return None, errors
+
+    document_cache.set(sha256_hash, document)
+    return document, []
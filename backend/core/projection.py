@@ -0,0 +1,79 @@
+"""
+Column projection from the GraphQL selection set.
+
+``projection`` turns the fields a client selected on a model's object type
+into ``.only()`` columns and ``select_related`` joins: scalar fields map
+to their model fields, selected foreign keys are joined and projected the
+same way one level down, and anything else (connections, computed fields)
+is left to its own resolver. The primary key, plus whatever the caller
+needs for ordering and grouping (``always``), is always loaded.
+"""
+from collections import defaultdict, namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+# hashable, so it can key a loader
+Projection = namedtuple("Projection", "only related")
+
+
+def children(nodes, fragments):
+    """``{field name: [FieldNode]}`` selected under ``nodes``, fragments merged in."""
+    selected = defaultdict(list)
+
+    def collect(selection_set):
+        for selection in selection_set.selections if selection_set else ():
+            if isinstance(selection, FieldNode):
+                selected[selection.name.value].append(selection)
+            elif isinstance(selection, InlineFragmentNode):
+                collect(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode) and selection.name.value in fragments:
+                collect(fragments[selection.name.value].selection_set)
+
+    for node in nodes:
+        collect(node.selection_set)
+    return selected
+
+
+def columns(model, nodes, fragments, always=(), related=None):
+    only, joins = {model._meta.pk.name, *always}, set()
+    computed = (related or {}).get(model, {})
+    for name, subnodes in children(nodes, fragments).items():
+        if name in computed:
+            # a computed field that reads a related row: join all of it
+            only.add(computed[name])
+            joins.add(computed[name])
+            continue
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            continue
+        if field.many_to_one or (field.one_to_one and field.concrete):
+            sub_only, sub_joins = columns(field.related_model, subnodes, fragments, related=related)
+            only.add(field.name)
+            only.update(f"{field.name}__{column}" for column in sub_only)
+            joins.add(field.name)
+            joins.update(f"{field.name}__{join}" for join in sub_joins)
+        elif field.concrete and not field.is_relation:
+            only.add(field.name)
+    return only, joins
+
+
+def projection(info, model, path=(), always=(), related=None):
+    """
+    The Projection answering the resolver's selection on ``model`` objects
+    found down ``path`` (``("edges", "node")`` for a connection).
+    ``related`` maps a model to ``{computed GraphQL field: relation it reads}``.
+    """
+    nodes = list(info.field_nodes)
+    for name in path:
+        nodes = children(nodes, info.fragments).get(name, [])
+    only, joins = columns(model, nodes, info.fragments, always, related)
+    return Projection(tuple(sorted(only)), tuple(sorted(joins)))
+
+
+def apply(queryset, projection):
+    if projection.related:
+        queryset = queryset.select_related(*projection.related)
+    return queryset.only(*projection.only)
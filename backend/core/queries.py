@@ -1,11 +1,259 @@
+from collections import defaultdict
+from functools import partial
+from inspect import isawaitable
+
 import graphene
+from asgiref.sync import sync_to_async
+from graphene.utils.dataloader import DataLoader
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
-from core.models import Organization, Project, Task, TaskComment
+from core.models import Organization, Project, ProjectTaskCounts, Task, TaskComment
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from core import comment_archive, projection, tenancy
+from core.pagination import (
+    apaginate, build_connection, check_single_parent, page_size, paginate, paginate_by_parent,
+)
 
 User = get_user_model()
 
+COMMENT_ORDER = ("timestamp", "id")
+NEWEST_COMMENT_ORDER = ("-timestamp", "-id")
+CREATED_ORDER = ("created_at", "id")
+
+
+# === LOADERS ===
+class BatchLoader:
+    """
+    Per-request loader for child rows keyed by parent id.
+
+    Parent resolvers prime the ids of every row they return; the first
+    ``load`` then fetches the children of all queued parents in one query,
+    so a nested list costs one query per level regardless of its size.
+    """
+
+    def __init__(self, batch_load_fn, default=()):
+        self.batch_load_fn = batch_load_fn
+        # what a key missing from the batch's results loads as
+        self.default = default
+        self._cache = {}
+        self._queue = {}
+
+    def prime(self, keys):
+        for key in keys:
+            if key not in self._cache:
+                self._queue[key] = None
+
+    def load(self, key):
+        if key not in self._cache:
+            self._queue[key] = None
+            self._dispatch()
+        return self._cache[key]
+
+    def _dispatch(self):
+        keys = list(self._queue)
+        self._queue.clear()
+        results = self.batch_load_fn(keys)
+        for key in keys:
+            self._cache[key] = results.get(key, self.default)
+
+
+class Loaders:
+    """
+    Request-scoped BatchLoaders, one per kind of child list and page arguments.
+
+    Ids primed for a kind are handed to every loader of that kind without
+    a cursor, including ones created later for a different ``first``. A
+    cursor belongs to one parent's page, so a loader with ``after`` gets no
+    primed ids and refuses to load a second parent.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._primed = defaultdict(dict)
+
+    def prime(self, kind, keys):
+        keys = list(keys)
+        self._primed[kind].update(dict.fromkeys(keys))
+        for (loader_kind, params), loader in self._loaders.items():
+            if loader_kind == kind and not dict(params).get("after"):
+                loader.prime(keys)
+
+    def tasks_by_project(self, first=None, after=None, fields=None):
+        return self._get("tasks", self._load_tasks, first=first, after=after, fields=fields)
+
+    def comments_by_task(self, first=None, after=None, fields=None, order_by=COMMENT_ORDER):
+        return self._get(
+            "comments", self._load_comments, first=first, after=after, fields=fields, order_by=order_by,
+        )
+
+    def comment_counts(self):
+        return self._get("comment_counts", self._load_comment_counts, default=0)
+
+    def _get(self, kind, batch_load_fn, default=(), **params):
+        key = (kind, tuple(params.items()))
+        loader = self._loaders.get(key)
+        if loader is None:
+            batch_load_fn = partial(batch_load_fn, **params)
+            if params.get("after"):
+                batch_load_fn = partial(load_cursor_page, batch_load_fn, set())
+            loader = self._loaders[key] = BatchLoader(batch_load_fn, default)
+            if not params.get("after"):
+                loader.prime(self._primed[kind])
+        return loader
+
+    def _load_tasks(self, project_ids, first, after, fields):
+        tasks = list(paginate_by_parent(project_to(Task.objects, fields), "project_id", project_ids, first, after))
+        grouped = group_by(tasks, "project_id")
+        # not the extra row each page reads to find its next page
+        prime_tasks(self, [task for page in grouped.values() for task in page[:page_size(first)]])
+        return grouped
+
+    def _load_comments(self, task_ids, first, after, fields, order_by):
+        comments = paginate_by_parent(
+            project_to(TaskComment.objects, fields), "task_id", task_ids, first, after, order_by=order_by,
+        )
+        return group_by(comments, "task_id")
+
+    def _load_comment_counts(self, task_ids):
+        return dict(comment_counts(task_ids))
+
+
+class AsyncLoaders:
+    """
+    Request-scoped loaders for AsyncGraphQLView.
+
+    Each is an asyncio DataLoader: sibling list items resolve concurrently,
+    so every ``load`` made in the same event-loop tick is collected into one
+    query without priming.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+
+    def prime(self, kind, keys):
+        pass
+
+    def tasks_by_project(self, first=None, after=None, fields=None):
+        return self._get("tasks", self._load_tasks, first=first, after=after, fields=fields)
+
+    def comments_by_task(self, first=None, after=None, fields=None, order_by=COMMENT_ORDER):
+        return self._get(
+            "comments", self._load_comments, first=first, after=after, fields=fields, order_by=order_by,
+        )
+
+    def comment_counts(self):
+        return self._get("comment_counts", self._load_comment_counts)
+
+    def _get(self, kind, batch_load_fn, **params):
+        key = (kind, tuple(params.items()))
+        loader = self._loaders.get(key)
+        if loader is None:
+            loader = self._loaders[key] = DataLoader(partial(batch_load_fn, **params))
+        return loader
+
+    async def _load_tasks(self, project_ids, first, after, fields):
+        tasks = paginate_by_parent(project_to(Task.objects, fields), "project_id", project_ids, first, after)
+        grouped = group_by([task async for task in tasks], "project_id")
+        return [grouped.get(project_id, []) for project_id in project_ids]
+
+    async def _load_comments(self, task_ids, first, after, fields, order_by):
+        comments = paginate_by_parent(
+            project_to(TaskComment.objects, fields), "task_id", task_ids, first, after, order_by=order_by,
+        )
+        grouped = group_by([comment async for comment in comments], "task_id")
+        return [grouped.get(task_id, []) for task_id in task_ids]
+
+    async def _load_comment_counts(self, task_ids):
+        counts = dict([row async for row in comment_counts(task_ids)])
+        return [counts.get(task_id, 0) for task_id in task_ids]
+
+
+def load_cursor_page(batch_load_fn, parents, keys):
+    # every parent this cursor was loaded for in the request, not just this batch
+    parents.update(keys)
+    check_single_parent(parents)
+    return batch_load_fn(keys)
+
+
+def comment_counts(task_ids):
+    """``(task id, live comment count)`` pairs for ``task_ids``, in one grouped query."""
+    return (
+        TaskComment.objects.filter(task_id__in=task_ids)
+        .order_by().values("task_id").annotate(count=Count("id"))
+        .values_list("task_id", "count")
+    )
+
+
+def prime_tasks(loaders, tasks):
+    """Queue the ids of ``tasks`` for their comment pages and comment counts."""
+    task_ids = [task.id for task in tasks]
+    loaders.prime("comments", task_ids)
+    loaders.prime("comment_counts", task_ids)
+
+
+def group_by(rows, field):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[getattr(row, field)].append(row)
+    return grouped
+
+
+# computed fields and the relation each reads, joined when selected: the
+# maintained counter row rides along in the project query itself
+COMPUTED_RELATIONS = {
+    Project: {"taskCount": "task_counts", "completionRate": "task_counts"},
+}
+
+
+def selected_fields(info, model, path=(), always=()):
+    """Columns and joins for the ``model`` rows the resolver's selection reads (core/projection.py)."""
+    return projection.projection(info, model, path, always, COMPUTED_RELATIONS)
+
+
+def connection_fields(info, model, order_by, parent_field=None):
+    # cursors need the ordering columns and loaders group by the parent id
+    order_by = tuple(field.lstrip("-") for field in order_by)
+    always = (*order_by, parent_field) if parent_field else order_by
+    return selected_fields(info, model, ("edges", "node"), always)
+
+
+def project_to(queryset, fields):
+    return projection.apply(queryset, fields) if fields is not None else queryset
+
+
+def get_task_counts(project, info):
+    try:
+        counts = project.task_counts
+    except ProjectTaskCounts.DoesNotExist:
+        # no counter row (not rebuilt yet): one aggregate query over the tasks
+        aggregate = project.tasks.aaggregate if is_async(info) else project.tasks.aggregate
+        counts = aggregate(total=Count("id"), done=Count("id", filter=Q(status="DONE")))
+        return then(counts, lambda counts: (counts["total"], counts["done"]))
+    return counts.total_count, counts.done_count
+
+
+def get_loaders(info):
+    # info.context is the Django request, so loaders live for one request only
+    loaders = getattr(info.context, "loaders", None)
+    if loaders is None:
+        loaders = info.context.loaders = AsyncLoaders() if is_async(info) else Loaders()
+    return loaders
+
+
+def is_async(info):
+    # set by AsyncGraphQLView for the query it executes on the event loop
+    return getattr(info.context, "graphql_async", False)
+
+
+def then(value, callback):
+    """``callback(value)``, awaiting ``value`` first when a resolver got an awaitable."""
+    if isawaitable(value):
+        async def chained():
+            return callback(await value)
+        return chained()
+    return callback(value)
+
 
 # === TYPES ===
 class OrganizationType(DjangoObjectType):
@@ -24,41 +272,106 @@ class UserType(DjangoObjectType):
     def resolve_organization(self, info):
         return getattr(self, "organization", None)
 
+class CommentOrder(graphene.Enum):
+    OLDEST_FIRST = "oldest_first"
+    NEWEST_FIRST = "newest_first"
+
+
+COMMENT_ORDERS = {
+    CommentOrder.OLDEST_FIRST.value: COMMENT_ORDER,
+    CommentOrder.NEWEST_FIRST.value: NEWEST_COMMENT_ORDER,
+}
+
+
 class TaskType(DjangoObjectType):
-    comments = graphene.List(lambda: TaskCommentType) 
+    comment_count = graphene.Int(description="Live comments; archived ones are not counted")
+    comments = graphene.Field(
+        lambda: TaskCommentConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        order=CommentOrder(default_value=CommentOrder.OLDEST_FIRST.value),
+        include_archived=graphene.Boolean(
+            default_value=False, description="Start with comments moved to the archive files",
+        ),
+    )
     
     class Meta:
         model = Task
         fields = ("id", "title", "status", "description", "project", "assignee_email", "due_date")
         
-    def resolve_comments(self, info):
-        return TaskComment.objects.filter(task=self)
+    def resolve_project(self, info):
+        if is_async(info) and not Task.project.is_cached(self):
+            return Project.objects.aget(id=self.project_id)
+        return self.project
+
+    def resolve_comment_count(self, info):
+        return get_loaders(info).comment_counts().load(self.id)
+
+    def resolve_comments(self, info, first=None, after=None, order=CommentOrder.OLDEST_FIRST.value,
+                         include_archived=False):
+        order_by = COMMENT_ORDERS[getattr(order, "value", order)]
+        if include_archived:
+            # read on demand, one task at a time; not batched like live comments
+            if is_async(info):
+                comments = sync_to_async(comment_archive.comments_page)(self.id, first, after, order_by)
+            else:
+                comments = comment_archive.comments_page(self.id, first, after, order_by)
+        else:
+            fields = connection_fields(info, TaskComment, order_by, "task_id")
+            comments = get_loaders(info).comments_by_task(first, after, fields, order_by).load(self.id)
+        return then(
+            comments,
+            lambda comments: build_connection(TaskCommentConnection, comments, first, after, order_by),
+        )
 
 class TaskCommentType(DjangoObjectType):
     class Meta:
         model = TaskComment
         fields = ("id", "content", "author_email", "timestamp", "task")
 
+    def resolve_task(self, info):
+        if is_async(info) and not TaskComment.task.is_cached(self):
+            return Task.objects.aget(id=self.task_id)
+        return self.task
+
+
+class TaskConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskType
+
+
+class TaskCommentConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskCommentType
+
 
 class ProjectType(DjangoObjectType):
     task_count = graphene.Int()
     completion_rate = graphene.Float()
-    tasks = graphene.List(TaskType)
+    tasks = graphene.Field(TaskConnection, first=graphene.Int(), after=graphene.String())
     class Meta:
         model = Project
         fields = ("id", "name", "slug", "description",  "status", "due_date")
 
     def resolve_task_count(self, info):
-        return self.tasks.count()
+        return then(get_task_counts(self, info), lambda counts: counts[0])
 
     def resolve_completion_rate(self, info):
-        total = self.tasks.count()
-        done = self.tasks.filter(status="DONE").count()
-        return (done / total) * 100 if total > 0 else 0
-    
-    def resolve_tasks(self, info):
-        return Task.objects.filter(project=self)
+        return then(
+            get_task_counts(self, info),
+            lambda counts: (counts[1] / counts[0]) * 100 if counts[0] > 0 else 0,
+        )
     
+    def resolve_tasks(self, info, first=None, after=None):
+        fields = connection_fields(info, Task, CREATED_ORDER, "project_id")
+        tasks = get_loaders(info).tasks_by_project(first, after, fields).load(self.id)
+        return then(tasks, lambda tasks: build_connection(TaskConnection, tasks, first, after))
+
+
+class ProjectConnection(graphene.relay.Connection):
+    class Meta:
+        node = ProjectType
+
 # === QUERY ROOT ===
 class Query(graphene.ObjectType):
     # new
@@ -74,9 +387,11 @@ class Query(graphene.ObjectType):
         project_slug=graphene.String(required=True),
     )
     # list projects
-    projects = graphene.List(
-        ProjectType,
+    projects = graphene.Field(
+        ProjectConnection,
         organization_slug=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
     )
 
     # single task
@@ -87,18 +402,22 @@ class Query(graphene.ObjectType):
         task_id=graphene.Int(required=True),
     )
     # list tasks
-    tasks = graphene.List(
-        TaskType,
+    tasks = graphene.Field(
+        TaskConnection,
         organization_slug=graphene.String(required=True),
         project_slug=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
     )
 
     # comments
-    comments = graphene.List(
-        TaskCommentType,
+    comments = graphene.Field(
+        TaskCommentConnection,
         organization_slug=graphene.String(required=True),
         project_slug=graphene.String(required=True),
         task_id=graphene.Int(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
     )
     
     # resolvers
@@ -109,41 +428,117 @@ class Query(graphene.ObjectType):
         return user
 
     def resolve_organization(root, info, slug):
-        try:
-            return Organization.objects.get(slug=slug)
-        except Organization.DoesNotExist:
+        if is_async(info):
+            return resolve_organization_async(info, slug)
+        org_id = tenancy.organization_id(info.context, slug)
+        if org_id is None:
             raise GraphQLError("Organization not found.")
+        return Organization.objects.get(id=org_id)
 
     def resolve_project(root, info, organization_slug, project_slug):
-        try:
-            return Project.objects.get(
-                slug=project_slug, organization__slug=organization_slug
-            )
-        except Project.DoesNotExist:
+        if is_async(info):
+            return resolve_project_async(info, organization_slug, project_slug)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        if project_id is None:
             raise GraphQLError("Project not found.")
+        return project_to(Project.objects, selected_fields(info, Project)).get(id=project_id)
 
-    def resolve_projects(root, info, organization_slug):
-        return Project.objects.filter(organization__slug=organization_slug)
+    def resolve_projects(root, info, organization_slug, first=None, after=None):
+        if is_async(info):
+            return resolve_projects_async(info, organization_slug, first, after)
+        org_id = tenancy.organization_id(info.context, organization_slug)
+        projects = paginate(
+            project_to(Project.objects.filter(organization_id=org_id), connection_fields(info, Project, CREATED_ORDER)),
+            first, after,
+        ) if org_id is not None else []
+        get_loaders(info).prime("tasks", (project.id for project in projects[:page_size(first)]))
+        return build_connection(ProjectConnection, projects, first, after)
 
     def resolve_task(root, info, organization_slug, project_slug, task_id):
+        if is_async(info):
+            return resolve_task_async(info, organization_slug, project_slug, task_id)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
         try:
-            return Task.objects.get(
-                id=task_id,
-                project__slug=project_slug,
-                project__organization__slug=organization_slug,
-            )
+            return project_to(Task.objects, selected_fields(info, Task)).get(id=task_id, project_id=project_id)
         except Task.DoesNotExist:
             raise GraphQLError("Task not found.")
 
-    def resolve_tasks(root, info, organization_slug, project_slug):
-        return Task.objects.filter(
-            project__organization__slug=organization_slug,
-            project__slug=project_slug
-        )
+    def resolve_tasks(root, info, organization_slug, project_slug, first=None, after=None):
+        if is_async(info):
+            return resolve_tasks_async(info, organization_slug, project_slug, first, after)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        tasks = paginate(
+            project_to(Task.objects.filter(project_id=project_id), connection_fields(info, Task, CREATED_ORDER)),
+            first, after,
+        ) if project_id is not None else []
+        prime_tasks(get_loaders(info), tasks[:page_size(first)])
+        return build_connection(TaskConnection, tasks, first, after)
+
+    def resolve_comments(root, info, organization_slug, project_slug, task_id, first=None, after=None):
+        if is_async(info):
+            return resolve_comments_async(info, organization_slug, project_slug, task_id, first, after)
+        project_id = tenancy.project_id(info.context, organization_slug, project_slug)
+        comments = paginate(
+            project_to(
+                TaskComment.objects.filter(task_id=task_id, task__project_id=project_id),
+                connection_fields(info, TaskComment, COMMENT_ORDER),
+            ),
+            first, after, COMMENT_ORDER,
+        ) if project_id is not None else []
+        return build_connection(TaskCommentConnection, comments, first, after, COMMENT_ORDER)
+
+
+# === ASYNC ROOT RESOLVERS ===
+# Query resolvers as run by AsyncGraphQLView: the same lookups through
+# tenancy's async helpers and the async ORM.
+
+async def resolve_organization_async(info, slug):
+    org_id = await tenancy.aorganization_id(info.context, slug)
+    if org_id is None:
+        raise GraphQLError("Organization not found.")
+    return await Organization.objects.aget(id=org_id)
+
+
+async def resolve_project_async(info, organization_slug, project_slug):
+    project_id = await tenancy.aproject_id(info.context, organization_slug, project_slug)
+    if project_id is None:
+        raise GraphQLError("Project not found.")
+    return await project_to(Project.objects, selected_fields(info, Project)).aget(id=project_id)
+
+
+async def resolve_projects_async(info, organization_slug, first=None, after=None):
+    org_id = await tenancy.aorganization_id(info.context, organization_slug)
+    projects = await apaginate(
+        project_to(Project.objects.filter(organization_id=org_id), connection_fields(info, Project, CREATED_ORDER)),
+        first, after,
+    ) if org_id is not None else []
+    return build_connection(ProjectConnection, projects, first, after)
+
+
+async def resolve_task_async(info, organization_slug, project_slug, task_id):
+    project_id = await tenancy.aproject_id(info.context, organization_slug, project_slug)
+    try:
+        return await project_to(Task.objects, selected_fields(info, Task)).aget(id=task_id, project_id=project_id)
+    except Task.DoesNotExist:
+        raise GraphQLError("Task not found.")
+
+
+async def resolve_tasks_async(info, organization_slug, project_slug, first=None, after=None):
+    project_id = await tenancy.aproject_id(info.context, organization_slug, project_slug)
+    tasks = await apaginate(
+        project_to(Task.objects.filter(project_id=project_id), connection_fields(info, Task, CREATED_ORDER)),
+        first, after,
+    ) if project_id is not None else []
+    return build_connection(TaskConnection, tasks, first, after)
+
 
-    def resolve_comments(root, info, organization_slug, project_slug, task_id):
-        return TaskComment.objects.filter(
-            task__id=task_id,
-            task__project__slug=project_slug,
-            task__project__organization__slug=organization_slug,
-        )
\ No newline at end of file
+async def resolve_comments_async(info, organization_slug, project_slug, task_id, first=None, after=None):
+    project_id = await tenancy.aproject_id(info.context, organization_slug, project_slug)
+    comments = await apaginate(
+        project_to(
+            TaskComment.objects.filter(task_id=task_id, task__project_id=project_id),
+            connection_fields(info, TaskComment, COMMENT_ORDER),
+        ),
+        first, after, COMMENT_ORDER,
+    ) if project_id is not None else []
+    return build_connection(TaskCommentConnection, comments, first, after, COMMENT_ORDER)
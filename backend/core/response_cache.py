@@ -0,0 +1,169 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from graphql import FieldNode, OperationType, value_from_ast_untyped
+
+DEFAULT_CONFIG = {
+    "ENABLED": False,
+    "CACHE_ALIAS": "graphql",
+    "TIMEOUT": 300,
+    # root query fields whose results depend only on their tenant arguments
+    "CACHEABLE_FIELDS": ("organization", "projects", "project", "tasks", "task", "comments"),
+}
+ORGANIZATION_ARGUMENTS = {"organization": "slug"}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "GRAPHQL_RESPONSE_CACHE", {})}
+
+
+def get_cache():
+    return caches[get_config()["CACHE_ALIAS"]]
+
+
+# === GENERATIONS ===
+# Every cached entry is keyed by the generations of the scopes it reads.
+# Bumping a generation makes all older keys unreachable; they age out by TTL.
+
+def _generation_key(*parts):
+    return "gql:gen:" + ":".join(parts)
+
+
+def get_generation(key):
+    cache = get_cache()
+    generation = cache.get(key)
+    if generation is None:
+        # an evicted counter must not restart at a value older entries used
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_organization(organization_slug):
+    """Drop every cached read for the organization (project or org changes)."""
+    def bump():
+        bump_generation(_generation_key("org", organization_slug))
+        bump_generation(_generation_key("org-structure", organization_slug))
+
+    if get_config()["ENABLED"]:
+        transaction.on_commit(bump)
+
+
+def invalidate_project(organization_slug, project_slug):
+    """
+    Drop cached reads of one project, plus organization-wide reads (whose
+    task counts and nested lists may include it). Other projects' entries
+    stay valid.
+    """
+    def bump():
+        bump_generation(_generation_key("org", organization_slug))
+        bump_generation(_generation_key("project", organization_slug, project_slug))
+
+    if get_config()["ENABLED"]:
+        transaction.on_commit(bump)
+
+
+# === KEYS ===
+def _argument(field, name, variables):
+    for argument in field.arguments:
+        if argument.name.value == name:
+            return value_from_ast_untyped(argument.value, variables)
+    return None
+
+
+def cache_scope(operation, variables):
+    """
+    ``(organization_slug, project_slugs)`` for a cacheable query, or None.
+
+    A query is cacheable when all of its root fields are in CACHEABLE_FIELDS
+    and address one organization. It is project-scoped when every root
+    field also names a project.
+    """
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+
+    cacheable = get_config()["CACHEABLE_FIELDS"]
+    organizations, projects = set(), set()
+    project_scoped = True
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value not in cacheable:
+            return None
+        name = selection.name.value
+        organization = _argument(selection, ORGANIZATION_ARGUMENTS.get(name, "organizationSlug"), variables)
+        if not isinstance(organization, str):
+            return None
+        organizations.add(organization)
+        project = _argument(selection, "projectSlug", variables)
+        if isinstance(project, str):
+            projects.add(project)
+        else:
+            project_scoped = False
+
+    if len(organizations) != 1:
+        return None
+    return organizations.pop(), (frozenset(projects) if project_scoped else None)
+
+
+def cache_key(document_hash, operation_name, variables, scope):
+    organization, projects = scope
+    if projects is None:
+        generations = [get_generation(_generation_key("org", organization))]
+    else:
+        generations = [get_generation(_generation_key("org-structure", organization))] + [
+            get_generation(_generation_key("project", organization, project))
+            for project in sorted(projects)
+        ]
+    digest = hashlib.sha256(
+        json.dumps(
+            [document_hash, operation_name, variables or {}, generations],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+    return f"gql:response:{organization}:{digest}"
+
+
+# === ENTRIES ===
+def get_response(key):
+    cache = get_cache()
+    data = cache.get(key)
+    _count("hits" if data is not None else "misses")
+    return data
+
+
+def set_response(key, data):
+    get_cache().set(key, data, timeout=get_config()["TIMEOUT"])
+
+
+def _count(name):
+    cache = get_cache()
+    key = f"gql:stats:{name}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        "hits": cache.get("gql:stats:hits", 0),
+        "misses": cache.get("gql:stats:misses", 0),
+    }
+
+
+def reset_stats():
+    get_cache().delete_many(["gql:stats:hits", "gql:stats:misses"])
@@ -1,8 +1,13 @@
 import graphene
+from .activity import ActivityQuery
+from .deletion import DeletionQuery
 from .queries import Query as CoreQuery, UserType
 from .mutations import Mutation as CoreMutation
+from .search import SearchQuery
+from .stats import StatsQuery
+from .subscriptions import Subscription as CoreSubscription
 
-class Query(CoreQuery, graphene.ObjectType):
+class Query(CoreQuery, SearchQuery, StatsQuery, ActivityQuery, DeletionQuery, graphene.ObjectType):
     me = graphene.Field(UserType)
     def resolve_me(self, info):
         user = info.context.user
@@ -11,4 +16,7 @@ class Query(CoreQuery, graphene.ObjectType):
 class Mutation(CoreMutation, graphene.ObjectType):
     pass
 
+class Subscription(CoreSubscription, graphene.ObjectType):
+    pass
+
 # schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
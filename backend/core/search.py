@@ -0,0 +1,213 @@
+import base64
+import html
+import json
+import re
+
+import graphene
+from asgiref.sync import sync_to_async
+from django.db import connection
+from graphene.relay import PageInfo
+from graphql import GraphQLError
+
+from core import tenancy
+from core.models import Task, TaskComment
+from core.pagination import page_size
+from core.queries import TaskCommentType, TaskType, is_async
+
+# matched terms come back wrapped in these; see ``highlight``
+MARK_START, MARK_END = "\x02", "\x03"
+
+# Hits are ordered by (rank DESC, kind, id); ``{after}`` is replaced with
+# the keyset predicate for the cursor, or TRUE on the first page. ts_rank is
+# float4: it is cast to float8 so the rank a cursor carries back compares
+# equal to the row it came from.
+POSTGRESQL_SEARCH = """
+WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query),
+hits AS (
+    SELECT 'TASK' AS kind, t.id, ts_rank(t.search_vector, q.query)::float8 AS rank
+    FROM core_task t JOIN core_project p ON p.id = t.project_id, q
+    WHERE p.organization_id = %s AND p.deleted_at IS NULL AND t.search_vector @@ q.query
+    UNION ALL
+    SELECT 'COMMENT' AS kind, c.id, ts_rank(c.search_vector, q.query)::float8 AS rank
+    FROM core_taskcomment c JOIN core_task t ON t.id = c.task_id
+        JOIN core_project p ON p.id = t.project_id, q
+    WHERE p.organization_id = %s AND p.deleted_at IS NULL AND c.search_vector @@ q.query
+),
+page AS (
+    SELECT * FROM hits WHERE {after} ORDER BY rank DESC, kind, id LIMIT %s
+)
+-- headlines are the expensive part: build them for the page only
+SELECT page.kind, page.id, page.rank, CASE page.kind
+    WHEN 'TASK' THEN (
+        SELECT ts_headline('english', t.title || ' ' || t.description, q.query, %s)
+        FROM core_task t WHERE t.id = page.id
+    )
+    ELSE (
+        SELECT ts_headline('english', c.content, q.query, %s)
+        FROM core_taskcomment c WHERE c.id = page.id
+    )
+END AS highlight
+FROM page, q
+ORDER BY page.rank DESC, page.kind, page.id
+"""
+
+POSTGRESQL_HEADLINE_OPTIONS = (
+    f'StartSel="{MARK_START}", StopSel="{MARK_END}", '
+    'MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter=" … "'
+)
+
+# bm25() is lower-is-better; negated so both backends rank higher-is-better.
+# Title matches weigh more than description matches, as on PostgreSQL.
+SQLITE_SEARCH = """
+WITH hits AS (
+    SELECT 'TASK' AS kind, s.rowid AS id, -bm25(core_task_search, 4.0, 1.0) AS rank,
+        snippet(core_task_search, -1, char(2), char(3), ' … ', 20) AS highlight
+    FROM core_task_search s JOIN core_task t ON t.id = s.rowid
+        JOIN core_project p ON p.id = t.project_id
+    WHERE core_task_search MATCH %s AND p.organization_id = %s AND p.deleted_at IS NULL
+    UNION ALL
+    SELECT 'COMMENT' AS kind, s.rowid AS id, -bm25(core_taskcomment_search) AS rank,
+        snippet(core_taskcomment_search, -1, char(2), char(3), ' … ', 20) AS highlight
+    FROM core_taskcomment_search s JOIN core_taskcomment c ON c.id = s.rowid
+        JOIN core_task t ON t.id = c.task_id JOIN core_project p ON p.id = t.project_id
+    WHERE core_taskcomment_search MATCH %s AND p.organization_id = %s AND p.deleted_at IS NULL
+)
+SELECT kind, id, rank, highlight FROM hits WHERE {after} ORDER BY rank DESC, kind, id LIMIT %s
+"""
+
+KEYSET_AFTER = "(rank < %s OR (rank = %s AND (kind > %s OR (kind = %s AND id > %s))))"
+
+
+def encode_cursor(hit):
+    payload = [hit["rank"], hit["kind"], hit["id"]]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        rank, kind, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise GraphQLError("Invalid cursor.")
+    if not isinstance(rank, (int, float)) or kind not in ("TASK", "COMMENT") or not isinstance(pk, int):
+        raise GraphQLError("Invalid cursor.")
+    return rank, kind, pk
+
+
+def fts5_query(text):
+    # FTS5 has its own query syntax; search for every word instead so user
+    # input can never be a syntax error
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+
+def highlight(text):
+    """Escape the excerpt for HTML, then mark the matched terms with ``<mark>``."""
+    return html.escape(text or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def find_hits(organization_id, text, limit, after=None):
+    """
+    Up to ``limit`` ranked hits (``kind``, ``id``, ``rank``, ``highlight``)
+    for ``text`` in one organization, after the ``after`` cursor.
+    """
+    if connection.vendor == "postgresql":
+        sql, params = POSTGRESQL_SEARCH, [text, organization_id, organization_id]
+        tail = [limit, POSTGRESQL_HEADLINE_OPTIONS, POSTGRESQL_HEADLINE_OPTIONS]
+    elif connection.vendor == "sqlite":
+        text = fts5_query(text)
+        if not text:
+            return []
+        sql, params = SQLITE_SEARCH, [text, organization_id, text, organization_id]
+        tail = [limit]
+    else:
+        raise GraphQLError("Search is not available on this database.")
+
+    if after:
+        rank, kind, pk = decode_cursor(after)
+        sql = sql.format(after=KEYSET_AFTER)
+        params += [rank, rank, kind, kind, pk]
+    else:
+        sql = sql.format(after="TRUE")
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + tail)
+        return [
+            {"kind": kind, "id": pk, "rank": rank, "highlight": highlight(excerpt)}
+            for kind, pk, rank, excerpt in cursor.fetchall()
+        ]
+
+
+def search(organization_id, text, first=None, after=None):
+    """
+    One page of ``SearchHitConnection`` for ``text`` in an organization
+    (empty for an unknown organization, like the other list fields).
+    """
+    size = page_size(first)
+    searchable = organization_id is not None and text.strip()
+    hits = find_hits(organization_id, text, size + 1, after) if searchable else []
+    has_next_page = len(hits) > size
+    hits = hits[:size]
+
+    tasks = Task.objects.in_bulk([hit["id"] for hit in hits if hit["kind"] == "TASK"])
+    comments = TaskComment.objects.select_related("task").in_bulk(
+        [hit["id"] for hit in hits if hit["kind"] == "COMMENT"]
+    )
+    edges = []
+    for hit in hits:
+        if hit["kind"] == "TASK":
+            comment, task = None, tasks.get(hit["id"])
+        else:
+            comment = comments.get(hit["id"])
+            task = comment.task if comment else None
+        if task is None:
+            # deleted between the two queries
+            continue
+        node = SearchHit(
+            kind=hit["kind"], rank=hit["rank"], highlight=hit["highlight"], task=task, comment=comment,
+        )
+        edges.append(SearchHitConnection.Edge(node=node, cursor=encode_cursor(hit)))
+
+    return SearchHitConnection(
+        edges=edges,
+        page_info=PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_next_page=has_next_page,
+            has_previous_page=bool(after),
+        ),
+    )
+
+
+# === TYPES ===
+class SearchHit(graphene.ObjectType):
+    kind = graphene.String(required=True, description="TASK or COMMENT")
+    rank = graphene.Float(required=True)
+    highlight = graphene.String(
+        required=True,
+        description="HTML-escaped excerpt of the matching text, matched terms in <mark>",
+    )
+    task = graphene.Field(TaskType, required=True, description="The task hit, or the commented task")
+    comment = graphene.Field(TaskCommentType)
+
+
+class SearchHitConnection(graphene.relay.Connection):
+    class Meta:
+        node = SearchHit
+
+
+class SearchQuery(graphene.ObjectType):
+    search = graphene.Field(
+        SearchHitConnection,
+        organization_slug=graphene.String(required=True),
+        text=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+        description="Tasks (title, description) and comments matching text, best first.",
+    )
+
+    def resolve_search(root, info, organization_slug, text, first=None, after=None):
+        def run():
+            return search(tenancy.organization_id(info.context, organization_slug), text, first, after)
+
+        if is_async(info):
+            return sync_to_async(run)()
+        return run()
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import counters, tenancy
+from core.models import Organization, Project, ProjectTaskCounts, Task
+
+
+@receiver(post_save, sender=Project)
+def create_task_counts(sender, instance, created, **kwargs):
+    if created:
+        ProjectTaskCounts.objects.get_or_create(project=instance)
+
+
+@receiver(post_delete, sender=Task)
+def decrement_task_counts(sender, instance, origin=None, **kwargs):
+    # project/organization cascades remove the counter row along with the tasks
+    if origin is not None and getattr(origin, "model", type(origin)) is not Task:
+        return
+    counters.task_deleted(instance)
+
+
+@receiver(pre_save, sender=Organization)
+@receiver(pre_save, sender=Project)
+def note_slug_change(sender, instance, update_fields=None, **kwargs):
+    # tenant ids are cached by slug, so only a changed slug makes them stale
+    if instance._state.adding or (update_fields is not None and "slug" not in update_fields):
+        instance._slug_changed = False
+    else:
+        old_slug = sender._base_manager.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        instance._slug_changed = old_slug != instance.slug
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_save, sender=Project)
+def invalidate_tenant_ids(sender, instance, created, **kwargs):
+    # a new row cannot be cached yet (only hits are); a renamed slug is.
+    # After commit, so a concurrent request cannot re-cache the old slug.
+    if not created and instance._slug_changed:
+        transaction.on_commit(tenancy.invalidate)
+
+
+@receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=Project)
+def forget_tenant_ids(sender, instance, **kwargs):
+    transaction.on_commit(tenancy.invalidate)
@@ -0,0 +1,49 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+# room kept at the end of the slug field for a "-<n>" suffix
+SUFFIX_LENGTH = 8
+
+
+def base_slug(instance, text):
+    max_length = instance._meta.get_field("slug").max_length
+    base = slugify(text)[:max_length - SUFFIX_LENGTH].strip("-")
+    return base or instance._meta.model_name
+
+
+def next_free_slug(siblings, base):
+    """
+    ``base``, or ``base-<n>`` past the highest suffix already used among
+    ``siblings``. One query however many collisions there are.
+    """
+    prefix = f"{base}-"
+    taken = list(
+        siblings.filter(Q(slug=base) | Q(slug__startswith=prefix)).values_list("slug", flat=True)
+    )
+    suffixes = [int(slug[len(prefix):]) for slug in taken if slug[len(prefix):].isdigit()]
+    if not suffixes and base not in taken:
+        return base
+    return f"{base}-{max(suffixes, default=0) + 1}"
+
+
+def save_with_unique_slug(instance, text, save, scope=()):
+    """
+    Give ``instance`` a free slug derived from ``text`` and ``save()`` it.
+
+    ``scope`` names the fields a slug is unique within (none for global
+    uniqueness). Each attempt runs in a savepoint, so losing a race to a
+    concurrent insert of the same slug just picks the next suffix.
+    """
+    model = type(instance)
+    siblings = model._default_manager.filter(**{field: getattr(instance, field) for field in scope})
+    base = base_slug(instance, text)
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = next_free_slug(siblings, base)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,169 @@
+"""
+``organizationStats``: an organization's dashboard numbers.
+
+Live stats take two queries whatever the organization's size: its
+projects, and one pass over its tasks grouped by (project, status,
+assignee) with the overdue count alongside. Everything else is summed up
+from those rows in Python.
+
+With ``ORGANIZATION_STATS["SNAPSHOTS"]`` on, the result is stored in
+OrganizationStatsSnapshot and served from there; ``refresh_organization_stats``
+recomputes snapshots (run it periodically) and ``MAX_AGE`` bounds how old
+a served snapshot may be before it is recomputed on read.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+import graphene
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+from graphql import GraphQLError
+
+from core import tenancy
+from core.models import OrganizationStatsSnapshot, Project, Task
+from core.queries import is_async
+
+DEFAULT_CONFIG = {
+    "SNAPSHOTS": False,
+    # seconds; older snapshots are recomputed when read (None: never)
+    "MAX_AGE": None,
+}
+
+TASK_STATUSES = [status for status, _ in Task.TASK_STATUS_CHOICES]
+PROJECT_STATUSES = [status for status, _ in Project.STATUS_CHOICES]
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "ORGANIZATION_STATS", {})}
+
+
+def status_counts(counter, statuses):
+    return [{"status": status, "count": counter.get(status, 0)} for status in statuses]
+
+
+def compute_stats(organization_id, now=None):
+    """The stats of one organization as plain, JSON-serialisable data."""
+    now = now or timezone.now()
+    projects = list(
+        Project.objects.filter(organization_id=organization_id)
+        .order_by("created_at", "id")
+        .values("id", "name", "slug", "status")
+    )
+    groups = (
+        Task.objects.filter(project__organization_id=organization_id, project__deleted_at__isnull=True)
+        .values("project_id", "status", "assignee_email")
+        .annotate(
+            count=Count("id"),
+            overdue=Count("id", filter=Q(due_date__lt=now) & ~Q(status="DONE")),
+        )
+        .order_by()
+    )
+
+    by_project = defaultdict(Counter)
+    overdue_by_project = Counter()
+    open_by_assignee = Counter()
+    overdue_by_assignee = Counter()
+    for group in groups:
+        project_id, status, assignee = group["project_id"], group["status"], group["assignee_email"] or None
+        by_project[project_id][status] += group["count"]
+        overdue_by_project[project_id] += group["overdue"]
+        if status != "DONE":
+            open_by_assignee[assignee] += group["count"]
+            overdue_by_assignee[assignee] += group["overdue"]
+
+    tasks_by_status = sum(by_project.values(), Counter())
+    return {
+        "task_count": sum(tasks_by_status.values()),
+        "overdue_count": sum(overdue_by_project.values()),
+        "tasks_by_status": status_counts(tasks_by_status, TASK_STATUSES),
+        "projects_by_status": status_counts(Counter(p["status"] for p in projects), PROJECT_STATUSES),
+        "projects": [
+            {
+                **project,
+                "task_count": sum(by_project[project["id"]].values()),
+                "overdue_count": overdue_by_project[project["id"]],
+                "tasks_by_status": status_counts(by_project[project["id"]], TASK_STATUSES),
+            }
+            for project in projects
+        ],
+        # busiest first; unassigned open tasks are listed with a null email
+        "assignees": [
+            {"email": email, "open_count": count, "overdue_count": overdue_by_assignee[email]}
+            for email, count in sorted(open_by_assignee.items(), key=lambda item: (-item[1], item[0] or ""))
+        ],
+    }
+
+
+def refresh_snapshot(organization_id):
+    now = timezone.now()
+    data = compute_stats(organization_id, now)
+    OrganizationStatsSnapshot.objects.update_or_create(
+        organization_id=organization_id, defaults={"data": data, "refreshed_at": now},
+    )
+    return {**data, "refreshed_at": now, "from_snapshot": False}
+
+
+def organization_stats(organization_id):
+    config = get_config()
+    if not config["SNAPSHOTS"]:
+        return {**compute_stats(organization_id), "refreshed_at": timezone.now(), "from_snapshot": False}
+
+    snapshot = OrganizationStatsSnapshot.objects.filter(organization_id=organization_id).first()
+    max_age = config["MAX_AGE"]
+    if snapshot is None or (
+        max_age is not None and snapshot.refreshed_at < timezone.now() - timedelta(seconds=max_age)
+    ):
+        return refresh_snapshot(organization_id)
+    return {**snapshot.data, "refreshed_at": snapshot.refreshed_at, "from_snapshot": True}
+
+
+# === TYPES ===
+class StatusCount(graphene.ObjectType):
+    status = graphene.String(required=True)
+    count = graphene.Int(required=True)
+
+
+class ProjectStats(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    name = graphene.String(required=True)
+    slug = graphene.String()
+    status = graphene.String(required=True)
+    task_count = graphene.Int(required=True)
+    overdue_count = graphene.Int(required=True)
+    tasks_by_status = graphene.List(graphene.NonNull(StatusCount), required=True)
+
+
+class AssigneeWorkload(graphene.ObjectType):
+    email = graphene.String(description="null for unassigned tasks")
+    open_count = graphene.Int(required=True)
+    overdue_count = graphene.Int(required=True)
+
+
+class OrganizationStats(graphene.ObjectType):
+    task_count = graphene.Int(required=True)
+    overdue_count = graphene.Int(required=True, description="Not done and past their due date")
+    tasks_by_status = graphene.List(graphene.NonNull(StatusCount), required=True)
+    projects_by_status = graphene.List(graphene.NonNull(StatusCount), required=True)
+    projects = graphene.List(graphene.NonNull(ProjectStats), required=True)
+    assignees = graphene.List(
+        graphene.NonNull(AssigneeWorkload), required=True, description="Open tasks per assignee",
+    )
+    refreshed_at = graphene.DateTime(required=True)
+    from_snapshot = graphene.Boolean(required=True)
+
+
+class StatsQuery(graphene.ObjectType):
+    organization_stats = graphene.Field(OrganizationStats, slug=graphene.String(required=True))
+
+    def resolve_organization_stats(root, info, slug):
+        def run():
+            org_id = tenancy.organization_id(info.context, slug)
+            if org_id is None:
+                raise GraphQLError("Organization not found.")
+            return organization_stats(org_id)
+
+        if is_async(info):
+            return sync_to_async(run)()
+        return run()
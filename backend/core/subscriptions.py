@@ -0,0 +1,111 @@
+from contextlib import aclosing
+
+import graphene
+from graphene.utils.str_converters import to_camel_case
+from graphql import GraphQLError
+
+from core import tenancy
+from core.broker import get_broker, publish_on_commit
+from core.models import Task, TaskComment
+from core.queries import TaskCommentType, TaskType
+
+
+def project_channel(project_id):
+    return f"project:{project_id}"
+
+
+def row_fields(instance):
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def changed_fields(before, after):
+    return sorted(name for name, value in after.items() if before.get(name) != value)
+
+
+# === PUBLISHING ===
+# Mutations call these next to the response-cache invalidation; events go
+# out after commit and carry the written rows, so subscribers never query.
+
+def publish_tasks(project_id, action, tasks, changes=None):
+    """``changes`` maps task id -> changed field names (for UPDATED)."""
+    rows = [
+        {"fields": row_fields(task), "changed": (changes or {}).get(task.id, [])}
+        for task in tasks
+    ]
+    if rows:
+        publish_on_commit(project_channel(project_id), {"type": "task", "action": action, "rows": rows})
+
+
+def publish_comment(project_id, comment):
+    publish_on_commit(
+        project_channel(project_id),
+        {"type": "comment", "action": "CREATED", "rows": [{"fields": row_fields(comment)}]},
+    )
+
+
+async def project_events(info, organization_slug, project_slug, kind, build):
+    """
+    Resolve the project up front (so a bad slug fails the subscribe request)
+    and return the stream of ``build(action, row)`` for its ``kind`` events.
+    """
+    project_id = await tenancy.aproject_id(info.context, organization_slug, project_slug)
+    if project_id is None:
+        raise GraphQLError("Project not found.")
+
+    async def events():
+        async with aclosing(get_broker().subscribe(project_channel(project_id))) as messages:
+            async for message in messages:
+                if message["type"] == kind:
+                    for row in message["rows"]:
+                        yield build(message["action"], row)
+
+    return events()
+
+
+# === TYPES ===
+class TaskEvent(graphene.ObjectType):
+    action = graphene.String(required=True, description="CREATED or UPDATED")
+    changed_fields = graphene.List(graphene.NonNull(graphene.String), required=True)
+    task = graphene.Field(TaskType, required=True)
+
+
+class CommentEvent(graphene.ObjectType):
+    task_id = graphene.ID(required=True)
+    comment = graphene.Field(TaskCommentType, required=True)
+
+
+class Subscription(graphene.ObjectType):
+    """
+    Live changes to one project's tasks and comments. Each event carries
+    only the row that changed, built from the published values; relations
+    of that row (``task.comments``, ``comment.task``) are not available.
+    """
+
+    task_changed = graphene.Field(
+        TaskEvent,
+        organization_slug=graphene.String(required=True),
+        project_slug=graphene.String(required=True),
+    )
+    comment_added = graphene.Field(
+        CommentEvent,
+        organization_slug=graphene.String(required=True),
+        project_slug=graphene.String(required=True),
+    )
+
+    def subscribe_task_changed(root, info, organization_slug, project_slug):
+        return project_events(
+            info, organization_slug, project_slug, "task",
+            lambda action, row: TaskEvent(
+                action=action,
+                changed_fields=[to_camel_case(name) for name in row["changed"]],
+                task=Task(**row["fields"]),
+            ),
+        )
+
+    def subscribe_comment_added(root, info, organization_slug, project_slug):
+        return project_events(
+            info, organization_slug, project_slug, "comment",
+            lambda action, row: CommentEvent(
+                task_id=row["fields"]["task_id"], comment=TaskComment(**row["fields"])
+            ),
+        )
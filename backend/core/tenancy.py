@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import Organization, Project
+
+GENERATION_KEY = "tenancy:generation"
+DEFAULT_CONFIG = {"CACHE_SIZE": 4096, "TTL": 300, "CACHE_ALIAS": "default"}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "TENANT_CACHE", {})}
+
+
+def get_cache():
+    # holds the generation only; it must be shared by every process
+    return caches[get_config()["CACHE_ALIAS"]]
+
+
+class SlugCache:
+    """
+    Process-wide LRU of slug -> id mappings with a TTL.
+
+    Only hits are stored, so a newly created organization or project is
+    found straight away. Renames and deletes clear it (see ``invalidate``).
+    """
+
+    def __init__(self):
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._ids.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._ids[key]
+                return None
+            self._ids.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        config = get_config()
+        with self._lock:
+            self._ids[key] = (value, time.monotonic() + config["TTL"])
+            self._ids.move_to_end(key)
+            while len(self._ids) > config["CACHE_SIZE"]:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+slug_cache = SlugCache()
+
+
+def _sync(request):
+    # once per request: drop local mappings if another process renamed or
+    # deleted a tenant since (the generation lives in the shared cache)
+    if getattr(request, "tenant_ids", None) is not None:
+        return request.tenant_ids
+    generation = get_cache().get(GENERATION_KEY)
+    if generation != slug_cache.generation:
+        slug_cache.clear()
+        slug_cache.generation = generation
+    request.tenant_ids = {}
+    return request.tenant_ids
+
+
+def _resolve(request, key, lookup):
+    memo = _sync(request) if request is not None else {}
+    if key in memo:
+        return memo[key]
+    value = slug_cache.get(key)
+    if value is None:
+        value = lookup()
+        if value is not None:
+            slug_cache.set(key, value)
+    memo[key] = value
+    return value
+
+
+def organization_id(request, slug):
+    """Id of the organization with ``slug``, or None."""
+    return _resolve(
+        request,
+        ("org", slug),
+        lambda: Organization.objects.filter(slug=slug).values_list("id", flat=True).first(),
+    )
+
+
+def project_id(request, organization_slug, project_slug):
+    """Id of ``project_slug`` inside ``organization_slug``, or None."""
+    org_id = organization_id(request, organization_slug)
+    if org_id is None:
+        return None
+    return _resolve(
+        request,
+        ("project", org_id, project_slug),
+        lambda: Project.objects.filter(organization_id=org_id, slug=project_slug)
+        .values_list("id", flat=True)
+        .first(),
+    )
+
+
+async def aorganization_id(request, slug):
+    return await sync_to_async(organization_id)(request, slug)
+
+
+async def aproject_id(request, organization_slug, project_slug):
+    return await sync_to_async(project_id)(request, organization_slug, project_slug)
+
+
+def invalidate():
+    """Forget every mapping, in this process and (via the generation) in others."""
+    slug_cache.clear()
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+    slug_cache.generation = cache.get(GENERATION_KEY)
@@ -28,16 +28,51 @@
 #         response = self.client.get("/me/")
 #         self.assertJSONEqual(response.content, {"user": None})
 
-from django.test import TestCase, Client
-from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, TestCase, Client
+import asyncio
+import csv
+import gzip
 import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from unittest import mock
+from django.core.management.base import CommandError
+from django.views.decorators.csrf import csrf_exempt
+
+from core.counters import rebuild_task_counts
+from core.models import (
+    ActivityEvent, CommentArchive, ImportRun, Organization, Project, ProjectDeletion, ProjectTaskCounts, Task,
+    TaskComment,
+)
+from core import comment_archive, deletion, export, response_cache, search, slugs, stats, tenancy
+from core.broker import get_broker
+from core.views import AsyncGraphQLView
+from core.persisted_queries import document_cache, load_allowlist, query_hash
 
 class AuthTests(TestCase):
     def setUp(self):
         self.client = Client()
-        self.user = User.objects.create_user(
+        # AUTH_USER_MODEL is core.User, which requires an organization
+        self.organization = Organization.objects.create(
+            name="Acme", slug="acme", contact_email="ops@acme.test"
+        )
+        self.user = get_user_model().objects.create_user(
             username="kp121",
-            password="1234"
+            password="1234",
+            organization=self.organization,
         )
 
     def graphql_query(self, query, variables=None):
@@ -107,3 +142,1570 @@ class AuthTests(TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertIn("null", response.content.decode())
+
+
+class GraphQLClientMixin:
+    def setUp(self):
+        super().setUp()
+        # ids are reused once a test's transaction is rolled back
+        tenancy.slug_cache.clear()
+
+    def graphql_query(self, query, variables=None, extensions=None, **extra):
+        body = {"query": query}
+        if variables:
+            body["variables"] = variables
+        if extensions:
+            body["extensions"] = extensions
+        return self.client.post(
+            "/graphql/",
+            data=json.dumps(body),
+            content_type="application/json",
+            **extra,
+        )
+
+
+def nodes(connection):
+    return [edge["node"] for edge in connection["edges"]]
+
+
+def make_tasks(project, count, comments_per_task=0):
+    for i in range(count):
+        task = Task.objects.create(project=project, title=f"Task {i}", status="TODO")
+        for j in range(comments_per_task):
+            TaskComment.objects.create(task=task, content=f"Comment {j}", author_email="a@example.com")
+
+
+class NestedListQueryTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query($org: String!) {
+      projects(organizationSlug: $org, first: 10) {
+        edges { node {
+          id
+          tasks(first: 5) { edges { node {
+            id
+            comments(first: 3) { edges { node { id content } } }
+          } } }
+        } }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+
+    def add_projects(self, count, tasks_per_project, comments_per_task):
+        for i in range(count):
+            project = Project.objects.create(
+                organization=self.org, name=f"P{i}", slug=f"p{Project.objects.count()}"
+            )
+            make_tasks(project, tasks_per_project, comments_per_task)
+
+    def test_nested_lists_use_one_query_per_level(self):
+        self.add_projects(2, 2, 1)
+        # plus the organization slug lookup, cached for later requests
+        with self.assertNumQueries(4):
+            response = self.graphql_query(self.QUERY, {"org": "acme"})
+        data = nodes(response.json()["data"]["projects"])
+        self.assertEqual(len(data), 2)
+        self.assertEqual(sum(len(nodes(p["tasks"])) for p in data), 4)
+        self.assertTrue(all(len(nodes(t["comments"])) == 1 for p in data for t in nodes(p["tasks"])))
+
+        self.add_projects(8, 5, 3)
+        with self.assertNumQueries(3):
+            response = self.graphql_query(self.QUERY, {"org": "acme"})
+        self.assertEqual(len(nodes(response.json()["data"]["projects"])), 10)
+
+
+class ProjectCountsTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query($org: String!) {
+      projects(organizationSlug: $org) { edges { node { id taskCount completionRate } } }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for i in range(5):
+            project = Project.objects.create(organization=self.org, name=f"P{i}", slug=f"p{i}")
+            make_tasks(project, 4)
+            project.tasks.filter(id__in=project.tasks.values("id")[:i % 5]).update(status="DONE")
+        # tasks written straight through the ORM bypass the maintained counters
+        rebuild_task_counts()
+
+    def test_counts_come_from_the_project_query(self):
+        # plus the organization slug lookup
+        with self.assertNumQueries(2):
+            response = self.graphql_query(self.QUERY, {"org": "acme"})
+        projects = nodes(response.json()["data"]["projects"])
+        self.assertEqual([p["taskCount"] for p in projects], [4] * 5)
+        self.assertEqual(sorted(p["completionRate"] for p in projects), [0, 25, 50, 75, 100])
+
+    def test_single_project_counts(self):
+        response = self.graphql_query("""
+        query { project(organizationSlug: "acme", projectSlug: "p2") { taskCount completionRate } }
+        """)
+        self.assertEqual(response.json()["data"]["project"], {"taskCount": 4, "completionRate": 50.0})
+
+
+class TaskCountersTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+
+    def counts(self):
+        counts = self.project.task_counts
+        counts.refresh_from_db()
+        return counts.total_count, counts.todo_count, counts.in_progress_count, counts.done_count
+
+    def create_task(self, status):
+        response = self.graphql_query("""
+        mutation($status: String!) {
+          createTask(organizationSlug: "acme", projectSlug: "board", title: "T", description: "", status: $status, assigneeEmail: "") {
+            task { id }
+          }
+        }
+        """, {"status": status})
+        return response.json()["data"]["createTask"]["task"]["id"]
+
+    def test_mutations_and_deletes_keep_counters_in_step(self):
+        first = self.create_task("TODO")
+        self.create_task("IN_PROGRESS")
+        self.assertEqual(self.counts(), (2, 1, 1, 0))
+
+        self.graphql_query("""
+        mutation($id: ID!) {
+          updateTask(organizationSlug: "acme", projectSlug: "board", taskId: $id, status: "DONE") { task { id } }
+        }
+        """, {"id": first})
+        self.assertEqual(self.counts(), (2, 0, 1, 1))
+
+        Task.objects.get(id=first).delete()
+        self.assertEqual(self.counts(), (1, 0, 1, 0))
+
+        with self.assertNumQueries(1):
+            response = self.graphql_query(
+                'query { projects(organizationSlug: "acme") { edges { node { taskCount completionRate } } } }'
+            )
+        self.assertEqual(nodes(response.json()["data"]["projects"]), [{"taskCount": 1, "completionRate": 0.0}])
+
+        self.project.delete()
+        self.assertFalse(Task.objects.exists())
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        make_tasks(self.project, 3)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_task_counts", "--check", stdout=StringIO())
+        call_command("rebuild_task_counts", stdout=StringIO())
+        self.assertEqual(self.counts(), (3, 3, 0, 0))
+        ProjectTaskCounts.objects.all().delete()
+        self.assertEqual(self.graphql_query(
+            'query { project(organizationSlug: "acme", projectSlug: "board") { taskCount } }'
+        ).json()["data"]["project"]["taskCount"], 3)
+
+
+class KeysetPaginationTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        make_tasks(self.project, 7)
+        other = Project.objects.create(organization=self.org, name="Other", slug="other")
+        make_tasks(other, 3, comments_per_task=4)
+
+    def fetch_tasks(self, first, after=None):
+        response = self.graphql_query("""
+        query($first: Int, $after: String) {
+          tasks(organizationSlug: "acme", projectSlug: "board", first: $first, after: $after) {
+            edges { cursor node { title } }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+        """, {"first": first, "after": after})
+        return response.json()["data"]["tasks"]
+
+    def test_walks_all_pages_in_order(self):
+        titles, after = [], None
+        while True:
+            page = self.fetch_tasks(3, after)
+            titles += [node["title"] for node in nodes(page)]
+            if not page["pageInfo"]["hasNextPage"]:
+                break
+            after = page["pageInfo"]["endCursor"]
+        self.assertEqual(titles, [f"Task {i}" for i in range(7)])
+
+    def test_page_size_is_capped(self):
+        with self.settings(GRAPHQL_MAX_PAGE_SIZE=5):
+            page = self.fetch_tasks(1000)
+        self.assertEqual(len(nodes(page)), 5)
+        self.assertTrue(page["pageInfo"]["hasNextPage"])
+
+    def test_nested_pages_are_bounded_per_parent(self):
+        response = self.graphql_query("""
+        query {
+          projects(organizationSlug: "acme") { edges { node {
+            slug
+            tasks(first: 2) {
+              pageInfo { hasNextPage }
+              edges { node { comments(first: 3) { pageInfo { hasNextPage } edges { node { id } } } } }
+            }
+          } } }
+        }
+        """)
+        projects = {p["slug"]: p for p in nodes(response.json()["data"]["projects"])}
+        self.assertEqual(len(nodes(projects["board"]["tasks"])), 2)
+        self.assertTrue(projects["board"]["tasks"]["pageInfo"]["hasNextPage"])
+        for task in nodes(projects["other"]["tasks"]):
+            self.assertEqual(len(nodes(task["comments"])), 3)
+            self.assertTrue(task["comments"]["pageInfo"]["hasNextPage"])
+
+    def test_nested_cursor_needs_a_single_parent(self):
+        query = """
+        query($after: String) {
+          %s { edges { node { tasks(first: 2, after: $after) {
+            edges { node { title } } pageInfo { endCursor }
+          } } } }
+        }
+        """
+        single = 'projects(organizationSlug: "acme", first: 1)'
+        first_page = nodes(self.graphql_query(query % single).json()["data"]["projects"])[0]["tasks"]
+        after = first_page["pageInfo"]["endCursor"]
+        second_page = nodes(self.graphql_query(query % single, {"after": after}).json()["data"]["projects"])[0]
+        self.assertEqual([node["title"] for node in nodes(second_page["tasks"])], ["Task 2", "Task 3"])
+
+        # board's cursor means nothing for other's tasks
+        response = self.graphql_query(query % 'projects(organizationSlug: "acme")', {"after": after}).json()
+        self.assertIn("needs a single parent", response["errors"][0]["message"])
+
+    def test_nested_cursor_next_to_a_batched_list(self):
+        # the projects list primes every project id; the cursor page must not get them
+        response = self.graphql_query("""
+        query($after: String) {
+          projects(organizationSlug: "acme") { edges { node { tasks(first: 2) { edges { node { title } } } } } }
+          project(organizationSlug: "acme", projectSlug: "board") {
+            tasks(first: 2, after: $after) { edges { node { title } } }
+          }
+        }
+        """, {"after": self.fetch_tasks(2)["pageInfo"]["endCursor"]}).json()
+        self.assertNotIn("errors", response)
+        self.assertEqual([node["title"] for node in nodes(response["data"]["project"]["tasks"])], ["Task 2", "Task 3"])
+        self.assertEqual(len(nodes(response["data"]["projects"])), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.graphql_query("""
+        query { tasks(organizationSlug: "acme", projectSlug: "board", after: "bogus") { edges { cursor } } }
+        """)
+        self.assertEqual(response.json()["errors"][0]["message"], "Invalid cursor.")
+
+
+class QueryBudgetTests(GraphQLClientMixin, TestCase):
+    NESTED = """
+    query {
+      task(organizationSlug: "acme", projectSlug: "board", taskId: 1) {
+        project { tasks { edges { node { comments { edges { node { task { project { name } } } } } } } } }
+      }
+    }
+    """
+    WIDE = """
+    query {
+      projects(organizationSlug: "acme", first: 100) { edges { node {
+        tasks(first: 100) { edges { node { comments(first: 100) { edges { node { id } } } } } }
+      } } }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+
+    def test_cost_is_reported_in_extensions(self):
+        response = self.graphql_query('query { tasks(organizationSlug: "acme", projectSlug: "x", first: 10) { edges { node { id } } } }')
+        cost = response.json()["extensions"]["cost"]
+        # tasks (1) + 10 edges * (edge + node)
+        self.assertEqual((cost["depth"], cost["cost"]), (4, 21))
+
+    def test_deep_queries_are_rejected_before_execution(self):
+        with self.assertNumQueries(0):
+            response = self.graphql_query(self.NESTED)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Query depth 11 exceeds the limit of 10.", response.json()["errors"][0]["message"])
+
+    def test_budgets_are_per_organization(self):
+        response = self.graphql_query(self.WIDE)
+        self.assertIn("exceeds the limit of 20000", response.json()["errors"][0]["message"])
+
+        limits = {"default": {}, "organizations": {"acme": {"max_cost": 10 ** 7}}}
+        user = get_user_model().objects.create_user(username="kp", password="pw", organization=self.org)
+        self.client.force_login(user)
+        with self.settings(GRAPHQL_QUERY_LIMITS=limits):
+            response = self.graphql_query(self.WIDE)
+        self.assertNotIn("errors", response.json())
+        self.assertEqual(response.json()["extensions"]["cost"]["maxCost"], 10 ** 7)
+
+
+class PersistedQueryTests(GraphQLClientMixin, TestCase):
+    QUERY = 'query { organization(slug: "acme") { name } }'
+
+    def setUp(self):
+        super().setUp()
+        Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        document_cache.clear()
+
+    def persisted(self, sha256_hash=None):
+        return {"persistedQuery": {"version": 1, "sha256Hash": sha256_hash or query_hash(self.QUERY)}}
+
+    def test_hash_only_round_trip(self):
+        response = self.graphql_query(None, extensions=self.persisted())
+        self.assertEqual(response.json()["errors"][0]["message"], "PersistedQueryNotFound")
+
+        response = self.graphql_query(self.QUERY, extensions=self.persisted())
+        self.assertEqual(response.json()["data"]["organization"]["name"], "Acme")
+
+        response = self.graphql_query(None, extensions=self.persisted())
+        self.assertEqual(response.json()["data"]["organization"]["name"], "Acme")
+        self.assertEqual(document_cache.hits, 1)
+
+    def test_hash_must_match_query(self):
+        response = self.graphql_query(self.QUERY, extensions=self.persisted("0" * 64))
+        self.assertEqual(response.json()["errors"][0]["extensions"]["code"], "INVALID_SHA256")
+
+    def test_plain_queries_share_the_document_cache(self):
+        self.graphql_query(self.QUERY)
+        self.graphql_query(self.QUERY)
+        self.assertEqual((document_cache.misses, document_cache.hits, len(document_cache)), (1, 1, 1))
+
+    def test_allowlist_only_mode(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as manifest:
+            json.dump({query_hash(self.QUERY): self.QUERY}, manifest)
+        self.addCleanup(os.remove, manifest.name)
+        self.addCleanup(load_allowlist.cache_clear)
+        config = {"ALLOWLIST_ONLY": True, "ALLOWLIST_FILE": manifest.name}
+        with self.settings(GRAPHQL_PERSISTED_QUERIES=config):
+            response = self.graphql_query(None, extensions=self.persisted())
+            self.assertEqual(response.json()["data"]["organization"]["name"], "Acme")
+
+            response = self.graphql_query('query { organization(slug: "acme") { slug } }')
+            self.assertEqual(
+                response.json()["errors"][0]["extensions"]["code"], "PERSISTED_QUERY_NOT_ALLOWED"
+            )
+
+
+class ResponseCacheTests(GraphQLClientMixin, TestCase):
+    TASKS = """
+    query($project: String!) {
+      tasks(organizationSlug: "acme", projectSlug: $project) { edges { node { title } } }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        overrides = self.settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "graphql": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": cache_dir,
+                },
+            },
+            GRAPHQL_RESPONSE_CACHE={"ENABLED": True, "CACHE_ALIAS": "graphql"},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for slug in ("board", "other"):
+            make_tasks(Project.objects.create(organization=self.org, name=slug, slug=slug), 2)
+
+    def fetch(self, project):
+        response = self.graphql_query(self.TASKS, {"project": project}).json()
+        return response["extensions"]["responseCache"], len(nodes(response["data"]["tasks"]))
+
+    def test_hits_until_a_mutation_touches_the_project(self):
+        self.assertEqual(self.fetch("board"), ("MISS", 2))
+        self.assertEqual(self.fetch("other"), ("MISS", 2))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch("board"), ("HIT", 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.graphql_query("""
+            mutation {
+              createTask(organizationSlug: "acme", projectSlug: "board", title: "New", description: "",
+                         status: "TODO", assigneeEmail: "") { task { id } }
+            }
+            """)
+        self.assertEqual(self.fetch("board"), ("MISS", 3))
+        self.assertEqual(self.fetch("other"), ("HIT", 2))
+        self.assertEqual(response_cache.get_stats(), {"hits": 2, "misses": 3})
+
+    def test_project_changes_invalidate_the_organization(self):
+        query = 'query { projects(organizationSlug: "acme") { edges { node { name } } } }'
+        self.graphql_query(query)
+        self.assertEqual(self.graphql_query(query).json()["extensions"]["responseCache"], "HIT")
+        project = Project.objects.get(slug="board")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.graphql_query(
+                'mutation($id: ID!) { updateProject(organizationSlug: "acme", projectId: $id, name: "Renamed") { project { id } } }',
+                {"id": project.id},
+            )
+        response = self.graphql_query(query).json()
+        self.assertEqual(response["extensions"]["responseCache"], "MISS")
+        self.assertIn("Renamed", [p["name"] for p in nodes(response["data"]["projects"])])
+        self.assertEqual(self.fetch("other")[0], "MISS")
+
+    def test_user_specific_queries_are_not_cached(self):
+        response = self.graphql_query('query { me { username } organization(slug: "acme") { name } }')
+        self.assertNotIn("responseCache", response.json().get("extensions", {}))
+
+
+class IndexUsageTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        make_tasks(self.project, 3, comments_per_task=2)
+        if connection.vendor == "postgresql":
+            # tiny test tables would otherwise always be scanned sequentially
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def explain(self, sql, params=()):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return "\n".join(str(row) for row in cursor.fetchall())
+
+    def resolver_plans(self, query, variables=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.graphql_query(query, variables)
+        self.assertNotIn("errors", response.json())
+        return [self.explain(q["sql"]) for q in captured.captured_queries]
+
+    def assertResolverUsesIndex(self, index_name, query, *equivalents):
+        plans = self.resolver_plans(query)
+        markers = (index_name, *equivalents)
+        self.assertTrue(any(marker in plan for plan in plans for marker in markers), plans)
+
+    def test_projects_resolver(self):
+        self.assertResolverUsesIndex(
+            "core_project_org_created_idx",
+            'query { projects(organizationSlug: "acme") { edges { node { id } } } }',
+        )
+
+    def test_project_resolver(self):
+        self.assertResolverUsesIndex(
+            "core_project_org_slug_uniq",
+            'query { project(organizationSlug: "acme", projectSlug: "board") { id } }',
+            # SQLite inlines the constraint as an anonymous autoindex
+            "(organization_id=? AND slug=?)",
+        )
+
+    def test_tasks_resolver(self):
+        self.assertResolverUsesIndex(
+            "core_task_project_created_idx",
+            'query { tasks(organizationSlug: "acme", projectSlug: "board") { edges { node { id } } } }',
+        )
+
+    def test_comments_resolver(self):
+        task = self.project.tasks.first()
+        self.assertResolverUsesIndex(
+            "core_comment_task_time_idx",
+            'query { comments(organizationSlug: "acme", projectSlug: "board", taskId: %d) { edges { node { id } } } }' % task.id,
+        )
+
+    def test_status_and_assignee_filters(self):
+        sql, params = Task.objects.filter(project=self.project, status="DONE").values("id").query.sql_with_params()
+        self.assertIn("core_task_project_status_idx", self.explain(sql, params))
+        sql, params = Task.objects.filter(assignee_email="a@example.com").values("id").query.sql_with_params()
+        self.assertIn("core_task_assignee_idx", self.explain(sql, params))
+
+    def test_project_slugs_are_unique_per_organization(self):
+        other = Organization.objects.create(name="Other", slug="other", contact_email="ops@other.test")
+        Project.objects.create(organization=other, name="Board", slug="board")
+        with self.assertRaises(IntegrityError):
+            Project.objects.create(organization=self.org, name="Board", slug="board")
+
+
+class TenantResolutionTests(GraphQLClientMixin, TestCase):
+    TASKS_QUERY = 'query { tasks(organizationSlug: "acme", projectSlug: "board") { edges { node { title } } } }'
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        make_tasks(self.project, 2)
+
+    def test_slugs_resolved_once_then_cached(self):
+        with CaptureQueriesContext(connection) as first:
+            self.graphql_query(self.TASKS_QUERY)
+        with CaptureQueriesContext(connection) as second:
+            response = self.graphql_query(self.TASKS_QUERY)
+
+        self.assertEqual(len(first.captured_queries), 3)
+        self.assertEqual(len(second.captured_queries), 1)
+        sql = second.captured_queries[0]["sql"]
+        self.assertNotIn("core_organization", sql)
+        self.assertNotIn("core_project", sql)
+        self.assertEqual(len(nodes(response.json()["data"]["tasks"])), 2)
+
+    def test_rename_invalidates_mapping(self):
+        self.graphql_query(self.TASKS_QUERY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.slug = "renamed"
+            self.project.save()
+
+        data = self.graphql_query(self.TASKS_QUERY).json()["data"]
+        self.assertEqual(nodes(data["tasks"]), [])
+        data = self.graphql_query(
+            'query { tasks(organizationSlug: "acme", projectSlug: "renamed") { edges { node { title } } } }'
+        ).json()["data"]
+        self.assertEqual(len(nodes(data["tasks"])), 2)
+
+    def test_save_without_slug_change_keeps_mapping(self):
+        self.graphql_query(self.TASKS_QUERY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.name = "Renamed board"
+            self.project.save()
+            self.org.save(update_fields=["name"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.graphql_query(self.TASKS_QUERY)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_generation_lives_in_the_configured_cache(self):
+        with self.settings(TENANT_CACHE={"CACHE_ALIAS": "graphql"}):
+            self.graphql_query(self.TASKS_QUERY)
+            # another process renames the project: only the shared generation changes
+            Project.objects.filter(id=self.project.id).update(slug="renamed")
+            caches["graphql"].set(tenancy.GENERATION_KEY, "elsewhere", timeout=None)
+            self.addCleanup(caches["graphql"].delete, tenancy.GENERATION_KEY)
+            data = self.graphql_query(self.TASKS_QUERY).json()["data"]
+        self.assertEqual(nodes(data["tasks"]), [])
+
+    def test_unknown_tenant(self):
+        data = self.graphql_query(
+            'query { projects(organizationSlug: "nope") { edges { node { id } } } }'
+        ).json()["data"]
+        self.assertEqual(nodes(data["projects"]), [])
+        response = self.graphql_query('query { project(organizationSlug: "acme", projectSlug: "nope") { id } }')
+        self.assertEqual(response.json()["errors"][0]["message"], "Project not found.")
+
+
+class BulkTaskMutationTests(GraphQLClientMixin, TestCase):
+    CREATE = """
+    mutation($tasks: [TaskInput!]!) {
+      bulkCreateTasks(organizationSlug: "acme", projectSlug: "board", tasks: $tasks) {
+        tasks { id title status }
+        errors { index field message }
+      }
+    }
+    """
+    UPDATE = """
+    mutation($tasks: [TaskUpdateInput!]!) {
+      bulkUpdateTasks(organizationSlug: "acme", projectSlug: "board", tasks: $tasks) {
+        tasks { id status }
+        errors { index field message }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+
+    def counts(self):
+        counts = ProjectTaskCounts.objects.get(project=self.project)
+        return counts.total_count, counts.todo_count, counts.in_progress_count, counts.done_count
+
+    def test_bulk_create_uses_a_constant_number_of_queries(self):
+        tasks = [{"title": f"Task {i}", "status": "TODO"} for i in range(500)]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.graphql_query(self.CREATE, {"tasks": tasks})
+        result = response.json()["data"]["bulkCreateTasks"]
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(len(result["tasks"]), 500)
+        # SQLite splits the task INSERT by its parameter limit; the rest is one
+        # query each, including the batch's activity event
+        self.assertLessEqual(len(captured.captured_queries), 10)
+        self.assertEqual(self.counts(), (500, 500, 0, 0))
+
+    def test_invalid_items_are_reported_and_skipped(self):
+        response = self.graphql_query(self.CREATE, {"tasks": [
+            {"title": "Good", "status": "DONE"},
+            {"title": "Bad status", "status": "LATER"},
+            {"title": "Bad email", "status": "TODO", "assigneeEmail": "nope"},
+        ]})
+        result = response.json()["data"]["bulkCreateTasks"]
+
+        self.assertEqual(result["tasks"][0]["title"], "Good")
+        self.assertIsNone(result["tasks"][1])
+        self.assertIsNone(result["tasks"][2])
+        self.assertEqual(
+            [(error["index"], error["field"]) for error in result["errors"]],
+            [(1, "status"), (2, "assigneeEmail")],
+        )
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(self.counts(), (1, 0, 0, 1))
+
+    def test_bulk_update(self):
+        make_tasks(self.project, 3)
+        rebuild_task_counts()
+        other = Project.objects.create(organization=self.org, name="Other", slug="other")
+        foreign = Task.objects.create(project=other, title="Elsewhere", status="TODO")
+        ids = list(self.project.tasks.values_list("id", flat=True))
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.graphql_query(self.UPDATE, {"tasks": [
+                {"taskId": ids[0], "status": "DONE"},
+                {"taskId": ids[1], "status": "IN_PROGRESS"},
+                {"taskId": ids[2], "status": "LATER"},
+                {"taskId": foreign.id, "status": "DONE"},
+            ]})
+        result = response.json()["data"]["bulkUpdateTasks"]
+
+        self.assertEqual([task and task["status"] for task in result["tasks"]], ["DONE", "IN_PROGRESS", None, None])
+        self.assertEqual([error["index"] for error in result["errors"]], [2, 3])
+        self.assertLess(len(captured.captured_queries), 10)
+        self.assertEqual(self.counts(), (3, 1, 1, 1))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, "TODO")
+
+    def test_batch_size_limit(self):
+        with self.settings(GRAPHQL_BULK_MAX_ITEMS=2):
+            response = self.graphql_query(self.CREATE, {"tasks": [{"title": "T", "status": "TODO"}] * 3})
+        self.assertEqual(response.json()["errors"][0]["message"], "At most 2 tasks can be written at once.")
+        self.assertFalse(Task.objects.exists())
+
+
+class SlugAllocationTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", contact_email="ops@acme.test")
+
+    def create_project(self, name):
+        response = self.graphql_query("""
+        mutation($name: String!) {
+          createProject(organizationSlug: "acme", name: $name, description: "", status: "ACTIVE") {
+            project { slug }
+          }
+        }
+        """, {"name": name})
+        return response.json()["data"]["createProject"]["project"]["slug"]
+
+    def test_suffixes_are_allocated_with_one_lookup(self):
+        self.assertEqual(self.org.slug, "acme")
+        self.assertEqual(self.create_project("Q3 Planning"), "q3-planning")
+        for _ in range(20):
+            self.create_project("Q3 Planning")
+        # unrelated projects sharing the prefix do not count
+        self.create_project("Q3 Planning Notes")
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.create_project("Q3 Planning"), "q3-planning-21")
+        lookups = [q for q in captured.captured_queries if "q3-planning" in q["sql"] and q["sql"].startswith("SELECT")]
+        self.assertEqual(len(lookups), 1)
+
+    def test_slugs_are_unique_per_organization(self):
+        other = Organization.objects.create(name="Acme", contact_email="ops@acme2.test")
+        self.assertEqual(other.slug, "acme-1")
+        Project.objects.create(organization=self.org, name="Board")
+        self.assertEqual(Project.objects.create(organization=other, name="Board").slug, "board")
+        self.assertEqual(Project.objects.create(organization=self.org, name="!!!").slug, "project")
+
+    def test_lost_race_retries_with_the_next_suffix(self):
+        Project.objects.create(organization=self.org, name="Board")
+        real = slugs.next_free_slug
+        # the first pick collides, as if a concurrent create won the slug
+        with mock.patch.object(slugs, "next_free_slug", side_effect=[
+            "board", real(self.org.projects.all(), "board"),
+        ]):
+            project = Project.objects.create(organization=self.org, name="Board")
+        self.assertEqual(project.slug, "board-1")
+
+
+class SubscriptionTests(GraphQLClientMixin, TestCase):
+    SUBSCRIBE = {
+        "query": 'subscription { taskChanged(organizationSlug: "acme", projectSlug: "board") '
+                 '{ action changedFields task { id title status } } }',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        self.channel = f"project:{self.project.id}"
+
+    async def connect(self, subprotocols=("graphql-transport-ws",)):
+        from config.asgi import application
+
+        communicator = ApplicationCommunicator(application, {
+            "type": "websocket", "path": "/graphql/", "headers": [], "subprotocols": list(subprotocols),
+        })
+        await communicator.send_input({"type": "websocket.connect"})
+        return communicator
+
+    async def disconnect(self, communicator):
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+
+    async def send(self, communicator, message):
+        await communicator.send_input({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive(self, communicator):
+        return json.loads((await communicator.receive_output(2))["text"])
+
+    async def subscribe(self, payload):
+        communicator = await self.connect()
+        self.assertEqual((await communicator.receive_output(1))["type"], "websocket.accept")
+        await self.send(communicator, {"type": "connection_init"})
+        self.assertEqual(await self.receive(communicator), {"type": "connection_ack"})
+        await self.send(communicator, {"type": "subscribe", "id": "1", "payload": payload})
+        return communicator
+
+    async def wait_for_subscriber(self):
+        for _ in range(100):
+            if get_broker().subscriber_count(self.channel):
+                return
+            await asyncio.sleep(0.01)
+        self.fail("subscription never reached the broker")
+
+    def mutate(self, query, variables):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.graphql_query(query, variables).json()
+
+    async def test_task_changes_are_pushed(self):
+        communicator = await self.subscribe(self.SUBSCRIBE)
+        await self.wait_for_subscriber()
+
+        created = await sync_to_async(self.mutate)("""
+        mutation { createTask(organizationSlug: "acme", projectSlug: "board", title: "Write", description: "",
+                              status: "TODO", assigneeEmail: "") { task { id } } }
+        """, None)
+        task_id = created["data"]["createTask"]["task"]["id"]
+        message = await self.receive(communicator)
+        self.assertEqual(message["type"], "next")
+        self.assertEqual(message["payload"]["data"]["taskChanged"], {
+            "action": "CREATED",
+            "changedFields": [],
+            "task": {"id": task_id, "title": "Write", "status": "TODO"},
+        })
+
+        update = """
+        mutation($id: ID!, $status: String) {
+          updateTask(organizationSlug: "acme", projectSlug: "board", taskId: $id, status: $status) { task { id } }
+        }
+        """
+        # a no-op update pushes nothing; the next event is the real change
+        await sync_to_async(self.mutate)(update, {"id": task_id, "status": "TODO"})
+        await sync_to_async(self.mutate)(update, {"id": task_id, "status": "DONE"})
+        event = (await self.receive(communicator))["payload"]["data"]["taskChanged"]
+        self.assertEqual((event["action"], event["changedFields"], event["task"]["status"]), ("UPDATED", ["status"], "DONE"))
+
+        await self.send(communicator, {"type": "complete", "id": "1"})
+        for _ in range(100):
+            if not get_broker().subscriber_count(self.channel):
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(get_broker().subscriber_count(self.channel), 0)
+        await self.disconnect(communicator)
+
+    async def test_unknown_project_is_an_error(self):
+        communicator = await self.subscribe({
+            "query": 'subscription { commentAdded(organizationSlug: "acme", projectSlug: "nope") { comment { id } } }',
+        })
+        message = await self.receive(communicator)
+        self.assertEqual(message["type"], "error")
+        self.assertEqual(message["payload"][0]["message"], "Project not found.")
+        await self.disconnect(communicator)
+
+    async def test_protocol_is_required(self):
+        communicator = await self.connect(subprotocols=())
+        self.assertEqual((await communicator.receive_output(1))["code"], 4406)
+        await communicator.wait(1)
+
+
+class AsyncGraphQLViewTests(GraphQLClientMixin, TestCase):
+    QUERY = NestedListQueryTests.QUERY
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for p in range(3):
+            project = Project.objects.create(organization=self.org, name=f"Project {p}", slug=f"project-{p}")
+            make_tasks(project, 3, comments_per_task=2)
+        rebuild_task_counts()
+        self.view = csrf_exempt(AsyncGraphQLView.as_view())
+
+    async def apost(self, query, variables=None):
+        request = AsyncRequestFactory().post(
+            "/graphql/", data=json.dumps({"query": query, "variables": variables or {}}),
+            content_type="application/json",
+        )
+        response = await self.view(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_matches_sync_view_with_batched_loads(self):
+        expected = self.graphql_query(self.QUERY, {"org": "acme"}).json()
+
+        with CaptureQueriesContext(connection) as captured:
+            status, body = async_to_sync(self.apost)(self.QUERY, {"org": "acme"})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["data"], expected["data"])
+        # projects, then one batched query per nested level (slug already cached)
+        self.assertEqual(len(captured.captured_queries), 3)
+
+    async def test_sibling_root_fields_and_errors(self):
+        status, body = await self.apost("""
+        query {
+          organization(slug: "acme") { name }
+          project(organizationSlug: "acme", projectSlug: "project-1") { taskCount completionRate }
+          tasks(organizationSlug: "acme", projectSlug: "project-2", first: 2) { edges { node { title project { slug } } } }
+          missing: project(organizationSlug: "acme", projectSlug: "nope") { id }
+        }
+        """)
+        self.assertEqual(body["data"]["organization"], {"name": "Acme"})
+        self.assertEqual(body["data"]["project"], {"taskCount": 3, "completionRate": 0.0})
+        self.assertEqual(
+            [node["project"]["slug"] for node in nodes(body["data"]["tasks"])], ["project-2", "project-2"]
+        )
+        self.assertEqual(body["errors"][0]["message"], "Project not found.")
+
+    async def test_mutations_run_through_the_sync_orm(self):
+        status, body = await self.apost("""
+        mutation { createTask(organizationSlug: "acme", projectSlug: "project-0", title: "Async", description: "",
+                              status: "DONE", assigneeEmail: "") { task { title project { slug } } } }
+        """)
+        self.assertEqual(body["data"]["createTask"]["task"], {"title": "Async", "project": {"slug": "project-0"}})
+        self.assertEqual(await Task.objects.filter(title="Async").acount(), 1)
+
+
+class SearchTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query($org: String!, $text: String!, $first: Int, $after: String) {
+      search(organizationSlug: $org, text: $text, first: $first, after: $after) {
+        edges { node { kind highlight task { title } comment { content } } }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        self.title_hit = Task.objects.create(project=project, title="Deploy pipeline", description="")
+        self.description_hit = Task.objects.create(
+            project=project, title="Release", description="Run the deploy <script> checklist",
+        )
+        other = Task.objects.create(project=project, title="Unrelated", description="")
+        TaskComment.objects.create(task=other, content="Deploying after lunch", author_email="a@example.com")
+        elsewhere = Organization.objects.create(name="Other", slug="other", contact_email="ops@other.test")
+        Task.objects.create(
+            project=Project.objects.create(organization=elsewhere, name="Board", slug="board"),
+            title="Deploy elsewhere",
+        )
+
+    def search(self, text, **variables):
+        response = self.graphql_query(self.QUERY, {"org": "acme", "text": text, **variables})
+        return response.json()["data"]["search"]
+
+    def test_ranked_and_highlighted_within_organization(self):
+        hits = nodes(self.search("deploy"))
+        self.assertEqual(len(hits), 3)
+        # a title match outranks a description match
+        self.assertEqual(hits[0]["task"]["title"], "Deploy pipeline")
+        self.assertEqual(hits[0]["highlight"], "<mark>Deploy</mark> pipeline")
+        description = next(hit for hit in hits if hit["task"]["title"] == "Release")
+        self.assertIn("<mark>deploy</mark> &lt;script&gt;", description["highlight"])
+        comment = next(hit for hit in hits if hit["kind"] == "COMMENT")
+        self.assertEqual(comment["task"]["title"], "Unrelated")
+        self.assertEqual(comment["comment"]["content"], "Deploying after lunch")
+
+    def test_pages_follow_cursor(self):
+        first = self.search("deploy", first=2)
+        self.assertTrue(first["pageInfo"]["hasNextPage"])
+        rest = self.search("deploy", first=2, after=first["pageInfo"]["endCursor"])
+        self.assertFalse(rest["pageInfo"]["hasNextPage"])
+        seen = [(hit["kind"], hit["task"]["title"]) for hit in nodes(first) + nodes(rest)]
+        self.assertEqual(len(set(seen)), 3)
+
+    def test_pages_through_rank_ties(self):
+        # identical rows rank the same: page boundaries fall inside the tie
+        project = Project.objects.get(organization=self.org)
+        tied = {Task.objects.create(project=project, title="Rollback plan").id for _ in range(7)}
+        seen, after = [], None
+        while True:
+            response = self.graphql_query("""
+            query($after: String) {
+              search(organizationSlug: "acme", text: "rollback", first: 2, after: $after) {
+                edges { cursor } pageInfo { hasNextPage endCursor }
+              }
+            }
+            """, {"after": after}).json()["data"]["search"]
+            seen += [search.decode_cursor(edge["cursor"])[2] for edge in response["edges"]]
+            if not response["pageInfo"]["hasNextPage"]:
+                break
+            after = response["pageInfo"]["endCursor"]
+        self.assertEqual(seen, sorted(tied))
+
+    def test_index_follows_bulk_writes(self):
+        Task.objects.filter(id=self.title_hit.id).update(title="Archive pipeline")
+        Task.objects.bulk_create([Task(project_id=self.title_hit.project_id, title="Archive logs")])
+        TaskComment.objects.all().delete()
+        titles = sorted(hit["task"]["title"] for hit in nodes(self.search("archive")))
+        self.assertEqual(titles, ["Archive logs", "Archive pipeline"])
+        self.assertEqual(nodes(self.search("lunch")), [])
+
+    def test_unsearchable_input(self):
+        self.assertEqual(nodes(self.search('"(*')), [])
+        self.assertEqual(nodes(self.search("deploy", org="nope")), [])
+        response = self.graphql_query(self.QUERY, {"org": "acme", "text": "deploy", "after": "junk"})
+        self.assertEqual(response.json()["errors"][0]["message"], "Invalid cursor.")
+
+
+class InstrumentationTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query Board {
+      projects(organizationSlug: "acme") {
+        edges { node { name taskCount } }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for i in range(6):
+            Project.objects.create(organization=self.org, name=f"Board {i}")
+        # without counter rows taskCount falls back to one aggregate per project
+        ProjectTaskCounts.objects.all().delete()
+
+    def login(self, is_staff):
+        user = get_user_model().objects.create_user(
+            username="dev", password="pw", organization=self.org, is_staff=is_staff,
+        )
+        self.client.force_login(user)
+
+    def test_staff_get_field_timings_and_n_plus_one(self):
+        self.login(is_staff=True)
+        response = self.graphql_query(self.QUERY)
+        trace = response.json()["extensions"]["trace"]
+
+        projects = trace["fields"]["projects"]
+        self.assertEqual(projects["calls"], 1)
+        self.assertGreaterEqual(projects["sqlCount"], 1)
+        count = trace["fields"]["projects.edges.node.taskCount"]
+        self.assertEqual((count["calls"], count["sqlCount"]), (6, 6))
+        self.assertEqual(len(trace["nPlusOne"]), 1)
+        self.assertEqual(trace["nPlusOne"][0]["count"], 6)
+        self.assertEqual(trace["nPlusOne"][0]["paths"], ["projects.edges.node.taskCount"])
+        self.assertTrue(response["Server-Timing"].startswith("graphql;dur="))
+        self.assertIn('desc="projects.edges.node.taskCount"', response["Server-Timing"])
+
+    def test_hidden_from_other_users(self):
+        self.login(is_staff=False)
+        response = self.graphql_query(self.QUERY)
+        self.assertNotIn("trace", response.json()["extensions"])
+        self.assertNotIn("Server-Timing", response)
+
+        response = self.graphql_query(self.QUERY, HTTP_X_GRAPHQL_DEBUG="1")
+        self.assertNotIn("trace", response.json()["extensions"])
+        with self.settings(DEBUG=True):
+            response = self.graphql_query(self.QUERY, HTTP_X_GRAPHQL_DEBUG="1")
+        self.assertIn("trace", response.json()["extensions"])
+
+    def test_slow_operations_logged_as_json(self):
+        with self.settings(GRAPHQL_INSTRUMENTATION={"SLOW_OPERATION_MS": 0}):
+            with self.assertLogs("core.instrumentation", "WARNING") as logs:
+                response = self.graphql_query(self.QUERY)
+        self.assertNotIn("trace", response.json()["extensions"])
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["event"], "slow_graphql_operation")
+        self.assertEqual(entry["operation"], "Board")
+        self.assertEqual(entry["nPlusOne"][0]["count"], 6)
+
+    def test_async_view_attributes_sql_to_fields(self):
+        self.login(is_staff=True)
+        request = AsyncRequestFactory().post(
+            "/graphql/", data=json.dumps({"query": self.QUERY}), content_type="application/json",
+        )
+        request.user = get_user_model().objects.get(username="dev")
+        response = async_to_sync(csrf_exempt(AsyncGraphQLView.as_view()))(request)
+        trace = json.loads(response.content)["extensions"]["trace"]
+        self.assertEqual(trace["fields"]["projects.edges.node.taskCount"]["sqlCount"], 6)
+        self.assertIn("Server-Timing", response)
+
+
+class GenerateDataTests(TestCase):
+    def test_fixed_distribution_counts_and_counters(self):
+        out = StringIO()
+        call_command(
+            "generate_data", organizations=2, projects=3, tasks=4, comments=2,
+            distribution="fixed", seed=7, prefix="synth", stdout=out,
+        )
+        self.assertIn("Created 2 organizations, 6 projects, 24 tasks, 48 comments.", out.getvalue())
+        self.assertEqual(
+            list(Organization.objects.order_by("slug").values_list("slug", flat=True)),
+            ["synth-0", "synth-1"],
+        )
+        for counts in ProjectTaskCounts.objects.all():
+            self.assertEqual(counts.total_count, 4)
+            self.assertEqual(counts.todo_count + counts.in_progress_count + counts.done_count, 4)
+
+        with self.assertRaisesMessage(CommandError, "already exist"):
+            call_command("generate_data", prefix="synth", stdout=StringIO())
+
+    def test_skewed_distribution_is_repeatable(self):
+        def titles(prefix):
+            call_command("generate_data", projects=5, tasks=10, seed=3, prefix=prefix, stdout=StringIO())
+            return list(
+                Task.objects.filter(project__organization__slug=f"{prefix}-0")
+                .order_by("id").values_list("title", flat=True)
+            )
+
+        first, second = titles("a"), titles("b")
+        self.assertEqual(first, second)
+        sizes = Project.objects.filter(organization__slug="a-0").annotate(n=Count("tasks")).values_list("n", flat=True)
+        self.assertGreater(max(sizes), min(sizes))
+
+
+class OrganizationStatsTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query { organizationStats(slug: "acme") {
+      taskCount overdueCount fromSnapshot
+      tasksByStatus { status count }
+      projectsByStatus { status count }
+      projects { slug taskCount overdueCount tasksByStatus { status count } }
+      assignees { email openCount overdueCount }
+    } }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        board = Project.objects.create(organization=self.org, name="Board", slug="board")
+        Project.objects.create(organization=self.org, name="Old", slug="old", status="COMPLETED")
+        past = timezone.now() - timedelta(days=1)
+        Task.objects.create(project=board, title="a", status="TODO", assignee_email="ann@acme.test", due_date=past)
+        Task.objects.create(project=board, title="b", status="IN_PROGRESS", assignee_email="ann@acme.test")
+        Task.objects.create(project=board, title="c", status="DONE", assignee_email="bob@acme.test", due_date=past)
+        Task.objects.create(project=board, title="d", status="TODO", assignee_email="")
+        other = Organization.objects.create(name="Other", slug="other", contact_email="ops@other.test")
+        Task.objects.create(
+            project=Project.objects.create(organization=other, name="Board", slug="board"), title="x",
+        )
+
+    def test_live_stats_in_two_queries(self):
+        self.graphql_query(self.QUERY)  # resolve the slug
+        with self.assertNumQueries(2):
+            stats = self.graphql_query(self.QUERY).json()["data"]["organizationStats"]
+
+        self.assertEqual((stats["taskCount"], stats["overdueCount"], stats["fromSnapshot"]), (4, 1, False))
+        self.assertEqual(
+            stats["tasksByStatus"],
+            [{"status": "TODO", "count": 2}, {"status": "IN_PROGRESS", "count": 1}, {"status": "DONE", "count": 1}],
+        )
+        self.assertEqual(
+            stats["projectsByStatus"],
+            [{"status": "ACTIVE", "count": 1}, {"status": "COMPLETED", "count": 1}, {"status": "ON_HOLD", "count": 0}],
+        )
+        board, old = stats["projects"]
+        self.assertEqual((board["slug"], board["taskCount"], board["overdueCount"]), ("board", 4, 1))
+        self.assertEqual((old["slug"], old["taskCount"]), ("old", 0))
+        self.assertEqual(stats["assignees"], [
+            {"email": "ann@acme.test", "openCount": 2, "overdueCount": 1},
+            {"email": None, "openCount": 1, "overdueCount": 0},
+        ])
+
+    def test_served_from_snapshot(self):
+        with self.settings(ORGANIZATION_STATS={"SNAPSHOTS": True}):
+            first = self.graphql_query(self.QUERY).json()["data"]["organizationStats"]
+            Task.objects.create(project=Project.objects.get(slug="old"), title="late")
+            with self.assertNumQueries(1):
+                cached = self.graphql_query(self.QUERY).json()["data"]["organizationStats"]
+            call_command("refresh_organization_stats", organization=["acme"], stdout=StringIO())
+            refreshed = self.graphql_query(self.QUERY).json()["data"]["organizationStats"]
+
+        self.assertFalse(first["fromSnapshot"])
+        self.assertTrue(cached["fromSnapshot"])
+        self.assertEqual(cached["taskCount"], 4)
+        self.assertEqual(refreshed["taskCount"], 5)
+
+    def test_unknown_organization(self):
+        response = self.graphql_query('query { organizationStats(slug: "nope") { taskCount } }')
+        self.assertEqual(response.json()["errors"][0]["message"], "Organization not found.")
+
+
+class CommentArchiveTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query($id: Int!, $after: String) {
+      task(organizationSlug: "acme", projectSlug: "board", taskId: $id) {
+        comments(first: 2, after: $after, includeArchived: true) {
+          pageInfo { hasNextPage endCursor }
+          edges { node { id content } }
+        }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        settings = self.settings(COMMENT_ARCHIVE={"DIRECTORY": directory, "RETENTION_DAYS": 30})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        project = Project.objects.create(organization=org, name="Board", slug="board")
+        self.task = Task.objects.create(project=project, title="a")
+        other = Task.objects.create(project=project, title="b")
+        old = timezone.now() - timedelta(days=120)
+        for task, content in [(self.task, "old 1"), (other, "other"), (self.task, "old 2")]:
+            comment = TaskComment.objects.create(task=task, content=content, author_email="a@acme.test")
+            TaskComment.objects.filter(id=comment.id).update(timestamp=old)
+        TaskComment.objects.create(task=self.task, content="new 1", author_email="a@acme.test")
+        TaskComment.objects.create(task=self.task, content="new 2", author_email="a@acme.test")
+
+    def archive(self):
+        out = StringIO()
+        call_command("archive_comments", stdout=out)
+        return out.getvalue()
+
+    def test_archives_old_months_to_files(self):
+        self.assertIn("Archived 3 comments from 1 month(s)", self.archive())
+
+        self.assertEqual(TaskComment.objects.count(), 2)
+        archive = CommentArchive.objects.get()
+        with gzip.open(comment_archive.archive_directory() / archive.file_name, "rt") as archive_file:
+            contents = [json.loads(line)["content"] for line in archive_file]
+        self.assertCountEqual(contents, ["old 1", "old 2", "other"])
+        # nothing left to archive on the next run
+        self.assertIn("Archived 0 comments", self.archive())
+
+    def test_archived_comments_stay_readable(self):
+        self.archive()
+        pages, after = [], None
+        while True:
+            data = self.graphql_query(self.QUERY, {"id": self.task.id, "after": after}).json()
+            connection = data["data"]["task"]["comments"]
+            pages.append([node["content"] for node in nodes(connection)])
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            after = connection["pageInfo"]["endCursor"]
+
+        self.assertEqual(pages, [["old 1", "old 2"], ["new 1", "new 2"]])
+        live = self.graphql_query(
+            'query($id: Int!) { task(organizationSlug: "acme", projectSlug: "board", taskId: $id) '
+            '{ comments { edges { node { content } } } } }',
+            {"id": self.task.id},
+        ).json()["data"]["task"]["comments"]
+        self.assertEqual([node["content"] for node in nodes(live)], ["new 1", "new 2"])
+
+
+class ExportTests(TestCase):
+    URL = "/api/organizations/acme/export/"
+
+    def setUp(self):
+        tenancy.slug_cache.clear()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for name in ("Board", "Roadmap"):
+            project = Project.objects.create(organization=self.org, name=name, slug=name.lower())
+            make_tasks(project, 2, comments_per_task=2)
+        other = Organization.objects.create(name="Other", slug="other", contact_email="ops@other.test")
+        make_tasks(Project.objects.create(organization=other, name="Board", slug="board"), 1, 1)
+        user = get_user_model().objects.create_user(username="ann", password="pw", organization=self.org)
+        self.client.force_login(user)
+
+    def get(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_streams_every_record(self):
+        with self.settings(EXPORT={"CHUNK_SIZE": 3}):
+            records = [json.loads(line) for line in self.get().splitlines()]
+
+        self.assertEqual([r["type"] for r in records], ["project"] * 2 + ["task"] * 4 + ["comment"] * 8)
+        task_ids = set(Task.objects.filter(project__organization=self.org).values_list("id", flat=True))
+        self.assertEqual({r["task_id"] for r in records if r["type"] == "comment"}, task_ids)
+
+    def test_resume_after_checkpoint(self):
+        records = [json.loads(line) for line in self.get().splitlines()]
+        checkpoint = f"{records[4]['type']}:{records[4]['id']}"
+        rest = [json.loads(line) for line in self.get(after=checkpoint).splitlines()]
+        self.assertEqual(rest, records[5:])
+
+        self.assertEqual(self.client.get(self.URL, {"after": "task:x"}).status_code, 400)
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.get(format="csv"))))
+        self.assertEqual(len(rows), 14)
+        self.assertEqual((rows[0]["type"], rows[0]["name"], rows[0]["task_id"]), ("project", "Board", ""))
+        self.assertEqual(rows[-1]["type"], "comment")
+
+    def test_other_organizations_are_forbidden(self):
+        self.assertEqual(self.client.get("/api/organizations/other/export/").status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.URL).status_code, 401)
+
+    def test_command_resumes_interrupted_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "acme.csv")
+        real_chunks = export.chunks
+
+        def interrupted(*args, **kwargs):
+            chunks = real_chunks(*args, **kwargs)
+            yield next(chunks)
+            yield next(chunks)
+            raise RuntimeError("connection lost")
+
+        with mock.patch("core.export.chunks", interrupted):
+            with self.assertRaises(RuntimeError):
+                call_command("export_organization", "acme", format="csv", output=path, chunk_size=4, stderr=StringIO())
+        self.assertTrue(os.path.exists(path + ".checkpoint"))
+        call_command("export_organization", "acme", format="csv", output=path, resume=True, stderr=StringIO())
+
+        with open(path, newline="") as resumed:
+            self.assertEqual(resumed.read(), self.get(format="csv"))
+        self.assertFalse(os.path.exists(path + ".checkpoint"))
+
+
+class ImportDataTests(TestCase):
+    def setUp(self):
+        tenancy.slug_cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.path = os.path.join(directory, "source.ndjson")
+
+    def write(self, records):
+        with open(self.path, "w") as source:
+            source.writelines(json.dumps(record) + "\n" for record in records)
+
+    def run_import(self, *args, **options):
+        out = StringIO()
+        call_command("import_data", self.path, *args, organization="beta", stdout=out, **options)
+        return out.getvalue()
+
+    def test_round_trip_of_an_export(self):
+        acme = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        for name in ("Board", "Roadmap"):
+            make_tasks(Project.objects.create(organization=acme, name=name, slug=name.lower()), 3, 2)
+        old = timezone.now() - timedelta(days=400)
+        TaskComment.objects.filter(task__project__slug="board").update(timestamp=old)
+        call_command("export_organization", "acme", output=self.path, stderr=StringIO())
+
+        output = self.run_import(create_organization="ops@beta.test", chunk_size=4)
+
+        self.assertIn("Imported 2 projects, 6 tasks and 12 comments into beta", output)
+        self.assertIn("rows/s", output)
+        beta = Organization.objects.get(slug="beta")
+        self.assertEqual(
+            sorted(Project.objects.filter(organization=beta).values_list("slug", flat=True)), ["board", "roadmap"],
+        )
+        comments = TaskComment.objects.filter(task__project__organization=beta)
+        self.assertEqual(comments.count(), 12)
+        self.assertEqual(comments.filter(timestamp=old, task__project__slug="board").count(), 6)
+        beta_projects = Project.objects.filter(organization=beta).values_list("id", flat=True)
+        self.assertEqual(rebuild_task_counts(beta_projects, dry_run=True), {})
+
+    def test_resumes_after_a_failed_chunk(self):
+        Organization.objects.create(name="Beta", slug="beta", contact_email="ops@beta.test")
+        records = [
+            {"type": "project", "id": "p1", "name": "Board"},
+            {"type": "task", "id": "t1", "project_id": "p1", "title": "a"},
+            {"type": "task", "id": "t2", "project_id": "p1", "title": "b", "status": "WAITING"},
+            {"type": "comment", "task_id": "t1", "content": "hi", "author_email": "a@beta.test"},
+        ]
+        self.write(records)
+        with self.assertRaisesMessage(CommandError, "invalid task status 'WAITING'"):
+            self.run_import(chunk_size=2)
+        self.assertEqual(ImportRun.objects.get().position, 2)
+        with self.assertRaisesMessage(CommandError, "pass --resume"):
+            self.run_import(chunk_size=2)
+
+        records[2]["status"] = "DONE"
+        self.write(records)
+        self.assertIn("Imported 1 projects, 2 tasks and 1 comments", self.run_import(chunk_size=2, resume=True))
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(TaskComment.objects.get().task.title, "a")
+        self.assertEqual(ProjectTaskCounts.objects.get().done_count, 1)
+
+    def test_comments_are_inserted_with_their_timestamps(self):
+        org = Organization.objects.create(name="Beta", slug="beta", contact_email="ops@beta.test")
+        records = [
+            {"type": "project", "id": "p1", "name": "Board"},
+            {"type": "task", "id": "t1", "project_id": "p1", "title": "a"},
+        ] + [
+            {"type": "comment", "task_id": "t1", "content": f"c{i}", "author_email": "a@beta.test",
+             "timestamp": f"2024-01-{i + 1:02d}T12:00:00+00:00"}
+            for i in range(20)
+        ]
+        self.write(records)
+        with CaptureQueriesContext(connection) as captured:
+            self.run_import(no_copy=True)
+        # the timestamps go into the INSERT: no UPDATE per row afterwards
+        self.assertFalse([q for q in captured.captured_queries if q["sql"].startswith('UPDATE "core_taskcomment"')])
+        self.assertEqual(
+            [comment.timestamp.day for comment in TaskComment.objects.filter(task__project__organization=org)],
+            list(range(1, 21)),
+        )
+
+
+class ActivityTests(GraphQLClientMixin, TestCase):
+    QUERY = """
+    query($project: String, $after: String) {
+      activity(organizationSlug: "acme", projectSlug: $project, first: 2, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        edges { node { action projectId taskId changes } }
+      }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.graphql_query("""
+        mutation {
+          createProject(organizationSlug: "acme", name: "Board", description: "", status: "ACTIVE") { project { id } }
+          other: createProject(organizationSlug: "acme", name: "Other", description: "", status: "ACTIVE") {
+            project { id }
+          }
+        }
+        """)
+        self.task_id = int(self.graphql_query("""
+        mutation { createTask(organizationSlug: "acme", projectSlug: "board", title: "Write", description: "",
+                              status: "TODO", assigneeEmail: "ann@acme.test") { task { id } } }
+        """).json()["data"]["createTask"]["task"]["id"])
+        self.graphql_query("""
+        mutation($id: ID!) {
+          updateTask(organizationSlug: "acme", projectSlug: "board", taskId: $id, status: "DONE",
+                     assigneeEmail: "bob@acme.test", title: "Write") { task { id } }
+        }
+        """, {"id": self.task_id})
+        self.graphql_query("""
+        mutation($id: Int!) {
+          createTaskComment(organizationSlug: "acme", projectSlug: "board", taskId: $id, content: "Done",
+                            authorEmail: "bob@acme.test") { comment { id } }
+        }
+        """, {"id": self.task_id})
+
+    def feed(self, project=None):
+        pages, after = [], None
+        while True:
+            connection = self.graphql_query(self.QUERY, {"project": project, "after": after}).json()["data"]["activity"]
+            pages.append(nodes(connection))
+            if not connection["pageInfo"]["hasNextPage"]:
+                return pages
+            after = connection["pageInfo"]["endCursor"]
+
+    def test_project_feed_newest_first(self):
+        pages = self.feed("board")
+
+        self.assertEqual(
+            [[event["action"] for event in page] for page in pages],
+            [["comment.created", "task.updated"], ["task.created", "project.created"]],
+        )
+        update = pages[0][1]
+        self.assertEqual(update["taskId"], self.task_id)
+        # only the fields that changed, as [old, new]
+        self.assertEqual(json.loads(update["changes"]), {
+            "assignee_email": ["ann@acme.test", "bob@acme.test"], "status": ["TODO", "DONE"],
+        })
+
+    def test_organization_feed_includes_every_project(self):
+        actions = [event["action"] for page in self.feed() for event in page]
+        self.assertEqual(actions.count("project.created"), 2)
+        self.assertEqual(len(actions), 5)
+
+    def test_signup_records_a_new_organization_once(self):
+        signup = """
+        mutation($username: String!) {
+          signup(username: $username, password: "secret", organizationName: "Globex") { organization }
+        }
+        """
+        self.graphql_query(signup, {"username": "ann"})
+        self.graphql_query(signup, {"username": "bob"})
+        events = ActivityEvent.objects.filter(action="organization.created")
+        self.assertEqual(
+            [(event.organization.name, event.changes) for event in events], [("Globex", {"name": "Globex"})]
+        )
+
+
+class SelectionProjectionTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        make_tasks(Project.objects.create(organization=org, name="Board", slug="board"), 4)
+        self.graphql_query('query { project(organizationSlug: "acme", projectSlug: "board") { id } }')
+
+    def task_selects(self, query):
+        with CaptureQueriesContext(connection) as captured:
+            data = self.graphql_query(query).json()["data"]
+        selects = [q["sql"] for q in captured.captured_queries if 'FROM "core_task"' in q["sql"]]
+        return data, selects
+
+    def test_only_selected_columns_are_loaded(self):
+        data, (sql,) = self.task_selects(
+            'query { tasks(organizationSlug: "acme", projectSlug: "board") { edges { node { id title } } } }'
+        )
+        self.assertEqual(len(nodes(data["tasks"])), 4)
+        self.assertIn('"core_task"."title"', sql)
+        self.assertNotIn('"core_task"."description"', sql)
+
+        _, (sql,) = self.task_selects("""
+        query { tasks(organizationSlug: "acme", projectSlug: "board") { edges { node { ...Details } } } }
+        fragment Details on TaskType { ... on TaskType { description } }
+        """)
+        self.assertIn('"core_task"."description"', sql)
+
+    def test_selected_relations_are_joined(self):
+        query = """
+        query { tasks(organizationSlug: "acme", projectSlug: "board") {
+          edges { node { title project { name taskCount } } }
+        } }
+        """
+        with self.assertNumQueries(1):
+            data, (sql,) = self.task_selects(query)
+        self.assertEqual({node["project"]["name"] for node in nodes(data["tasks"])}, {"Board"})
+        self.assertIn("JOIN", sql)
+        self.assertNotIn('"core_project"."description"', sql)
+
+    def test_nested_connections_are_projected(self):
+        _, (sql,) = self.task_selects("""
+        query { projects(organizationSlug: "acme") { edges { node { tasks { edges { node { status } } } } } } }
+        """)
+        self.assertNotIn('"core_task"."description"', sql)
+        self.assertNotIn('"core_task"."title"', sql)
+
+
+class CommentThreadTests(GraphQLClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=org, name="Board", slug="board")
+        make_tasks(self.project, 3, comments_per_task=2)
+        self.graphql_query('query { project(organizationSlug: "acme", projectSlug: "board") { id } }')
+
+    def test_comment_counts_are_batched(self):
+        query = """
+        query { tasks(organizationSlug: "acme", projectSlug: "board") { edges { node { title commentCount } } } }
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = self.graphql_query(query)
+        self.assertEqual([node["commentCount"] for node in nodes(response.json()["data"]["tasks"])], [2, 2, 2])
+        # the tasks, then one grouped count; no comment bodies are read
+        self.assertEqual(len(captured.captured_queries), 2)
+        self.assertNotIn('"core_taskcomment"."content"', captured.captured_queries[1]["sql"])
+
+        make_tasks(self.project, 5, comments_per_task=1)
+        with self.assertNumQueries(2):
+            response = self.graphql_query(query)
+        self.assertEqual(
+            [node["commentCount"] for node in nodes(response.json()["data"]["tasks"])], [2, 2, 2, 1, 1, 1, 1, 1]
+        )
+
+    def test_newest_first_pages(self):
+        task = Task.objects.filter(project=self.project).first()
+        for i in range(3):
+            TaskComment.objects.create(task=task, content=f"Later {i}", author_email="a@example.com")
+        query = """
+        query($after: String) { tasks(organizationSlug: "acme", projectSlug: "board", first: 1) { edges { node {
+          comments(first: 2, after: $after, order: NEWEST_FIRST) {
+            edges { node { content } } pageInfo { endCursor hasNextPage }
+          }
+        } } } }
+        """
+        seen, after = [], None
+        while True:
+            comments = nodes(self.graphql_query(query, {"after": after}).json()["data"]["tasks"])[0]["comments"]
+            seen += [node["content"] for node in nodes(comments)]
+            if not comments["pageInfo"]["hasNextPage"]:
+                break
+            after = comments["pageInfo"]["endCursor"]
+        self.assertEqual(seen, ["Later 2", "Later 1", "Later 0", "Comment 1", "Comment 0"])
+
+
+class ProjectDeletionTests(GraphQLClientMixin, TestCase):
+    DELETE = """
+    mutation($id: ID!) {
+      deleteProject(organizationSlug: "acme", projectId: $id) { success deletion { taskCount progress } }
+    }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Acme", slug="acme", contact_email="ops@acme.test")
+        self.project = Project.objects.create(organization=self.org, name="Board", slug="board")
+        make_tasks(self.project, 3, comments_per_task=2)
+        Task.objects.create(project=self.project, title="Needle", status="TODO")
+        rebuild_task_counts()
+        self.other = Project.objects.create(organization=self.org, name="Other", slug="other")
+        make_tasks(self.other, 1, comments_per_task=1)
+
+    def delete_project(self):
+        return self.graphql_query(self.DELETE, {"id": self.project.id}).json()["data"]["deleteProject"]
+
+    def test_deleted_project_is_hidden_at_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.delete_project()
+        self.assertEqual(result, {"success": True, "deletion": {"taskCount": 4, "progress": 0.0}})
+        # nothing is purged in the request
+        self.assertEqual(Task.objects.filter(project_id=self.project.id).count(), 4)
+
+        body = self.graphql_query("""
+        query {
+          project(organizationSlug: "acme", projectSlug: "board") { id }
+          projects(organizationSlug: "acme") { edges { node { slug } } }
+          search(organizationSlug: "acme", text: "needle") { edges { node { kind } } }
+        }
+        """).json()
+        self.assertEqual(body["errors"][0]["message"], "Project not found.")
+        self.assertEqual([node["slug"] for node in nodes(body["data"]["projects"])], ["other"])
+        self.assertEqual(nodes(body["data"]["search"]), [])
+        self.assertEqual([project["slug"] for project in stats.compute_stats(self.org.id)["projects"]], ["other"])
+        self.assertEqual({kind for kind, _ in export.records(self.org.id)}, {"project", "task", "comment"})
+        self.assertEqual(
+            {row["id"] for kind, row in export.records(self.org.id) if kind == "project"}, {self.other.id}
+        )
+        # the slug is free for a new project straight away
+        self.assertEqual(Project.objects.create(organization=self.org, name="Board").slug, "board")
+
+    def test_purge_runs_in_chunks_and_reports_progress(self):
+        self.delete_project()
+        project_deletion = ProjectDeletion.objects.get(project_id=self.project.id)
+
+        self.assertTrue(deletion.purge_chunk(project_deletion, 4))
+        self.assertEqual((project_deletion.comments_purged, project_deletion.tasks_purged), (4, 0))
+        self.assertEqual(TaskComment.objects.filter(task__project=self.project).count(), 2)
+
+        call_command("purge_deleted_projects", chunk_size=3, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Project.all_objects.filter(id=self.project.id).exists())
+        self.assertFalse(Task.objects.filter(project_id=self.project.id).exists())
+        self.assertEqual(TaskComment.objects.filter(task__project=self.other).count(), 1)
+
+        progress = self.graphql_query("""
+        query($id: ID!) {
+          projectDeletion(organizationSlug: "acme", projectId: $id) { tasksPurged commentsPurged progress finishedAt }
+        }
+        """, {"id": self.project.id}).json()["data"]["projectDeletion"]
+        self.assertEqual((progress["tasksPurged"], progress["commentsPurged"], progress["progress"]), (4, 6, 1.0))
+        self.assertIsNotNone(progress["finishedAt"])
+
+    def test_purge_is_left_to_the_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delete_project()
+        self.assertEqual(Task.objects.filter(project_id=self.project.id).count(), 4)
+
+        other_counts = ProjectTaskCounts.objects.filter(project=self.other).values().get()
+        call_command("purge_deleted_projects", stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Task.objects.filter(project_id=self.project.id).exists())
+        self.assertFalse(ProjectTaskCounts.objects.filter(project_id=self.project.id).exists())
+        self.assertEqual(ProjectTaskCounts.objects.filter(project=self.other).values().get(), other_counts)
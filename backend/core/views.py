@@ -39,11 +39,28 @@
 #         return JsonResponse({"isAuthenticated": False})
 #     return JsonResponse({"username":request.user.username})
 
+from collections import namedtuple
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, logout
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.db import connection, transaction
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView as BaseGraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, validate
 import json
 
+from core.complexity import get_query_limits, query_cost_validator
+from core import export, instrumentation, response_cache, tenancy
+from core.persisted_queries import get_persisted_query_hash, load_document, query_hash
+
 @csrf_exempt
 def login_view(request):
     if request.method == "POST":
@@ -82,3 +99,310 @@ def me_view(request):
             }
         })
     return JsonResponse({"user": None})
+
+
+def export_view(request, organization_slug):
+    """
+    GET: stream the organization's data (``?format=ndjson|csv``, ``?after=<checkpoint>``
+    to resume; see core/export.py). Staff and members of the organization only.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "GET required"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    org_id = tenancy.organization_id(request, organization_slug)
+    if org_id is None:
+        return JsonResponse({"error": "Organization not found"}, status=404)
+    if not request.user.is_staff and request.user.organization_id != org_id:
+        return JsonResponse({"error": "Not allowed"}, status=403)
+    export_format, after = request.GET.get("format", "ndjson"), request.GET.get("after") or None
+    if export_format not in export.FORMATS:
+        return JsonResponse({"error": f"format must be one of {', '.join(export.FORMATS)}"}, status=400)
+    if after:
+        try:
+            export.parse_checkpoint(after)
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+    response = StreamingHttpResponse(
+        (text for text, _ in export.chunks(org_id, export_format, after, header=after is None)),
+        content_type=export.CONTENT_TYPES[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{organization_slug}.{export_format}"'
+    return response
+
+
+# a validated operation ready to execute (see GraphQLView.prepare_operation)
+PreparedOperation = namedtuple("PreparedOperation", "document operation_ast cache_key options")
+
+
+def operation_name(prepared):
+    operation_ast = prepared.operation_ast
+    return operation_ast.name.value if operation_ast is not None and operation_ast.name else None
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQLView with persisted queries, per-tenant query budgets and an
+    opt-in response cache.
+
+    Documents are looked up by sha256 (sent by the client as an Apollo
+    persisted query, or computed from the query text) in a process-wide LRU,
+    so parsing and schema validation only happen on a miss. Operations are
+    then measured and rejected when they exceed the organization's depth or
+    cost limit; the measured cost is returned under ``extensions.cost``.
+    Tenant-scoped read queries are served from ``core.response_cache`` when
+    it is enabled (``extensions.responseCache`` says HIT or MISS).
+    Staff and debug requests get resolver and SQL timings from
+    ``core.instrumentation`` in ``extensions.trace`` and ``Server-Timing``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.trace = None
+        return self.add_server_timing(super().dispatch(request, *args, **kwargs))
+
+    def add_server_timing(self, response):
+        if self.trace is not None and not self.batch:
+            response["Server-Timing"] = self.trace.server_timing()
+        return response
+
+    def get_middleware(self, request):
+        middleware = super().get_middleware(request)
+        if instrumentation.enabled(request):
+            return [*(middleware or ()), instrumentation.InstrumentationMiddleware()]
+        return middleware
+
+    def get_validation_rules(self, request, variables, operation_name):
+        # per-request rules only; specified rules ran when the document was cached
+        limits = get_query_limits(request)
+        return (
+            query_cost_validator(
+                limits["max_depth"],
+                limits["max_cost"],
+                variables=variables,
+                operation_name=operation_name,
+                callback=lambda measured: self.extensions.update(cost=measured),
+            ),
+        )
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        self.extensions = {}
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return self.build_response(request, execution_result, id, show_graphiql)
+
+    def build_response(self, request, execution_result, id, show_graphiql=False):
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if not execution_result:
+            return None, status_code
+
+        response = {}
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        if self.extensions:
+            response["extensions"] = self.extensions
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response, pretty=show_graphiql), status_code
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        prepared = self.prepare_operation(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+        return self.execute_prepared(request, prepared)
+
+    def prepare_operation(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Everything before execution: document lookup, the GET-mutation
+        check, the per-request budget and the response cache. Returns a
+        PreparedOperation, or the final ExecutionResult (None for GraphiQL).
+        """
+        sha256_hash = get_persisted_query_hash(data)
+        if not query and not sha256_hash:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        document_hash = sha256_hash or query_hash(query)
+        document, errors = load_document(schema, query or None, sha256_hash)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        validation_rules = self.get_validation_rules(request, variables, operation_name)
+        validation_errors = validate(schema, document, validation_rules)
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        cache_key = self.get_cache_key(document_hash, operation_ast, operation_name, variables)
+        if cache_key is not None:
+            data = response_cache.get_response(cache_key)
+            self.extensions["responseCache"] = "HIT" if data is not None else "MISS"
+            if data is not None:
+                return ExecutionResult(data=data)
+
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return PreparedOperation(document, operation_ast, cache_key, execute_options)
+
+    def execute_prepared(self, request, prepared):
+        with instrumentation.tracing(request, operation_name(prepared)) as trace:
+            result = self._execute_prepared(request, prepared)
+        self.report_trace(request, trace)
+        return result
+
+    def _execute_prepared(self, request, prepared):
+        schema = self.schema.graphql_schema
+        try:
+            if (
+                prepared.operation_ast is not None
+                and prepared.operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, prepared.document, **prepared.options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            result = execute(schema, prepared.document, **prepared.options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        if prepared.cache_key is not None and not result.errors:
+            response_cache.set_response(prepared.cache_key, result.data)
+        return result
+
+    def report_trace(self, request, trace):
+        if trace is not None and instrumentation.exposed(request):
+            self.trace = trace
+            self.extensions["trace"] = trace.report()
+
+    def get_cache_key(self, document_hash, operation_ast, operation_name, variables):
+        if not response_cache.get_config()["ENABLED"]:
+            return None
+        scope = response_cache.cache_scope(operation_ast, variables)
+        if scope is None:
+            return None
+        return response_cache.cache_key(document_hash, operation_name, variables, scope)
+
+
+class AsyncGraphQLView(GraphQLView):
+    """
+    GraphQLView for the ASGI entry point.
+
+    Queries execute on the event loop: ``core.queries`` resolvers see
+    ``request.graphql_async`` and return awaitables backed by the async
+    ORM and asyncio DataLoaders, so a request waiting on the database does
+    not hold a worker thread. Preparation (document cache, budget, response
+    cache) and mutations use the synchronous ORM and run via sync_to_async,
+    as do GraphiQL and batched requests.
+    """
+
+    view_is_async = True
+
+    @method_decorator(ensure_csrf_cookie)
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            if self.batch or (self.graphiql and self.can_display_graphiql(request, data)):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            self.trace = None
+            result, status_code = await self.aget_response(request, data)
+            return self.add_server_timing(
+                HttpResponse(status=status_code, content=result, content_type="application/json")
+            )
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        self.extensions = {}
+
+        prepared = await sync_to_async(self.prepare_operation)(
+            request, data, query, variables, operation_name
+        )
+        if not isinstance(prepared, PreparedOperation):
+            execution_result = prepared
+        elif prepared.operation_ast is not None and prepared.operation_ast.operation == OperationType.QUERY:
+            execution_result = await self.aexecute_prepared(request, prepared)
+        else:
+            # mutations write through the synchronous ORM
+            execution_result = await sync_to_async(self.execute_prepared)(request, prepared)
+        return self.build_response(request, execution_result, id)
+
+    async def aexecute_prepared(self, request, prepared):
+        request.graphql_async = True
+        with instrumentation.tracing(request, operation_name(prepared)) as trace:
+            try:
+                result = execute(self.schema.graphql_schema, prepared.document, **prepared.options)
+                if isawaitable(result):
+                    result = await result
+            except Exception as e:
+                result = ExecutionResult(errors=[e])
+        self.report_trace(request, trace)
+
+        if prepared.cache_key is not None and not result.errors:
+            await sync_to_async(response_cache.set_response)(prepared.cache_key, result.data)
+        return result
@@ -0,0 +1,224 @@
+import asyncio
+import json
+from contextlib import aclosing
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, subscribe, validate
+
+from core.broker import get_config
+from core.complexity import get_query_limits, query_cost_validator
+from core.persisted_queries import get_persisted_query_hash, load_document
+
+# https://github.com/enisdenjo/graphql-ws/blob/master/PROTOCOL.md
+PROTOCOL = "graphql-transport-ws"
+
+
+class WebSocketContext:
+    """
+    Stands in for the Django request as ``info.context`` of one WebSocket
+    operation (resolvers and ``core.tenancy`` keep per-request state on it).
+    """
+
+    def __init__(self, scope, user, connection_params):
+        self.scope = scope
+        self.user = user
+        self.connection_params = connection_params
+
+
+def header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key.decode("latin1").lower() == name:
+            return value.decode("latin1")
+    return None
+
+
+def origin_allowed(scope):
+    # browsers send cookies on cross-site WebSocket handshakes; only accept
+    # the origins the HTTP API already allows
+    origin = header(scope, "origin")
+    if origin is None:
+        return True
+    if origin in getattr(settings, "CORS_ALLOWED_ORIGINS", ()):
+        return True
+    return urlsplit(origin).netloc == header(scope, "host")
+
+
+def get_user(scope):
+    """The session user from the handshake's cookies, as AuthenticationMiddleware would."""
+    request = HttpRequest()
+    cookies = parse_cookie(header(scope, "cookie") or "")
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    request.session = session_store(cookies.get(settings.SESSION_COOKIE_NAME))
+    return auth.get_user(request)
+
+
+class GraphQLWebSocket:
+    """
+    One ``graphql-transport-ws`` connection.
+
+    Subscriptions run as tasks on the connection's event loop and stream
+    ``next`` messages until the source ends or the client sends
+    ``complete``. Queries and mutations are accepted too and run in a
+    worker thread, since resolvers use the synchronous ORM. Documents go
+    through the same persisted-document cache and cost budget as HTTP.
+    """
+
+    def __init__(self, schema, scope, receive, send):
+        self.schema = schema
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.operations = {}
+        self.user = None
+        self.connection_params = None
+        self.closed = False
+
+    async def send(self, message):
+        async with self._send_lock:
+            if not self.closed:
+                await self._send(message)
+
+    async def send_json(self, payload):
+        await self.send({"type": "websocket.send", "text": json.dumps(payload)})
+
+    async def close(self, code, reason=""):
+        await self.send({"type": "websocket.close", "code": code, "reason": reason})
+        self.closed = True
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", ()) or not origin_allowed(self.scope):
+            # closing before accepting rejects the handshake
+            await self.close(4406, "Subprotocol not acceptable")
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+
+        init_timeout = asyncio.ensure_future(self.close_unless_initialised())
+        try:
+            while not self.closed:
+                message = await self.receive()
+                if message["type"] == "websocket.disconnect":
+                    self.closed = True
+                elif message["type"] == "websocket.receive":
+                    await self.handle(message.get("text") or message.get("bytes") or "")
+        finally:
+            init_timeout.cancel()
+            for operation in self.operations.values():
+                operation.cancel()
+
+    async def close_unless_initialised(self):
+        await asyncio.sleep(get_config()["CONNECTION_INIT_TIMEOUT"])
+        if self.user is None:
+            await self.close(4408, "Connection initialisation timeout")
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            kind = message["type"]
+        except (ValueError, TypeError, KeyError):
+            return await self.close(4400, "Invalid message received")
+
+        if kind == "connection_init":
+            if self.user is not None:
+                return await self.close(4429, "Too many initialisation requests")
+            self.connection_params = message.get("payload") or {}
+            self.user = await sync_to_async(get_user)(self.scope)
+            await self.send_json({"type": "connection_ack"})
+        elif kind == "ping":
+            await self.send_json({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "subscribe":
+            if self.user is None:
+                return await self.close(4401, "Unauthorized")
+            operation_id = message.get("id")
+            if operation_id in self.operations:
+                return await self.close(4409, f"Subscriber for {operation_id} already exists")
+            self.operations[operation_id] = asyncio.ensure_future(
+                self.run_operation(operation_id, message.get("payload") or {})
+            )
+        elif kind == "complete":
+            operation = self.operations.pop(message.get("id"), None)
+            if operation is not None:
+                operation.cancel()
+        else:
+            await self.close(4400, f"Unexpected message type {kind!r}")
+
+    async def run_operation(self, operation_id, payload):
+        try:
+            result = await self.execute(payload)
+            if isinstance(result, ExecutionResult):
+                await self.send_json({"id": operation_id, "type": "next", "payload": result.formatted})
+            else:
+                async with aclosing(result) as stream:
+                    async for event in stream:
+                        await self.send_json({"id": operation_id, "type": "next", "payload": event.formatted})
+            await self.send_json({"id": operation_id, "type": "complete"})
+        except OperationError as error:
+            # the operation never started; a single ``error`` ends it
+            await self.send_json({
+                "id": operation_id, "type": "error",
+                "payload": [e.formatted for e in error.errors],
+            })
+        finally:
+            self.operations.pop(operation_id, None)
+
+    async def execute(self, payload):
+        query = payload.get("query")
+        variables = payload.get("variables")
+        operation_name = payload.get("operationName")
+        schema = self.schema.graphql_schema
+
+        document, errors = load_document(schema, query, get_persisted_query_hash(payload))
+        if errors:
+            raise OperationError(errors)
+
+        context = WebSocketContext(self.scope, self.user, self.connection_params)
+        limits = await sync_to_async(get_query_limits)(context)
+        errors = validate(schema, document, [
+            query_cost_validator(
+                limits["max_depth"], limits["max_cost"],
+                variables=variables, operation_name=operation_name,
+            ),
+        ])
+        if errors:
+            raise OperationError(errors)
+
+        options = {
+            "context_value": context,
+            "variable_values": variables,
+            "operation_name": operation_name,
+        }
+        operation = get_operation_ast(document, operation_name)
+        if operation is None or operation.operation != OperationType.SUBSCRIPTION:
+            return await sync_to_async(execute)(schema, document, **options)
+
+        stream = await subscribe(schema, document, **options)
+        if isinstance(stream, ExecutionResult):
+            # the subscribe resolver failed (e.g. unknown project)
+            raise OperationError(stream.errors)
+        return stream
+
+
+class OperationError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def graphql_ws_application(schema):
+    """ASGI application serving ``schema`` over ``graphql-transport-ws``."""
+
+    async def application(scope, receive, send):
+        await GraphQLWebSocket(schema, scope, receive, send).run()
+
+    return application
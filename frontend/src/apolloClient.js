@@ -1,11 +1,31 @@
-import { ApolloClient, InMemoryCache, createHttpLink } from "@apollo/client";
+import { ApolloClient, InMemoryCache, createHttpLink, split } from "@apollo/client";
 import { onError } from "@apollo/client/link/error";
+import { createPersistedQueryLink } from "@apollo/client/link/persisted-queries";
+import { GraphQLWsLink } from "@apollo/client/link/subscriptions";
+import { getMainDefinition } from "@apollo/client/utilities";
+import { createClient } from "graphql-ws";
 
 const httpLink = createHttpLink({
   uri: "http://localhost:8000/graphql/",
   credentials: "include",
 });
 
+async function sha256(query) {
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(query));
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+// Send only the query hash; the server asks for the full text on a cache miss.
+const persistedQueryLink = createPersistedQueryLink({ sha256 });
+
+// Subscriptions go over a WebSocket to the ASGI server (config/asgi.py);
+// the session cookie authenticates the handshake.
+const wsLink = new GraphQLWsLink(
+  createClient({ url: "ws://localhost:8000/graphql/", lazy: true })
+);
+
 const errorLink = onError(({ graphQLErrors, networkError }) => {
   if (graphQLErrors)
     graphQLErrors.forEach(({ message }) => {
@@ -14,23 +34,44 @@ const errorLink = onError(({ graphQLErrors, networkError }) => {
   if (networkError) console.error(`[Network error]: ${networkError}`);
 });
 
+// One cached list per keyArgs: a page fetched with `after` (fetchMore) is
+// appended to it, a first page (a refetch) replaces it.
+function cursorPage(keyArgs) {
+  return {
+    keyArgs,
+    merge(existing, incoming, { args }) {
+      if (!existing || !args?.after) return { ...existing, ...incoming };
+      const merged = [...existing.edges, ...incoming.edges];
+      const unique = Array.from(
+        new Map(merged.map((edge) => [edge.node.__ref, edge])).values()
+      );
+      return { ...incoming, edges: unique };
+    },
+  };
+}
+
 export const client = new ApolloClient({
-  link: errorLink.concat(httpLink),
+  link: split(
+    ({ query }) => {
+      const definition = getMainDefinition(query);
+      return definition.kind === "OperationDefinition" && definition.operation === "subscription";
+    },
+    errorLink.concat(wsLink),
+    errorLink.concat(persistedQueryLink).concat(httpLink)
+  ),
   cache: new InMemoryCache({
     typePolicies: {
+      Query: {
+        fields: {
+          projects: cursorPage(["organizationSlug"]),
+          tasks: cursorPage(["organizationSlug", "projectSlug"]),
+        },
+      },
       TaskType: {
         fields: {
-          comments: {
-            merge(existing = [], incoming = []) {
-              const merged = [...existing, ...incoming];
-              const unique = Array.from(
-                new Map(merged.map((c) => [c.__ref, c])).values()
-              );
-              return unique;
-            },
-          },
+          comments: cursorPage(["order", "includeArchived"]),
         },
       },
     },
   }),
-});
\ No newline at end of file
+});
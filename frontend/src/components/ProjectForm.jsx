@@ -57,19 +57,6 @@ const UPDATE_PROJECT = gql`
   }
 `;
 
-const PROJECTS_QUERY = gql`
-  query Projects($organizationSlug: String!) {
-    projects(organizationSlug: $organizationSlug) {
-      id
-      name
-      slug
-      description
-      status
-      dueDate
-    }
-  }
-`;
-
 export default function ProjectForm({ organizationSlug, project, onClose }) {
   const [name, setName] = useState(project?.name || "");
   const [description, setDescription] = useState(project?.description || "");
@@ -78,16 +65,17 @@ export default function ProjectForm({ organizationSlug, project, onClose }) {
 
   const [createProject, { loading: creating, error: createError }] = useMutation(CREATE_PROJECT, {
   update: (cache, { data: { createProject } }) => {
-    const newProject = createProject.project;
-    const existing = cache.readQuery({
-      query: PROJECTS_QUERY,
-      variables: { organizationSlug: organizationSlug },
-    });
-    cache.writeQuery({
-      query: PROJECTS_QUERY,
-      variables: { organizationSlug: organizationSlug },
-      data: {
-        projects: [...(existing?.projects || []), newProject],
+    cache.modify({
+      fields: {
+        projects(existing, { toReference }) {
+          return {
+            ...existing,
+            edges: [
+              ...(existing?.edges || []),
+              { __typename: "ProjectEdge", node: toReference(createProject.project) },
+            ],
+          };
+        },
       },
     });
   },
@@ -99,10 +87,13 @@ const [updateProject, { loading: updating, error: updateError }] = useMutation(U
     const updatedRef = cache.identify(updated);
     cache.modify({
       fields: {
-        projects(existingRefs = [], { readField }) {
-          return existingRefs.map((projRef) =>
-            readField("id", projRef) === updated.id ? {__ref: updatedRef} : projRef
-          );
+        projects(existing, { readField }) {
+          return {
+            ...existing,
+            edges: (existing?.edges || []).map((edge) =>
+              readField("id", edge.node) === updated.id ? { ...edge, node: { __ref: updatedRef } } : edge
+            ),
+          };
         },
       },
     });
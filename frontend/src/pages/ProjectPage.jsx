@@ -6,14 +6,22 @@ import { Link } from "react-router-dom";
 import { motion, AnimatePresence } from "framer-motion"; 
 
 const PROJECTS_QUERY = gql`
-  query Projects($organizationSlug: String!) {
-    projects(organizationSlug: $organizationSlug) {
-      id
-      name
-      slug
-      description
-      status
-      dueDate
+  query Projects($organizationSlug: String!, $after: String) {
+    projects(organizationSlug: $organizationSlug, first: 100, after: $after) {
+      edges {
+        node {
+          id
+          name
+          slug
+          description
+          status
+          dueDate
+        }
+      }
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
     }
   }
 `;
@@ -27,7 +35,7 @@ const DELETE_PROJECT = gql`
 
 export default function ProjectsPage({ organizationSlug }) {
   const { user } = useAuth();
-  const { data, loading, error, refetch } = useQuery(PROJECTS_QUERY, {
+  const { data, loading, error, refetch, fetchMore } = useQuery(PROJECTS_QUERY, {
     variables: { organizationSlug: user?.organization?.slug || "" },
     skip: !user,
   });
@@ -39,7 +47,7 @@ export default function ProjectsPage({ organizationSlug }) {
   if (loading) return <p>Loading...</p>;
   if (error) return <p className="text-red-500">{error.message}</p>;
 
-  const projects = data?.projects || [];
+  const projects = data?.projects?.edges.map((edge) => edge.node) || [];
 
   const statusColors = {
     ACTIVE: "bg-green-100 text-green-800",
@@ -147,11 +155,14 @@ return (
                             if (data?.deleteProject?.success) {
                               cache.modify({
                                 fields: {
-                                  projects(existingProjects = [], { readField }) {
-                                    return existingProjects.filter(
-                                      (projRef) =>
-                                        readField("id", projRef) !== project.id
-                                    );
+                                  projects(existing, { readField }) {
+                                    return {
+                                      ...existing,
+                                      edges: (existing?.edges || []).filter(
+                                        (edge) =>
+                                          readField("id", edge.node) !== project.id
+                                      ),
+                                    };
                                   },
                                 },
                               });
@@ -172,6 +183,15 @@ return (
           ))}
         </AnimatePresence>
       </div>
+
+      {data?.projects?.pageInfo?.hasNextPage && (
+        <button
+          onClick={() => fetchMore({ variables: { after: data.projects.pageInfo.endCursor } })}
+          className="mt-6 w-full border rounded-lg py-2 text-sm text-blue-600 hover:bg-blue-50"
+        >
+          Load more projects
+        </button>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -4,26 +4,21 @@ import { useAuth } from "../context/AuthContext";
 import { motion } from "framer-motion";
 
 const GET_PROJECTS = gql`
-  query($organizationSlug: String!) {
-    projects(organizationSlug: $organizationSlug) {
-      id
-      name
-      description
-      taskCount 
-      completionRate
-    }
-  }
-`;
-
-const PROJECTS_QUERY = gql`
-  query Projects($organizationSlug: String!) {
-    projects(organizationSlug: $organizationSlug) {
-      id
-      name
-      slug
-      description
-      status
-      dueDate
+  query($organizationSlug: String!, $after: String) {
+    projects(organizationSlug: $organizationSlug, first: 100, after: $after) {
+      edges {
+        node {
+          id
+          name
+          description
+          taskCount
+          completionRate
+        }
+      }
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
     }
   }
 `;
@@ -66,23 +61,24 @@ export default function ProjectsDashboard() {
   });
   const [errors, setErrors] = useState({});
 
-  const { data, loading, error, refetch } = useQuery(GET_PROJECTS, {
+  const { data, loading, error, refetch, fetchMore } = useQuery(GET_PROJECTS, {
     variables: { organizationSlug: user?.organization?.slug || "" },
     skip: !user,
   });
 
   const [createProject, { loading: creating, error: createError }] = useMutation(CREATE_PROJECT, {
     update: (cache, { data: { createProject } }) => {
-      const newProject = createProject.project;
-      const existing = cache.readQuery({
-        query: PROJECTS_QUERY,
-        variables: { organizationSlug: user?.organization?.slug || "" },
-      });
-      cache.writeQuery({
-        query: PROJECTS_QUERY,
-        variables: { organizationSlug: user?.organization?.slug || "" },
-        data: {
-          projects: [...(existing?.projects || []), newProject],
+      cache.modify({
+        fields: {
+          projects(existing, { toReference }) {
+            return {
+              ...existing,
+              edges: [
+                ...(existing?.edges || []),
+                { __typename: "ProjectEdge", node: toReference(createProject.project) },
+              ],
+            };
+          },
         },
       });
     },
@@ -139,8 +135,8 @@ export default function ProjectsDashboard() {
         >
           Projects
         </motion.h2>
-        {data?.projects?.length ? (
-          data.projects.map((p) => (
+        {data?.projects?.edges.length ? (
+          data.projects.edges.map(({ node: p }) => (
             <motion.div
               key={p.id}
               initial={{ opacity: 0, y: 10 }}
@@ -174,6 +170,14 @@ export default function ProjectsDashboard() {
             No projects found.
           </motion.p>
         )}
+        {data?.projects?.pageInfo?.hasNextPage && (
+          <button
+            onClick={() => fetchMore({ variables: { after: data.projects.pageInfo.endCursor } })}
+            className="w-full border rounded-lg py-2 text-sm text-blue-600 hover:bg-blue-50"
+          >
+            Load more projects
+          </button>
+        )}
       </div>
 
       {/* Create Project Form */}
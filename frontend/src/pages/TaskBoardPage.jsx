@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { useQuery, useMutation, gql } from "@apollo/client";
 import { useAuth } from "../context/AuthContext";
 import { useParams } from "react-router-dom";
@@ -6,21 +6,64 @@ import { useApolloClient } from "@apollo/client";
 import { motion, AnimatePresence } from "framer-motion";
 
 const GET_TASKS = gql`
-  query GetTasks($organizationSlug: String!, $projectSlug: String!) {
-    tasks(organizationSlug: $organizationSlug, projectSlug: $projectSlug) {
-      id
-      title
-      description
-      status
-      assigneeEmail
-      comments {
+  query GetTasks($organizationSlug: String!, $projectSlug: String!, $after: String) {
+    tasks(organizationSlug: $organizationSlug, projectSlug: $projectSlug, first: 100, after: $after) {
+      edges {
+        node {
+          id
+          title
+          description
+          status
+          assigneeEmail
+          comments {
+            edges {
+              node {
+                id
+                content
+                authorEmail
+                timestamp
+                __typename
+              }
+            }
+          }
+          __typename
+        }
+      }
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+    }
+  }
+`;
+
+const TASK_CHANGED = gql`
+  subscription TaskChanged($organizationSlug: String!, $projectSlug: String!) {
+    taskChanged(organizationSlug: $organizationSlug, projectSlug: $projectSlug) {
+      action
+      task {
+        id
+        title
+        description
+        status
+        assigneeEmail
+        __typename
+      }
+    }
+  }
+`;
+
+const COMMENT_ADDED = gql`
+  subscription CommentAdded($organizationSlug: String!, $projectSlug: String!) {
+    commentAdded(organizationSlug: $organizationSlug, projectSlug: $projectSlug) {
+      taskId
+      comment {
         id
         content
         authorEmail
         timestamp
         __typename
       }
-      __typename
     }
   }
 `;
@@ -49,11 +92,15 @@ const CREATE_TASK = gql`
         status
         assigneeEmail
         comments {
-          id
-          content
-          authorEmail
-          timestamp
-          __typename
+          edges {
+            node {
+              id
+              content
+              authorEmail
+              timestamp
+              __typename
+            }
+          }
         }
         __typename
       }
@@ -90,13 +137,6 @@ const UPDATE_TASK = gql`
         status
         assigneeEmail
         dueDate
-        comments {
-          id
-          content
-          authorEmail
-          timestamp
-          __typename
-        }
         __typename
       }
       __typename
@@ -219,7 +259,7 @@ export default function TaskBoard() {
   const [commentContent, setCommentContent] = useState({});
   const [editingTask, setEditingTask] = useState(null);
 
-  const { data, loading, error } = useQuery(GET_TASKS, {
+  const { data, loading, error, subscribeToMore, fetchMore } = useQuery(GET_TASKS, {
     variables: {
       organizationSlug: user?.organization?.slug || "",
       projectSlug
@@ -227,6 +267,60 @@ export default function TaskBoard() {
     skip: !user || !projectSlug,
   });
 
+  // Live changes instead of refetching: updated tasks merge into the normalized
+  // TaskType entries on their own; new tasks and comments are appended here.
+  useEffect(() => {
+    if (!user?.organization?.slug || !projectSlug) return;
+    const variables = { organizationSlug: user.organization.slug, projectSlug };
+
+    const unsubscribeTasks = subscribeToMore({
+      document: TASK_CHANGED,
+      variables,
+      updateQuery: (prev, { subscriptionData }) => {
+        const event = subscriptionData.data?.taskChanged;
+        if (!event || event.action !== "CREATED" || !prev?.tasks) return prev;
+        if (prev.tasks.edges.some((edge) => edge.node.id === event.task.id)) return prev;
+        const node = {
+          ...event.task,
+          comments: { __typename: "TaskCommentConnection", edges: [] },
+        };
+        return {
+          ...prev,
+          tasks: { ...prev.tasks, edges: [...prev.tasks.edges, { __typename: "TaskEdge", node }] },
+        };
+      },
+    });
+
+    const unsubscribeComments = subscribeToMore({
+      document: COMMENT_ADDED,
+      variables,
+      updateQuery: (prev, { subscriptionData }) => {
+        const event = subscriptionData.data?.commentAdded;
+        if (!event || !prev?.tasks) return prev;
+        const edges = prev.tasks.edges.map((edge) => {
+          const comments = edge.node.comments;
+          if (
+            edge.node.id !== event.taskId ||
+            comments.edges.some((c) => c.node.id === event.comment.id)
+          ) {
+            return edge;
+          }
+          const commentEdge = { __typename: "TaskCommentEdge", node: event.comment };
+          return {
+            ...edge,
+            node: { ...edge.node, comments: { ...comments, edges: [...comments.edges, commentEdge] } },
+          };
+        });
+        return { ...prev, tasks: { ...prev.tasks, edges } };
+      },
+    });
+
+    return () => {
+      unsubscribeTasks();
+      unsubscribeComments();
+    };
+  }, [subscribeToMore, user?.organization?.slug, projectSlug]);
+
 
   const [createTask, { loading: creating }] = useMutation(CREATE_TASK, {
     optimisticResponse: {
@@ -238,21 +332,26 @@ export default function TaskBoard() {
           description: form.description,
           status: form.status,
           assigneeEmail: user.email || "",
-          comments: [],
+          comments: { __typename: "TaskCommentConnection", edges: [] },
           __typename: "TaskType",
         },
       },
     },
     update: (cache, { data: { createTask } }) => {
-      const existing = cache.readQuery({
-        query: GET_TASKS,
-        variables: { organizationSlug: user.organization.slug, projectSlug }
-      });
+      const variables = { organizationSlug: user.organization.slug, projectSlug };
+      const existing = cache.readQuery({ query: GET_TASKS, variables });
+      if (!existing) return;
       cache.writeQuery({
         query: GET_TASKS,
-        variables: { organizationSlug: user.organization.slug, projectSlug },
+        variables,
         data: {
-          tasks: [...(existing?.tasks || []), createTask.task],
+          tasks: {
+            ...existing.tasks,
+            edges: [
+              ...existing.tasks.edges,
+              { __typename: "TaskEdge", node: createTask.task },
+            ],
+          },
         },
       });
     },
@@ -274,7 +373,6 @@ export default function TaskBoard() {
           status: vars.status || "TODO",
           assigneeEmail: vars.assigneeEmail || "",
           dueDate: vars.dueDate || null,
-          comments: [],
         },
       },
     }),
@@ -316,8 +414,14 @@ export default function TaskBoard() {
       cache.modify({
         id: cache.identify({ id: taskId, __typename: "TaskType" }),
         fields: {
-          comments(existing = [], { toReference }) {
-            return [...existing, toReference(newComment)];
+          comments(existing, { toReference }) {
+            return {
+              ...existing,
+              edges: [
+                ...(existing?.edges || []),
+                { __typename: "TaskCommentEdge", node: toReference(newComment) },
+              ],
+            };
           },
         },
       });
@@ -385,6 +489,9 @@ export default function TaskBoard() {
 
 
 
+  const loadMore = () =>
+    fetchMore({ variables: { after: data.tasks.pageInfo.endCursor } });
+
   if (loading) return <p>Loading tasks...</p>;
   if (error) return <p className="text-red-500">Error: {error.message}</p>;
 
@@ -404,8 +511,9 @@ return (
         <h2 className="text-lg font-semibold mb-4">{status.replace("_", " ")}</h2>
         <div className="space-y-3">
           <AnimatePresence>
-            {data?.tasks
-              ?.filter((t) => t.status === status)
+            {data?.tasks?.edges
+              .map((edge) => edge.node)
+              .filter((t) => t.status === status)
               .map((task) => (
                 <motion.div
                   key={task.id}
@@ -444,7 +552,7 @@ return (
                     <h4 className="font-semibold text-xs">Comments</h4>
                     <div className="space-y-1">
                       <AnimatePresence>
-                        {task.comments?.map((c) => (
+                        {task.comments?.edges.map(({ node: c }) => (
                           <motion.p
                             key={c.id}
                             className="text-xs text-gray-700"
@@ -534,5 +642,14 @@ return (
         )}
       </AnimatePresence>
     </motion.div>
+
+    {data?.tasks?.pageInfo?.hasNextPage && (
+      <button
+        onClick={loadMore}
+        className="md:col-span-3 border rounded-lg py-2 text-sm text-blue-600 hover:bg-blue-50"
+      >
+        Load more tasks
+      </button>
+    )}
   </div>
 )};
\ No newline at end of file